@@ -0,0 +1,161 @@
+"""
+Benchmark: clean_html_content (single pass) vs the legacy multi-regex cleaner.
+
+Usage:
+  python -m benchmarks.clean_html_benchmark [CORPUS_DIR] [--repeat N]
+
+CORPUS_DIR may contain exported emails (*.eml) and/or raw HTML bodies
+(*.html, *.htm). For .eml files every text/html part is used. Without a
+corpus, a synthetic set of marketing-style emails is generated so the
+benchmark still runs.
+
+Reports total time and throughput per cleaner, plus a scaling run on one
+body repeated to growing sizes (the legacy cleaner degrades on large,
+brace-heavy bodies; the new one stays linear).
+"""
+import argparse
+import glob
+import html
+import os
+import re
+import time
+from email import policy
+from email.parser import BytesParser
+
+from src.utils.helper import clean_html_content
+
+
+def legacy_clean_html_content(html_text: str) -> str:
+  """The previous implementation, kept verbatim for comparison."""
+  if not html_text:
+      return ""
+  text = html.unescape(html_text)
+  text = re.sub(r'<style[^>]*>.*?</style>', '', text, flags=re.DOTALL | re.IGNORECASE)
+  text = re.sub(r'style="[^"]*"', '', text, flags=re.IGNORECASE)
+  text = re.sub(r"style='[^']*'", '', text, flags=re.IGNORECASE)
+  text = re.sub(r'<script[^>]*>.*?</script>', '', text, flags=re.DOTALL | re.IGNORECASE)
+  text = re.sub(r'<!--.*?-->', '', text, flags=re.DOTALL)
+  text = re.sub(r'<[^>]+>', ' ', text)
+  text = re.sub(r'\{[^}]*\}', '', text)
+  css_selectors = [
+      r'\.\w+\s*{[^}]*}',
+      r'#\w+\s*{[^}]*}',
+      r'@media[^{]+\{[^}]*\}',
+      r'@font-face[^{]+\{[^}]*\}',
+      r'body\s*{[^}]*}',
+      r'div\s*{[^}]*}',
+      r'span\s*{[^}]*}',
+      r'p\s*{[^}]*}',
+      r'a\s*{[^}]*}',
+      r'table\s*{[^}]*}',
+      r'tr\s*{[^}]*}',
+      r'td\s*{[^}]*}',
+      r'th\s*{[^}]*}',
+  ]
+  for pattern in css_selectors:
+      text = re.sub(pattern, '', text, flags=re.DOTALL | re.IGNORECASE)
+  text = re.sub(r'\s+', ' ', text)
+  text = re.sub(r'&nbsp;', ' ', text)
+  text = re.sub(r'&zwnj;', '', text)
+  text = re.sub(r'&amp;', '&', text)
+  text = re.sub(r'&lt;', '<', text)
+  text = re.sub(r'&gt;', '>', text)
+  text = re.sub(r'&quot;', '"', text)
+  text = re.sub(r'&#39;', "'", text)
+  text = re.sub(r'&#\d+;', '', text)
+  text = re.sub(r'\s+', ' ', text).strip()
+  return text
+
+
+# ----------------------------------------------------------
+# Corpus
+# ----------------------------------------------------------
+def load_corpus(corpus_dir: str) -> list[str]:
+  bodies = []
+  for path in sorted(glob.glob(os.path.join(corpus_dir, "**", "*"), recursive=True)):
+    ext = os.path.splitext(path)[1].lower()
+    if ext in (".html", ".htm"):
+      with open(path, "r", encoding="utf-8", errors="replace") as file:
+        bodies.append(file.read())
+    elif ext == ".eml":
+      with open(path, "rb") as file:
+        msg = BytesParser(policy=policy.default).parse(file)
+      for part in msg.walk():
+        if part.get_content_type() == "text/html":
+          bodies.append(part.get_content())
+  return bodies
+
+
+def synthetic_corpus(count: int = 200) -> list[str]:
+  """Newsletter-like bodies: head CSS, media queries, nested tables, tracking pixels."""
+  css = (
+    "<style type='text/css'>body{margin:0;padding:0}"
+    "@media only screen and (max-width:600px){.col{width:100%!important}}"
+    ".btn{background:#ff6600;color:#fff}td{font-family:Arial}</style>"
+  )
+  bodies = []
+  for i in range(count):
+    rows = "".join(
+      f"<tr><td class='col' style=\"padding:8px;color:#333\">"
+      f"Deal {j}: save {j * 5}% on item&nbsp;#{i}-{j} &amp; more&#8230;"
+      f"<a href='https://example.com/p/{i}/{j}?utm_source=mail'>Shop now</a></td></tr>"
+      for j in range(10 + i % 40)
+    )
+    bodies.append(
+      "<!DOCTYPE html><html><head>" + css + "</head><body>"
+      "<div style='display:none'>&zwnj;&nbsp;&zwnj;&nbsp;preheader</div>"
+      "<!--[if mso]><table><tr><td><![endif]-->"
+      f"<table width='600'>{rows}</table>"
+      "<script>var t = {a: 1};</script>"
+      "<img src='https://example.com/open.gif' width='1' height='1'>"
+      "</body></html>"
+    )
+  return bodies
+
+
+# ----------------------------------------------------------
+# Runner
+# ----------------------------------------------------------
+def time_cleaner(cleaner, bodies: list[str], repeat: int) -> float:
+  best = float("inf")
+  for _ in range(repeat):
+    start = time.perf_counter()
+    for body in bodies:
+      cleaner(body)
+    best = min(best, time.perf_counter() - start)
+  return best
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("corpus_dir", nargs="?", help="Directory of .eml/.html emails")
+  parser.add_argument("--repeat", type=int, default=5, help="Runs per cleaner (best is reported)")
+  args = parser.parse_args()
+
+  bodies = load_corpus(args.corpus_dir) if args.corpus_dir else synthetic_corpus()
+  if not bodies:
+    raise SystemExit(f"No .eml/.html bodies found in {args.corpus_dir}")
+
+  total_mb = sum(len(body) for body in bodies) / 1e6
+  source = args.corpus_dir or "synthetic"
+  print(f"Corpus: {len(bodies)} bodies, {total_mb:.2f} MB ({source})\n")
+
+  results = {}
+  for name, cleaner in (("legacy", legacy_clean_html_content), ("single-pass", clean_html_content)):
+    elapsed = time_cleaner(cleaner, bodies, args.repeat)
+    results[name] = elapsed
+    print(f"{name:<12} {elapsed * 1000:9.1f} ms  {total_mb / elapsed:8.1f} MB/s")
+  print(f"\nSpeedup: {results['legacy'] / results['single-pass']:.1f}x")
+
+  # Scaling: one body repeated, plus unbalanced braces (quadratic trigger for the legacy regexes)
+  print("\nScaling (size -> legacy ms / single-pass ms)")
+  seed = max(bodies, key=len)
+  for factor in (1, 4, 16, 64):
+    body = (seed + "{ " * 200) * factor
+    legacy = time_cleaner(legacy_clean_html_content, [body], 1)
+    single = time_cleaner(clean_html_content, [body], 1)
+    print(f"{len(body) / 1e3:9.0f} KB  {legacy * 1000:9.1f} / {single * 1000:7.1f}")
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,50 @@
+"""
+Report: tool-schema tokens every model call carries, per agent, before and
+after compaction (TOOL_SCHEMAS).
+
+Usage:
+  python -m benchmarks.tool_schema_tokens [--show AGENT]
+
+--show prints the compiled schemas of one agent next to the full ones.
+"""
+import argparse
+import json
+
+from configs.settings_loader import settings
+from src.tools.registry import TOOL_REGISTRY
+from src.tools.tool_output import read_more
+from src.tools.tool_schemas import compiled_schemas, schema_report
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+
+def agent_tools() -> dict:
+  agents = {}
+  for name, config in settings.ollama_models["AGENT_MODELS"].items():
+    tools = [TOOL_REGISTRY[tool] for tool in config.get("tools", []) if tool in TOOL_REGISTRY]
+    if tools:
+      agents[name] = tools + [read_more]   # added by BaseAgent
+  return agents
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--show", help="print the schemas of this agent")
+  args = parser.parse_args()
+
+  agents = agent_tools()
+  report = schema_report(agents)
+  print(f"{'agent':<14}{'tools':>6}{'before':>9}{'after':>9}{'saved':>8}")
+  for name, row in report.items():
+    saved = 1 - row["after"] / row["before"] if row["before"] else 0.0
+    print(f"{name:<14}{row['tools']:>6}{row['before']:>9}{row['after']:>9}{saved:>8.0%}")
+
+  if args.show:
+    tools = agents[args.show]
+    for tool in tools:
+      print(f"\n=== {tool.name} ===")
+      print("full:   ", json.dumps(convert_to_openai_tool(tool)["function"], ensure_ascii=False))
+      print("compact:", json.dumps(compiled_schemas(args.show, tools)[tool.name]["function"], ensure_ascii=False))
+
+
+if __name__ == "__main__":
+  main()
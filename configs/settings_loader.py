@@ -42,6 +42,36 @@ class Settings:
   def get_agent_model_config(self, agent_name: str):
     return self.ollama_models["AGENT_MODELS"][agent_name]
   
+  def get_tool_cache_config(self, tool_name: str):
+    return self.ollama_models.get("TOOL_CACHE", {}).get(tool_name, {})
+
+  def get_tool_settings(self, tool_name: str):
+    return self.ollama_models.get("TOOL_SETTINGS", {}).get(tool_name, {})
+
+  def get_database_config(self, db_name: str):
+    return self.ollama_models.get("DATABASES", {}).get(db_name, {})
+
+  def get_ollama_session_config(self):
+    return self.ollama_models.get("OLLAMA_SESSION", {})
+
+  def get_plan_cache_config(self):
+    return self.ollama_models.get("PLAN_CACHE", {})
+
+  def get_context_window_config(self):
+    return self.ollama_models.get("CONTEXT_WINDOW", {})
+
+  def get_tool_schema_config(self):
+    return self.ollama_models.get("TOOL_SCHEMAS", {})
+
+  def get_tool_output_config(self):
+    return self.ollama_models.get("TOOL_OUTPUT", {})
+
+  def get_tool_concurrency_config(self):
+    return self.ollama_models.get("TOOL_CONCURRENCY", {})
+
+  def get_state_memory_config(self):
+    return self.ollama_models.get("STATE_MEMORY", {})
+
   def get_system_prompt(self, agent_name: str):
     key = agent_name.lower().replace(" ", "_")
     return self.system_prompts.get(key)
@@ -1,9 +1,38 @@
 # from configs.settings_loader import settings
+import hashlib
+import threading
 from configs.settings_loader import settings
-from langchain_ollama import ChatOllama
+from ..managers.context_window import context_sizer
+from ..managers.ollama_session import ollama_session
 from ..tools.registry import TOOL_REGISTRY
+from ..tools.tool_concurrency import CONCURRENCY_ENABLED, ToolConcurrencyLimit, step_config
+from ..tools.tool_output import SHAPING_ENABLED, ToolOutputBudget, read_more
+from ..tools.tool_schemas import COMPACT_ENABLED, CompactToolSchemas, compiled_schemas
+from ..utils.cache import TTLCache, make_key
+from ..utils.prompt import stable_json
+from ..utils.tokens import estimate_tokens
 from langchain.agents import create_agent
-from langchain_core.messages import AIMessageChunk
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+# One response cache per agent name, shared by every instance
+# (the Orchestrator and Distiller are re-created on every turn)
+_response_caches: dict[str, TTLCache] = {}
+_response_caches_lock = threading.Lock()
+
+def _get_response_cache(name: str, cache_config: dict) -> TTLCache:
+  # Agents are built from parallel workflow threads: one cache (and SQLite file handle) per name
+  with _response_caches_lock:
+    if name not in _response_caches:
+      _response_caches[name] = TTLCache(
+        path=cache_config.get("path", f"data/cache/responses/{name.lower()}.sqlite"),
+        default_ttl=cache_config.get("ttl", 604800),
+        max_entries=cache_config.get("max_entries", 1000),
+      )
+    return _response_caches[name]
+
+def _sha256(text: str) -> str:
+  return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
 
 class BaseAgent:
   def __init__(self, name: str):
@@ -13,12 +42,12 @@ class BaseAgent:
     system_prompt = settings.get_system_prompt(name)
     self.enable_streaming = agent_config.get("enable_streaming", False)
 
-    self.model = ChatOllama(
+    # Shared HTTP pool + per-model keep_alive (see OLLAMA_SESSION)
+    self.model = ollama_session.chat_model(
       model=agent_config["model"],
       temperature=agent_config.get("temperature", 0.7),
       num_ctx=agent_config.get("num_ctx", 4096),
       num_predict=agent_config.get("num_predict"),
-      base_url=settings.get_base_url(),
       format=agent_config.get("format", ""),
     )
 
@@ -29,12 +58,54 @@ class BaseAgent:
       if name in TOOL_REGISTRY
     ]       
 
+    # Tool results are cut to TOOL_OUTPUT budgets; read_more pages the rest
+    self.middleware = []
+    if self.tools and SHAPING_ENABLED:
+      self.middleware.append(ToolOutputBudget())
+      if read_more not in self.tools:
+        self.tools.append(read_more)
+    # Parallel tool calls of one step, each tool held to its TOOL_CONCURRENCY limit
+    if self.tools and CONCURRENCY_ENABLED:
+      self.middleware.append(ToolConcurrencyLimit())
+    # Short tool descriptions for the model (TOOL_SCHEMAS); full docstrings stay on the tools
+    if self.tools and COMPACT_ENABLED:
+      self.middleware.append(CompactToolSchemas(name, self.tools))
+
+    # Exact-match response cache (AGENT_MODELS.<name>.response_cache).
+    # Never for tool-using agents: their answers depend on live data.
+    cache_config = agent_config.get("response_cache") or {}
+    self.response_cache = None
+    if cache_config.get("enabled") and not self.tools:
+      self.response_cache = _get_response_cache(name, cache_config)
+      self._cache_scope = (
+        agent_config["model"],
+        {
+          "temperature": self.model.temperature,
+          "num_ctx": self.model.num_ctx,
+          "num_predict": self.model.num_predict,
+          "format": self.model.format,
+        },
+        _sha256(system_prompt),
+      )
+
     # ALWAYS use create_agent — works perfectly with zero tools
+    self.system_prompt = system_prompt
     self.agent = create_agent(
       model=self.model,
       tools=self.tools,
       system_prompt=system_prompt,
+      middleware=self.middleware,
     )
+    # num_ctx -> agent; the configured num_ctx is the ceiling (see CONTEXT_WINDOW)
+    self._agents = {self.model.num_ctx: self.agent}
+    # System prompt + tool schemas: the stable head of every prompt
+    if self.tools and COMPACT_ENABLED:
+      schemas = list(compiled_schemas(name, self.tools).values())
+    else:
+      schemas = [convert_to_openai_tool(tool) for tool in self.tools]
+    tool_schemas = stable_json(schemas, indent=None)
+    self._prompt_head = f"{system_prompt}\n{tool_schemas}"
+    self._static_tokens = estimate_tokens(self._prompt_head)
 
   def run(self, input_text: str):
     """
@@ -49,18 +120,130 @@ class BaseAgent:
     else:
         return self._run_atomic(input_text)
 
+  def _cache_key(self, input_text: str) -> str:
+    return make_key(*self._cache_scope, _sha256(input_text))
+
   def _run_atomic(self, input_text: str) -> str:
+    if self.response_cache is not None:
+      # Identical call -> skip the model (concurrent duplicates wait for one call)
+      return self.response_cache.get_or_compute(
+        self._cache_key(input_text),
+        lambda: self._invoke(input_text),
+      )
+    return self._invoke(input_text)
+
+  # -------------------------
+  # Context sizing
+  # -------------------------
+  def _sized_agent(self, input_text: str):
+    """(agent, num_ctx, estimated prompt tokens, shared prefix tokens) for this input."""
+    estimated = self._static_tokens + estimate_tokens(input_text)
+    required = context_sizer.required(estimated, self.model.num_predict, bool(self.tools))
+    num_ctx = context_sizer.bucket_for(self.model.model, required, self.model.num_ctx)
+    prefix = context_sizer.shared_prefix(self.model.model, num_ctx, f"{self._prompt_head}\n{input_text}")
+    if num_ctx not in self._agents:
+      self._agents[num_ctx] = create_agent(
+        model=self.model.model_copy(update={"num_ctx": num_ctx}),
+        tools=self.tools,
+        system_prompt=self.system_prompt,
+        middleware=self.middleware,
+      )
+    return self._agents[num_ctx], num_ctx, estimated, prefix
+
+  def _record_usage(self, num_ctx: int, estimated: int, metadata: dict, prefix: int = 0):
+    context_sizer.record(self.name, self.model.model, num_ctx, estimated, metadata, prefix)
+
+  def _invoke(self, input_text: str) -> str:
+    agent, num_ctx, estimated, prefix = self._sized_agent(input_text)
     input_data = {"messages": [{"role": "user", "content": input_text}]}
-    result = self.agent.invoke(input_data)
+    result = agent.invoke(input_data, config=step_config())
+    return self._final_content(result, num_ctx, estimated, prefix)
+
+  def _final_content(self, result: dict, num_ctx: int, estimated: int, prefix: int) -> str:
+    for message in result["messages"]:
+      if isinstance(message, AIMessage):
+        # Only the first call of a tool loop starts from a fresh prompt
+        self._record_usage(num_ctx, estimated, message.response_metadata, prefix)
+        prefix = 0
     return result["messages"][-1].content
 
   def _run_streaming(self, input_text: str):
+    if self.response_cache is not None:
+      key = self._cache_key(input_text)
+      hit, cached = self.response_cache.get(key)
+      if hit:
+        yield cached
+        return
+
+    chunks = []
+    agent, num_ctx, estimated, prefix = self._sized_agent(input_text)
+    input_data = {"messages": [{"role": "user", "content": input_text}]}
+    for stream_mode, data in agent.stream(
+      input_data,
+      config=step_config(),
+      stream_mode=["updates", "messages"]
+    ):
+      if stream_mode == "messages":
+        token, _ = data
+        if not isinstance(token, AIMessageChunk):
+          continue
+        if token.response_metadata.get("done"):
+          # Final chunk of each model call carries Ollama's counters
+          self._record_usage(num_ctx, estimated, token.response_metadata, prefix)
+          prefix = 0
+        if token.content:
+          chunks.append(token.content)
+          yield token.content
+
+    # Only complete streams are cached
+    if self.response_cache is not None:
+      self.response_cache.set(key, "".join(chunks))
+
+  # -------------------------
+  # Async path
+  # -------------------------
+  async def arun(self, input_text: str) -> str:
+    """Async run(): the complete response (use astream() for chunks)."""
+    if self.response_cache is None:
+      return await self._ainvoke(input_text)
+    return await self.response_cache.aget_or_compute(
+      self._cache_key(input_text),
+      lambda: self._ainvoke(input_text),
+    )
+
+  async def _ainvoke(self, input_text: str) -> str:
+    agent, num_ctx, estimated, prefix = self._sized_agent(input_text)
+    input_data = {"messages": [{"role": "user", "content": input_text}]}
+    result = await agent.ainvoke(input_data, config=step_config())
+    return self._final_content(result, num_ctx, estimated, prefix)
+
+  async def astream(self, input_text: str):
+    """Async _run_streaming(): yields response chunks as they are generated."""
+    if self.response_cache is not None:
+      key = self._cache_key(input_text)
+      hit, cached = self.response_cache.get(key)
+      if hit:
+        yield cached
+        return
+
+    chunks = []
+    agent, num_ctx, estimated, prefix = self._sized_agent(input_text)
     input_data = {"messages": [{"role": "user", "content": input_text}]}
-    for stream_mode, data in self.agent.stream(
+    async for stream_mode, data in agent.astream(
       input_data,
+      config=step_config(),
       stream_mode=["updates", "messages"]
     ):
       if stream_mode == "messages":
         token, _ = data
-        if isinstance(token, AIMessageChunk) and token.content:
-          yield token.content
\ No newline at end of file
+        if not isinstance(token, AIMessageChunk):
+          continue
+        if token.response_metadata.get("done"):
+          self._record_usage(num_ctx, estimated, token.response_metadata, prefix)
+          prefix = 0
+        if token.content:
+          chunks.append(token.content)
+          yield token.content
+
+    if self.response_cache is not None:
+      self.response_cache.set(key, "".join(chunks))
\ No newline at end of file
@@ -1,7 +1,84 @@
 import json
-from typing import Dict, Any, Optional
+from collections import Counter
+from typing import Dict, Any, AsyncIterator, Iterator, Optional
+from pydantic import ValidationError
 from .base_agent import BaseAgent
+from ..schemas.data_models import AgentName, OrchestratorPlan
+from ..utils.json_repair import repair_json
+from ..utils.json_stream import TaskStreamParser
 
+_AGENT_NAMES = {agent.value.lower(): agent.value for agent in AgentName}
+_TRUE_STRINGS = {"true", "yes", "1"}
+
+
+def _coerce_task(task: Any, step: int) -> Optional[Dict[str, Any]]:
+  """One task in TaskSpec form, numbered `step`; None if its agent or instruction is unusable."""
+  if not isinstance(task, dict):
+    return None
+  agent = str(task.get("agent", "")).strip().lower()
+  agent = _AGENT_NAMES.get(agent.removesuffix(" agent").strip())
+  instruction = str(task.get("instruction") or "").strip()
+  if agent is None or not instruction:
+    return None
+
+  parallel = task.get("can_run_in_parallel", False)
+  if isinstance(parallel, str):
+    parallel = parallel.strip().lower() in _TRUE_STRINGS
+  return {
+    "step": step,
+    "agent": agent,
+    "instruction": instruction,
+    "can_run_in_parallel": bool(parallel),
+  }
+
+class _PlanStream:
+  """
+  Streamed tasks, coerced one by one in the order they arrive (steps are
+  renumbered 1..n). Emission stops at the first unusable task; `remaining`
+  then continues from a full parse after the tasks already emitted.
+  """
+
+  def __init__(self):
+    self.parser = TaskStreamParser()
+    self.emitted = 0
+    self.invalid = False
+    self.changed = False
+
+  def _accept(self, items: list[tuple[dict, bool]]) -> list[tuple[Dict[str, Any], bool]]:
+    accepted = []
+    for task, is_last in items:
+      if self.invalid:
+        break
+      spec = _coerce_task(task, self.emitted + 1)
+      if spec is None:
+        self.invalid = True
+        break
+      self.changed = self.changed or spec != {"can_run_in_parallel": False, **task}
+      self.emitted += 1
+      accepted.append((spec, is_last))
+    return accepted
+
+  def feed(self, chunk: str) -> list[tuple[Dict[str, Any], bool]]:
+    return self._accept(self.parser.feed(chunk))
+
+  def finish(self) -> list[tuple[Dict[str, Any], bool]]:
+    return self._accept(self.parser.finish())
+
+  @property
+  def text(self) -> str:
+    return self.parser.text
+
+  @property
+  def complete(self) -> bool:
+    return self.parser.done and not self.parser.failed and not self.invalid and self.emitted > 0
+
+  @property
+  def outcome(self) -> str:
+    return "coerced" if self.changed else "valid"
+
+  def remaining(self, plan: Dict[str, Any]) -> list[tuple[Dict[str, Any], bool]]:
+    tasks = plan.get("tasks", [])[self.emitted:]
+    return [(task, index == len(tasks) - 1) for index, task in enumerate(tasks)]
 
 class OrchestratorAgent(BaseAgent):
   """
@@ -21,6 +98,11 @@ class OrchestratorAgent(BaseAgent):
   }
   """
 
+  # How plans were obtained, across all turns:
+  # valid / coerced (valid JSON, fixed schema) / repaired (local JSON repair)
+  # / llm_repaired (second model call) / failed
+  repair_stats: Counter = Counter()
+
   def __init__(self):
     # Init BaseAgent
     # Load config and prompt for Orchestrator
@@ -31,16 +113,74 @@ class OrchestratorAgent(BaseAgent):
     Calls the underlying LLM and returns a parsed task plan.
     Automatically retries once if JSON is malformed.
     """
-    raw_output = super().run(user_input)
+    return self._parse_plan(super().run(user_input))
 
-    parsed = self._safe_parse_json(raw_output)
-    if parsed is not None:
-      return parsed
+  async def arun(self, user_input: str) -> Dict[str, Any]:
+    """Async run(): the parsed task plan."""
+    return await self._aparse_plan(await super().arun(user_input))
+
+  def stream_plan(self, user_input: str) -> Iterator[tuple[Dict[str, Any], bool]]:
+    """
+    Stream the plan: yields (task_dict, is_last) as soon as each task object
+    is complete, while the model is still generating the rest. Each task is
+    coerced like a full plan (agent names, flags, steps 1..n in order).
+    Falls back to a full parse (+ repair) if the stream is not well-formed.
+    """
+    stream = _PlanStream()
+    for chunk in self._run_streaming(user_input):
+      yield from stream.feed(chunk)
+    yield from stream.finish()
+
+    if stream.complete:
+      self.repair_stats[stream.outcome] += 1
+      return
+
+    # Malformed, truncated or invalid stream: parse the whole text, emit what is left
+    yield from stream.remaining(self._parse_plan(stream.text))
+
+  async def astream_plan(self, user_input: str) -> AsyncIterator[tuple[Dict[str, Any], bool]]:
+    """Async stream_plan()."""
+    stream = _PlanStream()
+    async for chunk in self.astream(user_input):
+      for item in stream.feed(chunk):
+        yield item
+    for item in stream.finish():
+      yield item
+
+    if stream.complete:
+      self.repair_stats[stream.outcome] += 1
+      return
+
+    for item in stream.remaining(await self._aparse_plan(stream.text)):
+      yield item
+
+  def _parse_plan(self, raw_output: str) -> Dict[str, Any]:
+    """
+    Parse a complete plan. Malformed output is repaired locally first; the
+    model is asked to fix it only if that fails.
+    """
+    plan, outcome = self._local_plan(raw_output)
+    if plan is not None:
+      self.repair_stats[outcome] += 1
+      return plan
 
     # -----------------------------
-    # Auto-repair attempt
+    # Auto-repair attempt (LLM)
     # -----------------------------
-    repair_prompt = (
+    repaired_raw = super().run(self._repair_prompt(raw_output))
+    return self._repaired_plan(raw_output, repaired_raw)
+
+  async def _aparse_plan(self, raw_output: str) -> Dict[str, Any]:
+    """Async _parse_plan()."""
+    plan, outcome = self._local_plan(raw_output)
+    if plan is not None:
+      self.repair_stats[outcome] += 1
+      return plan
+    repaired_raw = await super().arun(self._repair_prompt(raw_output))
+    return self._repaired_plan(raw_output, repaired_raw)
+
+  def _repair_prompt(self, raw_output: str) -> str:
+    return (
       "The previous output was NOT valid JSON.\n\n"
       "Return ONLY valid JSON that strictly matches this schema:\n\n"
       "{\n"
@@ -60,17 +200,75 @@ class OrchestratorAgent(BaseAgent):
       f"Invalid output:\n{raw_output}\n"
     )
 
-    repaired_raw = super().run(repair_prompt)
-    repaired = self._safe_parse_json(repaired_raw)
+  def _repaired_plan(self, raw_output: str, repaired_raw: str) -> Dict[str, Any]:
+    repaired, _ = self._local_plan(repaired_raw)
 
     if repaired is None:
+      self.repair_stats["failed"] += 1
       raise ValueError(
         "Orchestrator failed to produce valid JSON after repair attempt.\n"
         f"Raw Output:\n{raw_output}"
       )
 
+    self.repair_stats["llm_repaired"] += 1
     return repaired
 
+  # -------------------------------------
+  # Helper: Local repair
+  # -------------------------------------
+  def _local_plan(self, raw_output: str) -> tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """(plan, outcome) without calling the model, or (None, None)."""
+    parsed = self._safe_parse_json(raw_output)
+    if parsed is not None:
+      try:
+        OrchestratorPlan.model_validate(parsed)
+        return parsed, "valid"
+      except ValidationError:
+        pass
+
+    data = parsed if parsed is not None else repair_json(
+      raw_output, accept=lambda value: self._coerce_plan(value, truncated=True) is not None
+    )
+    plan = self._coerce_plan(data, truncated=parsed is None)
+    if plan is None:
+      return None, None
+    return plan, "coerced" if parsed is not None else "repaired"
+
+  def _coerce_plan(self, data: Any, truncated: bool = False) -> Optional[Dict[str, Any]]:
+    """
+    Coerce almost-right JSON to the OrchestratorPlan schema: steps renumbered
+    1..n in their given order, agent names matched case-insensitively, extra
+    fields dropped. If the JSON had to be repaired (`truncated`), an
+    incomplete LAST task is dropped; in a complete plan it is an error.
+    """
+    if isinstance(data, list):
+      data = {"tasks": data}
+    if not isinstance(data, dict):
+      return None
+    tasks = data.get("tasks")
+    if not isinstance(tasks, list):
+      return None
+
+    items = [task for task in tasks if isinstance(task, dict)]
+    if all(isinstance(task.get("step"), (int, float)) for task in items):
+      items.sort(key=lambda task: task["step"])
+
+    coerced = []
+    for index, task in enumerate(items):
+      spec = _coerce_task(task, len(coerced) + 1)
+      if spec is None:
+        if truncated and index == len(items) - 1 and coerced:
+          break
+        return None
+      coerced.append(spec)
+
+    if not coerced:
+      return None
+    try:
+      return OrchestratorPlan.model_validate({"tasks": coerced}).model_dump(mode="json")
+    except ValidationError:
+      return None
+
   # -------------------------------------
   # Helper: Build LLM input
   # -------------------------------------
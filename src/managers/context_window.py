@@ -0,0 +1,155 @@
+from __future__ import annotations
+import math
+import os
+import threading
+import time
+from collections import deque
+from typing import NamedTuple, Optional
+from configs.settings_loader import settings
+from src.utils.tokens import estimate_tokens
+
+class CallUsage(NamedTuple):
+  """Token accounting for one model call (one agent run may make several)."""
+  agent: str
+  model: str
+  num_ctx: int
+  estimated_tokens: int         # our estimate for the whole prompt
+  prompt_tokens: Optional[int]  # prompt_eval_count reported by Ollama
+  output_tokens: Optional[int]  # eval_count
+  prompt_eval_ms: Optional[float]
+  eval_ms: Optional[float]
+  load_ms: Optional[float]
+  prefix_tokens: int = 0        # estimated prefix shared with the model's previous prompt
+
+class ContextSizer:
+  """
+  Picks num_ctx per call instead of every agent's worst case.
+
+  required = estimate * (1 + margin) + reply reserve (+ tool headroom)
+  -> smallest bucket in `sizes` that fits, capped at the agent's num_ctx.
+
+  Ollama reloads a model whenever num_ctx changes, so buckets are sticky per
+  model: once a window is loaded, smaller calls reuse it. The window only
+  shrinks after `shrink_after` seconds without a call that needed it, or
+  after the model was evicted (the next call loads it anyway).
+
+  It also keeps the token accounting: Ollama's counters per call, and the
+  prefix each prompt shares with the previous one on the same model (what
+  the server can serve from its KV cache instead of re-evaluating).
+  """
+
+  def __init__(self, config: dict | None = None):
+    config = config if config is not None else settings.get_context_window_config()
+    self.enabled = config.get("enabled", True)
+    self.sizes = sorted(config.get("sizes", [4096, 8192, 16384, 32768, 65536]))
+    self.margin = config.get("margin", 0.1)
+    self.output_reserve = config.get("output_reserve", 2048)
+    self.tool_headroom = config.get("tool_headroom", 8192)
+    self.shrink_after = config.get("shrink_after", 600)
+    self.warm_size = config.get("warm_size", self.sizes[0])
+
+    self._lock = threading.Lock()
+    self._loaded: dict[str, int] = {}       # model -> num_ctx we last sent
+    self._needed_at: dict[str, float] = {}  # model -> last time that size was needed
+    self._last_prompt: dict[str, tuple[int, str]] = {}  # model -> (num_ctx, prompt)
+    self.usage: deque[CallUsage] = deque(maxlen=config.get("history", 500))
+
+  # -------------------------
+  # Sizing
+  # -------------------------
+  def required(self, prompt_tokens: int, num_predict: Optional[int], has_tools: bool) -> int:
+    reserve = min(num_predict or self.output_reserve, self.output_reserve)
+    headroom = self.tool_headroom if has_tools else 0
+    return math.ceil(prompt_tokens * (1 + self.margin)) + reserve + headroom
+
+  def bucket_for(self, model: str, required: int, ceiling: int) -> int:
+    """num_ctx for one call (`ceiling` = the agent's configured num_ctx)."""
+    if not self.enabled:
+      return ceiling
+    fit = next((size for size in self.sizes if size >= required), self.sizes[-1])
+    fit = min(fit, ceiling)
+
+    now = time.monotonic()
+    with self._lock:
+      loaded = self._loaded.get(model)
+      if loaded is not None and fit < loaded and now - self._needed_at.get(model, 0) < self.shrink_after:
+        # A bigger window is resident: reuse it rather than reload
+        return loaded
+      self._loaded[model] = fit
+      self._needed_at[model] = now
+      return fit
+
+  def note_loaded(self, model: str, num_ctx: int):
+    """The model is resident with this window (e.g. after pre-warming)."""
+    with self._lock:
+      self._loaded[model] = num_ctx
+      self._needed_at[model] = time.monotonic()
+
+  def reset(self, model: str):
+    """The model was evicted: the next call can pick any size."""
+    with self._lock:
+      self._loaded.pop(model, None)
+      self._needed_at.pop(model, None)
+      self._last_prompt.pop(model, None)
+
+  # -------------------------
+  # Accounting
+  # -------------------------
+  def shared_prefix(self, model: str, num_ctx: int, prompt: str) -> int:
+    """Estimated tokens `prompt` shares with the previous prompt sent to `model`."""
+    with self._lock:
+      previous = self._last_prompt.get(model)
+      self._last_prompt[model] = (num_ctx, prompt)
+    if previous is None or previous[0] != num_ctx:
+      return 0    # first call, or a new window: the model is (re)loaded
+    return estimate_tokens(os.path.commonprefix([previous[1], prompt]))
+
+  def record(self, agent: str, model: str, num_ctx: int, estimated: int, metadata: dict,
+             prefix_tokens: int = 0):
+    """Record one call from the response_metadata Ollama returns."""
+    def ms(key):
+      value = metadata.get(key)
+      return value / 1e6 if value is not None else None
+
+    self.usage.append(CallUsage(
+      agent=agent,
+      model=model,
+      num_ctx=num_ctx,
+      estimated_tokens=estimated,
+      prompt_tokens=metadata.get("prompt_eval_count"),
+      output_tokens=metadata.get("eval_count"),
+      prompt_eval_ms=ms("prompt_eval_duration"),
+      eval_ms=ms("eval_duration"),
+      load_ms=ms("load_duration"),
+      prefix_tokens=prefix_tokens,
+    ))
+
+  def stats(self) -> dict[str, dict]:
+    """
+    Per agent: calls, tokens in / out, mean window, windows used, prefix
+    tokens reused and the prompt-eval time that saved (at each call's
+    measured ms per evaluated token).
+    """
+    summary: dict[str, dict] = {}
+    for call in list(self.usage):
+      entry = summary.setdefault(call.agent, {
+        "calls": 0, "prompt_tokens": 0, "output_tokens": 0,
+        "estimated_tokens": 0, "num_ctx_total": 0, "windows": set(),
+        "prefix_tokens": 0, "prompt_eval_ms": 0.0, "prompt_eval_saved_ms": 0.0,
+      })
+      entry["calls"] += 1
+      entry["prompt_tokens"] += call.prompt_tokens or 0
+      entry["output_tokens"] += call.output_tokens or 0
+      entry["estimated_tokens"] += call.estimated_tokens
+      entry["num_ctx_total"] += call.num_ctx
+      entry["windows"].add(call.num_ctx)
+      entry["prefix_tokens"] += call.prefix_tokens
+      entry["prompt_eval_ms"] += call.prompt_eval_ms or 0.0
+      if call.prefix_tokens and call.prompt_tokens and call.prompt_eval_ms:
+        entry["prompt_eval_saved_ms"] += call.prefix_tokens * call.prompt_eval_ms / call.prompt_tokens
+    for entry in summary.values():
+      entry["mean_num_ctx"] = entry.pop("num_ctx_total") / entry["calls"]
+      entry["windows"] = sorted(entry["windows"])
+    return summary
+
+context_sizer = ContextSizer()
@@ -0,0 +1,254 @@
+from __future__ import annotations
+import asyncio
+import threading
+import time
+import weakref
+from collections import Counter, deque
+from datetime import datetime
+import httpx
+from ollama import Client
+from langchain_ollama import ChatOllama, OllamaEmbeddings
+from configs.settings_loader import settings
+from src.managers.context_window import context_sizer
+
+_UNIT_SECONDS = {"s": 1, "m": 60, "h": 3600}
+
+def _seconds(keep_alive) -> int:
+  """'30m' / '1h' / '45s' / 300 / -1 -> seconds (Ollama's int form)."""
+  if isinstance(keep_alive, str) and keep_alive[-1:] in _UNIT_SECONDS:
+    return int(float(keep_alive[:-1]) * _UNIT_SECONDS[keep_alive[-1]])
+  return int(keep_alive)
+
+class _PerLoopAsyncTransport(httpx.AsyncBaseTransport):
+  """
+  One async connection pool per event loop: pooled connections belong to the
+  loop that opened them, so a pool shared across asyncio.run() calls breaks
+  ("Event loop is closed"). Pools go away with their loop.
+  """
+
+  def __init__(self, limits: httpx.Limits):
+    self._limits = limits
+    self._transports: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+  def _current(self) -> httpx.AsyncHTTPTransport:
+    loop = asyncio.get_running_loop()
+    transport = self._transports.get(loop)
+    if transport is None:
+      transport = self._transports[loop] = httpx.AsyncHTTPTransport(limits=self._limits)
+    return transport
+
+  async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+    return await self._current().handle_async_request(request)
+
+  async def aclose(self):
+    transport = self._transports.pop(asyncio.get_running_loop(), None)
+    if transport is not None:
+      await transport.aclose()
+
+class OllamaSession:
+  """
+  One Ollama "session" shared by every agent.
+
+  - Shared HTTP connection pools: every ChatOllama (and the session's own
+    client) sends requests through the same httpx transports, so agents
+    created per turn (e.g. the Orchestrator) reuse warm TCP connections.
+  - keep_alive pinned per model (OLLAMA_SESSION.keep_alive / .models), sent
+    with every request, so models stay resident between turns.
+  - `prewarm()` loads every configured model with the num_ctx its agents
+    use (a different num_ctx forces a reload), before the first request;
+    with per-call sizing (CONTEXT_WINDOW) that is the sizer's warm_size.
+  - A monitor thread polls /api/ps and records load / eviction / reload
+    events (`events`), printed as they happen.
+  """
+
+  def __init__(self, config: dict | None = None, base_url: str | None = None):
+    config = config if config is not None else settings.get_ollama_session_config()
+    self.base_url = base_url or settings.get_base_url()
+    self.default_keep_alive = config.get("keep_alive", "30m")
+    self.model_keep_alive = config.get("models", {}) or {}
+    self.prewarm_enabled = config.get("prewarm", True)
+    self.monitor_interval = config.get("monitor_interval", 30)
+    self.log_events = config.get("log_events", True)
+
+    limits = httpx.Limits(
+      max_connections=config.get("max_connections", 16),
+      max_keepalive_connections=config.get("max_keepalive_connections", 8),
+      keepalive_expiry=config.get("keepalive_expiry", 300),
+    )
+    self._transport = httpx.HTTPTransport(limits=limits)
+    self._async_transport = _PerLoopAsyncTransport(limits)
+    self.client = Client(host=self.base_url, transport=self._transport)
+
+    self._embeddings: dict[str, OllamaEmbeddings] = {}
+    self.events: deque = deque(maxlen=200)
+    self._loaded: dict[str, dict] = {}
+    self._lock = threading.Lock()
+    self._started = False
+    self._stop = threading.Event()
+
+  # -------------------------
+  # Chat models
+  # -------------------------
+  def keep_alive_for(self, model: str):
+    return self.model_keep_alive.get(model, self.default_keep_alive)
+
+  def chat_model(self, model: str, **kwargs) -> ChatOllama:
+    """ChatOllama bound to the shared pools, with the model's keep_alive."""
+    return ChatOllama(
+      model=model,
+      base_url=self.base_url,
+      keep_alive=self.keep_alive_for(model),
+      sync_client_kwargs={"transport": self._transport},
+      async_client_kwargs={"transport": self._async_transport},
+      **kwargs,
+    )
+
+  def embeddings(self, model: str | None = None) -> OllamaEmbeddings:
+    """Shared OllamaEmbeddings per model (default: EMBEDDING_MODEL)."""
+    model = model or settings.get_embedding_model()["model"]
+    with self._lock:
+      if model not in self._embeddings:
+        self._embeddings[model] = OllamaEmbeddings(
+          model=model,
+          base_url=self.base_url,
+          keep_alive=_seconds(self.keep_alive_for(model)),  # int-only here
+          sync_client_kwargs={"transport": self._transport},
+          async_client_kwargs={"transport": self._async_transport},
+        )
+      return self._embeddings[model]
+
+  # -------------------------
+  # Pre-warming
+  # -------------------------
+  def warm_targets(self) -> dict[str, int]:
+    """
+    model -> num_ctx to load it with: the size most agents on that model use.
+    Reports agents whose num_ctx differs (every switch reloads the model).
+    With per-call sizing every model starts at CONTEXT_WINDOW.warm_size.
+    """
+    if context_sizer.enabled:
+      return {
+        config["model"]: min(context_sizer.warm_size, config.get("num_ctx", 4096))
+        for config in settings.ollama_models["AGENT_MODELS"].values()
+      }
+
+    sizes: dict[str, Counter] = {}
+    agents: dict[tuple[str, int], list[str]] = {}
+    for name, config in settings.ollama_models["AGENT_MODELS"].items():
+      num_ctx = config.get("num_ctx", 4096)
+      sizes.setdefault(config["model"], Counter())[num_ctx] += 1
+      agents.setdefault((config["model"], num_ctx), []).append(name)
+
+    targets = {}
+    for model, counter in sizes.items():
+      targets[model] = counter.most_common(1)[0][0]
+      for num_ctx in counter:
+        if num_ctx != targets[model]:
+          print(
+            f"⚠️ Ollama: {', '.join(agents[(model, num_ctx)])} use(s) {model} with num_ctx {num_ctx} "
+            f"(others {targets[model]}) — switching between them reloads the model"
+          )
+    return targets
+
+  def prewarm(self):
+    """Load every configured chat model (and the embedding model) now."""
+    for model, num_ctx in self.warm_targets().items():
+      started = time.perf_counter()
+      try:
+        # Empty prompt = load only, no generation
+        self.client.generate(
+          model=model,
+          prompt="",
+          keep_alive=self.keep_alive_for(model),
+          options={"num_ctx": num_ctx},
+        )
+        context_sizer.note_loaded(model, num_ctx)
+        self._record("warmed", model, f"ctx {num_ctx} in {time.perf_counter() - started:.1f}s")
+      except Exception as e:
+        self._record("warm_failed", model, str(e))
+
+    embedding = settings.get_embedding_model()["model"]
+    try:
+      self.client.embed(model=embedding, input="", keep_alive=self.keep_alive_for(embedding))
+      self._record("warmed", embedding, "embedding")
+    except Exception as e:
+      self._record("warm_failed", embedding, str(e))
+
+    self.poll()
+
+  # -------------------------
+  # Load / eviction monitor
+  # -------------------------
+  def poll(self) -> dict[str, dict]:
+    """Diff /api/ps against the last poll; record loaded / evicted / reloaded models."""
+    try:
+      running = {
+        model.model: {
+          "context_length": model.context_length,
+          "size_vram": model.size_vram,
+          "expires_at": model.expires_at,
+        }
+        for model in self.client.ps().models
+      }
+    except Exception:
+      return self._loaded
+
+    with self._lock:
+      previous, self._loaded = self._loaded, running
+
+    for name, info in running.items():
+      if name not in previous:
+        self._record("loaded", name, self._describe(info))
+      elif info["context_length"] != previous[name]["context_length"]:
+        self._record("reloaded", name, self._describe(info))
+    for name in previous.keys() - running.keys():
+      context_sizer.reset(name)
+      self._record("evicted", name, "")
+    return running
+
+  def loaded(self) -> dict[str, dict]:
+    with self._lock:
+      return dict(self._loaded)
+
+  def _monitor(self):
+    while not self._stop.wait(self.monitor_interval):
+      self.poll()
+
+  def start(self):
+    """Pre-warm (in the background) and start the monitor. Safe to call twice."""
+    with self._lock:
+      if self._started:
+        return
+      self._started = True
+
+    def run():
+      if self.prewarm_enabled:
+        self.prewarm()
+      if self.monitor_interval:
+        self._monitor()
+
+    threading.Thread(target=run, name="ollama-session", daemon=True).start()
+
+  def stop(self):
+    self._stop.set()
+
+  # -------------------------
+  # Helpers
+  # -------------------------
+  @staticmethod
+  def _describe(info: dict) -> str:
+    parts = []
+    if info.get("context_length"):
+      parts.append(f"ctx {info['context_length']}")
+    if info.get("size_vram"):
+      parts.append(f"{info['size_vram'] / 1e9:.1f} GB VRAM")
+    if info.get("expires_at"):
+      parts.append(f"until {info['expires_at']:%H:%M:%S}")
+    return ", ".join(parts)
+
+  def _record(self, kind: str, model: str, detail: str):
+    self.events.append((datetime.now(), kind, model, detail))
+    if self.log_events:
+      print(f"🧠 Ollama {kind}: {model}" + (f" ({detail})" if detail else ""))
+
+ollama_session = OllamaSession()
@@ -0,0 +1,70 @@
+from __future__ import annotations
+import asyncio
+import shutil
+from halo import Halo
+
+class ConsoleOutput:
+  """
+  Terminal output for one workflow: a Halo spinner for status text (it
+  animates on its own thread, so it never blocks the caller), answers
+  printed as they stream.
+  """
+
+  def __init__(self):
+    self._spinner: Halo | None = None
+
+  def status(self, text: str):
+    self.stop()
+    self._spinner = Halo(text=text, spinner='dots', color=None)
+    self._spinner.start()
+
+  def stop(self):
+    if self._spinner is not None:
+      self._spinner.stop()
+      self._spinner = None
+
+  def answer_start(self, agent: str):
+    self.stop()
+    print(f"| Second Brain 🤖 ({agent}) >", end=" ")
+
+  def answer_chunk(self, chunk: str):
+    print(chunk, end="", flush=True)
+
+  def answer_end(self):
+    print()
+    print("|", "-" * (shutil.get_terminal_size().columns - 2))
+
+  def answer(self, agent: str, text: str):
+    self.stop()
+    print(f"| Second Brain 🤖 ({agent}) >", text)
+    print("|", "-" * (shutil.get_terminal_size().columns - 2))
+
+class QueueOutput:
+  """
+  Output as events on an asyncio.Queue, for workflows running side by side
+  in one event loop (a terminal spinner per workflow would interleave):
+    ("status", text) / ("answer_start", agent) / ("chunk", text)
+    ("answer_end", None) / ("answer", (agent, text)) / ("stop", None)
+  Use from the event loop's thread only (WorkflowManager.arun).
+  """
+
+  def __init__(self, queue: asyncio.Queue | None = None):
+    self.queue = queue if queue is not None else asyncio.Queue()
+
+  def status(self, text: str):
+    self.queue.put_nowait(("status", text))
+
+  def stop(self):
+    self.queue.put_nowait(("stop", None))
+
+  def answer_start(self, agent: str):
+    self.queue.put_nowait(("answer_start", agent))
+
+  def answer_chunk(self, chunk: str):
+    self.queue.put_nowait(("chunk", chunk))
+
+  def answer_end(self):
+    self.queue.put_nowait(("answer_end", None))
+
+  def answer(self, agent: str, text: str):
+    self.queue.put_nowait(("answer", (agent, text)))
@@ -0,0 +1,294 @@
+from __future__ import annotations
+import difflib
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import NamedTuple, Optional
+import numpy as np
+from pydantic import ValidationError
+from configs.settings_loader import settings
+from src.schemas.data_models import OrchestratorPlan
+from src.managers.ollama_session import ollama_session
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
+# Absolute dates / times in an instruction go stale: such plans are not reused
+_DATE_RE = re.compile(
+  r"\b\d{4}-\d{1,2}-\d{1,2}\b|\b\d{1,2}/\d{1,2}(?:/\d{2,4})?\b|\b\d{1,2}:\d{2}\b"
+  r"|\b(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\.? \d{1,2}\b",
+  re.IGNORECASE,
+)
+
+# Requests that point at earlier turns depend on memory, not just their text
+_CONTEXT_WORDS = {
+  "it", "its", "that", "these", "those", "them", "they", "he", "she", "him", "her",
+  "above", "again", "previous", "earlier", "reply", "continue",
+}
+
+# Differences in these tokens never change a plan
+_FILLER_WORDS = {
+  "a", "an", "the", "please", "pls", "can", "could", "would", "you", "me", "my", "i", "is",
+  "are", "what", "whats", "s", "do", "does", "to", "for", "on", "of", "in", "and", "now",
+  "show", "tell", "give", "list", "check", "hey", "hi",
+}
+
+# Span differences that are values (dates, amounts, names), not what to do or
+# where to look: only these are substituted. Any other difference ('emails' ->
+# 'expenses', 'the web' -> 'my notes') may need another agent; the hit is rejected.
+_TIME_WORDS = {
+  "today", "tomorrow", "yesterday", "tonight", "morning", "afternoon", "evening", "noon",
+  "day", "days", "week", "weeks", "weekend", "month", "months", "quarter", "year", "years",
+  "this", "next", "last", "past", "coming",
+  "monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday",
+  "mon", "tue", "wed", "thu", "fri", "sat", "sun",
+  "january", "february", "march", "april", "june", "july", "august", "september",
+  "october", "november", "december", "jan", "feb", "mar", "apr", "may", "jun", "jul",
+  "aug", "sep", "sept", "oct", "nov", "dec",
+}
+_VALUE_RE = re.compile(
+  r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+|https?://\S+|\"[^\"]*\"|'[^']*'|[$€£¥]?\d[\d,.:]*%?"
+)
+
+class PlanMatch(NamedTuple):
+  plan: OrchestratorPlan
+  similarity: float
+  cached_request: str
+
+class PlanCache:
+  """
+  Semantic cache of Orchestrator plans, keyed by the embedded user request.
+
+  lookup(request):
+    1. embed the request, cosine-similarity against every cached request
+    2. best match >= `threshold` -> re-template its instructions: token spans
+       that differ between the two requests are substituted into the
+       instructions if they are values (dates, amounts, names); any other
+       difference, or one that cannot be mapped, rejects the hit
+    3. the re-templated plan must still validate as an OrchestratorPlan
+
+  store(request, plan) skips plans that depend on more than the request text
+  (absolute dates in instructions, references to earlier turns).
+
+  `stats()` reports lookups / hits / rejections and the hit rate.
+  """
+
+  def __init__(self, config: dict | None = None):
+    config = config if config is not None else settings.get_plan_cache_config()
+    self.enabled = config.get("enabled", True)
+    self.threshold = config.get("threshold", 0.92)
+    self.max_entries = config.get("max_entries", 500)
+
+    self._lock = threading.Lock()
+    self._requests: list[str] = []
+    self._plans: list[str] = []
+    self._matrix: Optional[np.ndarray] = None   # (n, dim), rows L2-normalized
+    self._last_embedding: tuple[str, np.ndarray] | None = None
+    self.metrics = {
+      "lookups": 0, "hits": 0, "misses": 0,
+      "rejected_template": 0, "rejected_invalid": 0,
+      "stored": 0, "skipped": 0,
+    }
+
+    path = config.get("path", "data/cache/plan_cache.sqlite")
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    self._db = sqlite3.connect(path, check_same_thread=False)
+    self._db.execute(
+      "CREATE TABLE IF NOT EXISTS plans ("
+      "request TEXT PRIMARY KEY, embedding BLOB NOT NULL, plan TEXT NOT NULL, "
+      "hits INTEGER NOT NULL DEFAULT 0, last_used REAL NOT NULL)"
+    )
+    self._db.commit()
+    self._load()
+
+  # -------------------------
+  # Public API
+  # -------------------------
+  def lookup(self, request: str) -> Optional[PlanMatch]:
+    if not self.enabled or _is_context_dependent(request):
+      return None
+
+    with self._lock:
+      self.metrics["lookups"] += 1
+      if self._matrix is None:
+        self.metrics["misses"] += 1
+        return None
+
+    # A network round trip: never under the lock (lookups run concurrently)
+    try:
+      vector = self._embed(request)
+    except Exception:
+      # Embedding model unavailable: plan with the Orchestrator as usual
+      with self._lock:
+        self.metrics["misses"] += 1
+      return None
+
+    with self._lock:
+      scores = self._matrix @ vector
+      best = int(np.argmax(scores))
+      similarity = float(scores[best])
+      cached_request, cached_plan = self._requests[best], self._plans[best]
+
+      if similarity < self.threshold:
+        self.metrics["misses"] += 1
+        return None
+
+      plan = OrchestratorPlan.model_validate_json(cached_plan)
+      instructions = retemplate(cached_request, request, [task.instruction for task in plan.tasks])
+      if instructions is None:
+        self.metrics["rejected_template"] += 1
+        return None
+
+      try:
+        plan = OrchestratorPlan.model_validate({
+          "tasks": [
+            {**task.model_dump(), "instruction": instruction}
+            for task, instruction in zip(plan.tasks, instructions)
+          ]
+        })
+      except ValidationError:
+        self.metrics["rejected_invalid"] += 1
+        return None
+
+      self.metrics["hits"] += 1
+      self._db.execute(
+        "UPDATE plans SET hits = hits + 1, last_used = ? WHERE request = ?",
+        (time.time(), cached_request),
+      )
+      self._db.commit()
+      return PlanMatch(plan, similarity, cached_request)
+
+  def store(self, request: str, plan: OrchestratorPlan):
+    """Cache a plan that executed successfully (if it only depends on the request)."""
+    if not self.enabled:
+      return
+    if _is_context_dependent(request) or _has_stale_dates(request, plan):
+      self.metrics["skipped"] += 1
+      return
+
+    try:
+      vector = self._embed(request)
+    except Exception:
+      with self._lock:
+        self.metrics["skipped"] += 1
+      return
+
+    with self._lock:
+      self._db.execute(
+        "INSERT OR REPLACE INTO plans (request, embedding, plan, hits, last_used) "
+        "VALUES (?, ?, ?, 0, ?)",
+        (request, vector.astype(np.float32).tobytes(), plan.model_dump_json(), time.time()),
+      )
+      self._db.execute(
+        "DELETE FROM plans WHERE request NOT IN "
+        "(SELECT request FROM plans ORDER BY last_used DESC LIMIT ?)",
+        (self.max_entries,),
+      )
+      self._db.commit()
+      self.metrics["stored"] += 1
+      self._load()
+
+  def stats(self) -> dict:
+    with self._lock:
+      stats = dict(self.metrics)
+      stats["entries"] = len(self._requests)
+    stats["hit_rate"] = stats["hits"] / stats["lookups"] if stats["lookups"] else 0.0
+    return stats
+
+  # -------------------------
+  # Internals
+  # -------------------------
+  def _embed(self, request: str) -> np.ndarray:
+    # lookup() then store() embed the same request: reuse it
+    last = self._last_embedding
+    if last and last[0] == request:
+      return last[1]
+    vector = np.asarray(ollama_session.embeddings().embed_query(request), dtype=np.float32)
+    vector /= np.linalg.norm(vector) or 1.0
+    self._last_embedding = (request, vector)
+    return vector
+
+  def _load(self):
+    rows = self._db.execute("SELECT request, embedding, plan FROM plans").fetchall()
+    self._requests = [row[0] for row in rows]
+    self._plans = [row[2] for row in rows]
+    self._matrix = (
+      np.vstack([np.frombuffer(row[1], dtype=np.float32) for row in rows]) if rows else None
+    )
+
+# -------------------------
+# Helpers
+# -------------------------
+def _tokens(text: str) -> list[re.Match]:
+  return list(_TOKEN_RE.finditer(text))
+
+def _is_filler(tokens: list[re.Match]) -> bool:
+  return all(
+    token.group().lower() in _FILLER_WORDS or not token.group()[0].isalnum()
+    for token in tokens
+  )
+
+def _is_value_span(tokens: list[re.Match], text: str) -> bool:
+  """Every token is filler, punctuation or part of a value (see _TIME_WORDS / _VALUE_RE)."""
+  values = [match.span() for pattern in (_VALUE_RE, _DATE_RE) for match in pattern.finditer(text)]
+  for token in tokens:
+    word = token.group()
+    if word.lower() in _FILLER_WORDS or not word[0].isalnum() or word.lower() in _TIME_WORDS:
+      continue
+    if any(start <= token.start() and token.end() <= end for start, end in values):
+      continue
+    # A capitalized word mid-request is a name (person, place, project)
+    if word[0].isupper() and token.start() > 0:
+      continue
+    return False
+  return True
+
+def _is_context_dependent(request: str) -> bool:
+  return any(token.group().lower() in _CONTEXT_WORDS for token in _tokens(request))
+
+def _has_stale_dates(request: str, plan: OrchestratorPlan) -> bool:
+  request_dates = {match.group().lower() for match in _DATE_RE.finditer(request)}
+  return any(
+    match.group().lower() not in request_dates
+    for task in plan.tasks
+    for match in _DATE_RE.finditer(task.instruction)
+  )
+
+def retemplate(old_request: str, new_request: str, instructions: list[str]) -> Optional[list[str]]:
+  """
+  Carry the differences between two requests over into the instructions.
+  'calendar today' -> 'calendar tomorrow' rewrites 'today' in every
+  instruction. Only values (dates, amounts, names, addresses) are carried
+  over. Returns None if a difference is anything else, or has no place in
+  the instructions.
+  """
+  old_tokens, new_tokens = _tokens(old_request), _tokens(new_request)
+  matcher = difflib.SequenceMatcher(
+    a=[token.group().lower() for token in old_tokens],
+    b=[token.group().lower() for token in new_tokens],
+    autojunk=False,
+  )
+
+  instructions = list(instructions)
+  for opcode, i1, i2, j1, j2 in matcher.get_opcodes():
+    if opcode == "equal":
+      continue
+    old_span, new_span = old_tokens[i1:i2], new_tokens[j1:j2]
+    if _is_filler(old_span) and _is_filler(new_span):
+      continue
+    if opcode != "replace":
+      # Added / removed content cannot be placed into the old instructions
+      return None
+    if not (_is_value_span(old_span, old_request) and _is_value_span(new_span, new_request)):
+      # Changes what to do, not which value: the cached routing may be wrong
+      return None
+
+    old_text = old_request[old_span[0].start():old_span[-1].end()]
+    new_text = new_request[new_span[0].start():new_span[-1].end()]
+    pattern = re.compile(rf"(?<!\w){re.escape(old_text)}(?!\w)", re.IGNORECASE)
+    if not any(pattern.search(instruction) for instruction in instructions):
+      return None
+    instructions = [pattern.sub(lambda _: new_text, instruction) for instruction in instructions]
+
+  return instructions
@@ -1,32 +1,60 @@
 from __future__ import annotations
-from typing import Callable
+import asyncio
+from typing import Awaitable, Callable
 from langgraph.graph import StateGraph, START, END
 from langgraph.checkpoint.memory import InMemorySaver
 from src.schemas.task_state import TaskState, TaskStatus
-from src.schemas.data_models import OrchestratorPlan
+from src.schemas.data_models import OrchestratorPlan, TaskSpec
 from src.agents.orchestrator import OrchestratorAgent
 from src.agents.distiller import DistillerAgent
+from src.managers.output import ConsoleOutput
+from src.managers.plan_cache import PlanCache
 from src.utils.helper import ingest_memory_texts
+from src.utils.memory_packer import MemoryPacker
+from src.utils.prompt import CALL, STATIC, TURN, PromptBuilder, rounded_now
+import threading
 import traceback
-import json
-from datetime import datetime
-from halo import Halo
-import shutil
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+
+# Minutes the injected clock is rounded down to
+CLOCK_RESOLUTION_MINUTES = 15
+
+ORCHESTRATOR_RULES = """\
+* Memory is strictly read-only.
+* Memory may only inform agent selection and instructions.
+* Each plan executes in a fresh state.
+* Step numbering restarts from 1 every turn."""
 
 class WorkflowManager:
   """
   LangGraph-based workflow executor.
   """
 
-  def __init__(self, agent_runner: Callable[[str, str, bool]]):
+  def __init__(
+    self,
+    agent_runner: Callable[[str, str, bool]],
+    async_agent_runner: Callable[[str, str, bool], Awaitable] | None = None,
+    output=None,
+  ):
     """
     the function that runs an agent
     agent_runner(agent_name: str, input_text: str) -> output_text: str
+    async_agent_runner (for arun): same arguments; returns an awaitable
+    (stream=False) or an async iterator of chunks (stream=True)
+    output: ConsoleOutput (default) / QueueOutput
     """
     self.agent_runner = agent_runner
+    self.async_agent_runner = async_agent_runner
+    self.output = output if output is not None else ConsoleOutput()
     self.checkpointer = InMemorySaver()
     self.thread_id = "default"
     self.app = None
+    self.plan_cache = PlanCache()
+    self.memory_packer = MemoryPacker()
+    # (user_request, packed state memory): one memory segment per turn, so
+    # every prompt of the turn shares the prefix up to the instruction
+    self._turn_memory: tuple[str, str] | None = None
+    self._turn_memory_lock = threading.Lock()
 
   # -------------------------
   # Public API
@@ -35,43 +63,202 @@ class WorkflowManager:
     """
     High-level workflow execution entrypoint.
     """
-    self.spinner = Halo(text='Second Brain 🤖 > I am thinking! Patient!', spinner='dots', color=None)
-    self.spinner.start()
+    self._turn_memory = None
+    self.output.status('Second Brain 🤖 > I am thinking! Patient!')
+
+    match = self.plan_cache.lookup(user_request)
+    if match is not None:
+      # Known request type: no Orchestrator call, the graph runs every task
+      self.output.status(f"Second Brain 🤖 > I have done this before! ({match.similarity:.2f})")
+      plan = match.plan
+      state = TaskState()
+      state.init_from_plan(plan=plan, user_request=user_request)
+    else:
+      # Tasks start while the Orchestrator is still writing the plan
+      plan, state = self._plan_and_execute(user_request)
 
-    orchestrator = OrchestratorAgent()
+    self.app = self._compile_with_memory(plan)
 
-    memory_context = self._get_state_memory(limit=5)
-    orchestrator_input = (
-      f"User request:\n{user_request}\n\n"
-      f"Memory (JSON, read-only, do NOT use as execution inputs):\n{memory_context}"
-      f"""
-### CRITICAL RULES (READ THIS LAST):
-* Memory is strictly read-only.
-* Memory may only inform agent selection and instructions.
-* Each plan executes in a fresh state.
-* Step numbering restarts from 1 every turn.
-      """
+    # Completed tasks are skipped by their nodes; the graph run records the
+    # turn in the checkpointer (state memory for later turns)
+    final_state = self.app.invoke(
+      state,
+      {"configurable": {"thread_id": self.thread_id}}
     )
 
-    raw_plan = orchestrator.run(orchestrator_input)
-    plan = OrchestratorPlan.model_validate(raw_plan)
+    # Only plans that ran cleanly are worth replaying
+    if all(task.status == TaskStatus.COMPLETED for task in final_state["tasks"].values()):
+      self.plan_cache.store(user_request, plan)
 
-    state = TaskState()
-    state.init_from_plan(plan=plan, user_request=user_request)
+    return final_state
 
-    self.app = self._compile_with_memory(plan)
+  async def arun(self, user_request: str) -> TaskState:
+    """
+    Async workflow execution: same steps as run(), with agents awaited on
+    the event loop. Blocking pieces (embeddings, memory ingestion) run in
+    worker threads. Independent WorkflowManagers (one per conversation)
+    can run concurrently in one loop.
+    """
+    if self.async_agent_runner is None:
+      raise ValueError("arun() needs an async_agent_runner")
+    self._turn_memory = None
+    self.output.status('Second Brain 🤖 > I am thinking! Patient!')
+
+    match = await asyncio.to_thread(self.plan_cache.lookup, user_request)
+    if match is not None:
+      self.output.status(f"Second Brain 🤖 > I have done this before! ({match.similarity:.2f})")
+      plan = match.plan
+      state = TaskState()
+      state.init_from_plan(plan=plan, user_request=user_request)
+    else:
+      plan, state = await self._aplan_and_execute(user_request)
 
-    final_state = self.app.invoke(
+    self.app = self._compile_with_memory(plan, self._make_async_task_node)
+    final_state = await self.app.ainvoke(
       state,
       {"configurable": {"thread_id": self.thread_id}}
     )
 
+    if all(task.status == TaskStatus.COMPLETED for task in final_state["tasks"].values()):
+      await asyncio.to_thread(self.plan_cache.store, user_request, plan)
+
     return final_state
 
+  # -------------------------
+  # Streaming plan execution
+  # -------------------------
+  def _plan_and_execute(self, user_request: str) -> tuple[OrchestratorPlan, TaskState]:
+    """
+    Stream the Orchestrator's plan and start each task as soon as it is
+    emitted and its dependencies are done: a task depends on every earlier
+    step unless it declares can_run_in_parallel.
+    """
+    orchestrator = OrchestratorAgent()
+    state = TaskState(user_request=user_request)
+    specs: list[TaskSpec] = []
+    pending: list[tuple[TaskSpec, bool]] = []
+    futures: dict[int, Future] = {}
+    flagged_last = False
+
+    def dependencies_done(spec: TaskSpec) -> bool:
+      if spec.can_run_in_parallel:
+        return True
+      return all(
+        other.step in futures and futures[other.step].done()
+        for other in specs if other.step < spec.step
+      )
+
+    def launch_ready():
+      for item in list(pending):
+        spec, is_last = item
+        if dependencies_done(spec):
+          pending.remove(item)
+          node = self._make_task_node(spec.step, is_last_task=is_last)
+          futures[spec.step] = executor.submit(node, state)
+
+    with ThreadPoolExecutor(max_workers=4, thread_name_prefix="task") as executor:
+      for raw_task, is_last in orchestrator.stream_plan(self._orchestrator_input(user_request)):
+        spec = TaskSpec.model_validate(raw_task)
+        if specs and spec.step <= specs[-1].step:
+          raise ValueError("Task steps must be in ascending order")
+        specs.append(spec)
+        state.add_task(spec)
+        pending.append((spec, is_last))
+        flagged_last = is_last
+        launch_ready()
+
+      if not specs:
+        raise ValueError("Orchestrator produced an empty plan")
+
+      launch_ready()
+      while pending:
+        running = [future for future in futures.values() if not future.done()]
+        wait(running, return_when=FIRST_COMPLETED)
+        launch_ready()
+      wait(futures.values())
+
+    # A malformed stream can end without flagging the final task: show it now
+    if not flagged_last:
+      self._print_output(state.tasks[specs[-1].step])
+
+    plan = OrchestratorPlan(tasks=specs)
+    state.plan = plan
+    return plan, state
+
+  async def _aplan_and_execute(self, user_request: str) -> tuple[OrchestratorPlan, TaskState]:
+    """_plan_and_execute on the event loop: each ready task becomes an asyncio task."""
+    orchestrator = OrchestratorAgent()
+    state = TaskState(user_request=user_request)
+    specs: list[TaskSpec] = []
+    pending: list[tuple[TaskSpec, bool]] = []
+    running: dict[int, asyncio.Task] = {}
+    flagged_last = False
+
+    def dependencies_done(spec: TaskSpec) -> bool:
+      if spec.can_run_in_parallel:
+        return True
+      return all(
+        other.step in running and running[other.step].done()
+        for other in specs if other.step < spec.step
+      )
+
+    def launch_ready():
+      for item in list(pending):
+        spec, is_last = item
+        if dependencies_done(spec):
+          pending.remove(item)
+          node = self._make_async_task_node(spec.step, is_last_task=is_last)
+          running[spec.step] = asyncio.create_task(node(state))
+
+    async for raw_task, is_last in orchestrator.astream_plan(self._orchestrator_input(user_request)):
+      spec = TaskSpec.model_validate(raw_task)
+      if specs and spec.step <= specs[-1].step:
+        raise ValueError("Task steps must be in ascending order")
+      specs.append(spec)
+      state.add_task(spec)
+      pending.append((spec, is_last))
+      flagged_last = is_last
+      launch_ready()
+
+    if not specs:
+      raise ValueError("Orchestrator produced an empty plan")
+
+    # Tasks may have finished while the stream was closing: launch first, so
+    # something is always running while tasks are pending
+    launch_ready()
+    while pending:
+      active = [task for task in running.values() if not task.done()]
+      await asyncio.wait(active, return_when=asyncio.FIRST_COMPLETED)
+      launch_ready()
+    await asyncio.gather(*running.values())
+
+    if not flagged_last:
+      self._print_output(state.tasks[specs[-1].step])
+
+    plan = OrchestratorPlan(tasks=specs)
+    state.plan = plan
+    return plan, state
+
+  def _print_output(self, task):
+    if task.status != TaskStatus.COMPLETED:
+      return
+    self.output.answer(task.agent, task.output)
+
+  def _orchestrator_input(self, user_request: str) -> str:
+    # Most stable first: consecutive calls share the longest possible prefix
+    return (
+      PromptBuilder()
+      .add(STATIC, "### CRITICAL RULES:", ORCHESTRATOR_RULES)
+      .add(TURN, "Memory (JSON, read-only, do NOT use as execution inputs):", self._state_memory_for_turn(user_request))
+      .add(CALL, "User request:", user_request)
+      .build()
+    )
+
   # -------------------------
   # Graph construction
   # ------------------------- 
-  def _build_graph(self, plan: OrchestratorPlan) -> StateGraph:
+  def _build_graph(self, plan: OrchestratorPlan, make_node=None) -> StateGraph:
+    make_node = make_node or self._make_task_node
     # Define global workflow state for the graph
     graph = StateGraph(TaskState)
     num_tasks = len(plan.tasks)
@@ -82,7 +269,7 @@ class WorkflowManager:
       node_name = self._task_node_name(task.step, task.agent)
       graph.add_node(
         node_name,
-        self._make_task_node(task.step, is_last_task=is_last)
+        make_node(task.step, is_last_task=is_last)
       )
 
     # Add edges
@@ -99,8 +286,8 @@ class WorkflowManager:
 
     return graph
   
-  def _compile_with_memory(self, plan: OrchestratorPlan) -> StateGraph:
-    graph = self._build_graph(plan)
+  def _compile_with_memory(self, plan: OrchestratorPlan, make_node=None) -> StateGraph:
+    graph = self._build_graph(plan, make_node)
     return graph.compile(checkpointer=self.checkpointer)
 
   # -------------------------
@@ -111,32 +298,29 @@ class WorkflowManager:
       # current task 
       task = state.tasks[step]
 
-      # return state upon task completion
-      if task.status == TaskStatus.COMPLETED:
+      # return state if the task already ran (e.g. during plan streaming)
+      if task.status in (TaskStatus.COMPLETED, TaskStatus.FAILED):
         return state
 
       try:
         # run current task
         should_stream = is_last_task
         state.mark_running(step)
-        input_text = self._resolve_inputs(task.instruction)
+        input_text = self._resolve_inputs(task.instruction, state.user_request)
         output = self.agent_runner(task.agent, input_text, should_stream)
 
         if should_stream:
           full_output = ""
           for index, chunk in enumerate(output):
             if index == 0:
-              self.spinner.stop()
-              print(f"| Second Brain 🤖 ({task.agent}) >", end=" ")
-            print(chunk, end="", flush=True)
+              self.output.answer_start(task.agent)
+            self.output.answer_chunk(chunk)
             full_output += chunk
-          print()
-          print("|", "-" * (shutil.get_terminal_size().columns - 2))
+          self.output.answer_end()
         else:
           full_output = output
 
-        self.spinner = Halo(text='Second Brain 🤖 > I am memorizing!', spinner='dots', color=None)
-        self.spinner.start()
+        self.output.status('Second Brain 🤖 > I am memorizing!')
         
         # generate summary
         distiller = DistillerAgent()
@@ -154,34 +338,115 @@ class WorkflowManager:
             "user_request": state.user_request,
           }
         )
-        self.spinner.stop()
+        self.output.stop()
 
       except Exception as e:
-        tb = traceback.format_exc()
-        print("\n🔥 TASK FAILED TRACEBACK 🔥")
-        print(tb)
-        print("🔥 END TRACEBACK 🔥\n")
-        # mark current task failed
-        state.mark_failed(step, str(e))
+        self._task_failed(state, step, e)
 
       return state
     
     return node
 
+  def _make_async_task_node(self, step: int, is_last_task: bool = False):
+    async def node(state: TaskState) -> TaskState:
+      task = state.tasks[step]
+      if task.status in (TaskStatus.COMPLETED, TaskStatus.FAILED):
+        return state
+
+      try:
+        should_stream = is_last_task
+        state.mark_running(step)
+        input_text = self._resolve_inputs(task.instruction, state.user_request)
+        output = self.async_agent_runner(task.agent, input_text, should_stream)
+
+        if should_stream:
+          full_output = ""
+          index = 0
+          async for chunk in output:
+            if index == 0:
+              self.output.answer_start(task.agent)
+            self.output.answer_chunk(chunk)
+            full_output += chunk
+            index += 1
+          self.output.answer_end()
+        else:
+          full_output = await output
+
+        self.output.status('Second Brain 🤖 > I am memorizing!')
+        summary = await DistillerAgent().arun(full_output)
+        state.mark_completed(step, summary, full_output)
+
+        # FAISS writes are blocking: keep them off the event loop
+        await asyncio.to_thread(
+          ingest_memory_texts,
+          text=full_output,
+          metadata={
+            "agent": task.agent,
+            "step": task.step,
+            "user_request": state.user_request,
+          }
+        )
+        self.output.stop()
+
+      except Exception as e:
+        self._task_failed(state, step, e)
+
+      return state
+
+    return node
+
+  def _task_failed(self, state: TaskState, step: int, error: Exception):
+    tb = traceback.format_exc()
+    print("\n🔥 TASK FAILED TRACEBACK 🔥")
+    print(tb)
+    print("🔥 END TRACEBACK 🔥\n")
+    # mark current task failed
+    state.mark_failed(step, str(error))
+
   # -------------------------
   # Input resolution
   # -------------------------
-  def _resolve_inputs(self, instruction: str) -> str:
-    memory_context = self._get_state_memory()
-
+  def _resolve_inputs(self, instruction: str, user_request: str) -> str:
     return (
-      f"Instruction: \n{instruction}\n\n"
-      f"State Memory (JSON, read-only):\n{memory_context}\n\n"
+      PromptBuilder()
+      .add(TURN, "State Memory (JSON, read-only):", self._state_memory_for_turn(user_request))
+      .add(CALL, "Instruction:", instruction)
+      .build()
     )
 
-  def _get_state_memory(self, limit: int = 5) -> str:
+  def _state_memory_for_turn(self, user_request: str) -> str:
+    """State memory ranked against the turn's request, packed once per turn."""
+    with self._turn_memory_lock:
+      if self._turn_memory is None or self._turn_memory[0] != user_request:
+        self._turn_memory = (user_request, self._get_state_memory(query=user_request))
+      return self._turn_memory[1]
+
+  def _get_state_memory(self, query: str = "") -> str:
+    # === INJECT CURRENT CONTEXT ===
+    # You can get these from your session/user context
+    # Rounded: a per-second clock would change the prompt on every call
+    current_datetime = rounded_now(CLOCK_RESOLUTION_MINUTES)
+    current_location = "Hong Kong, HK"  # pull from user profile or IP
+
+    # Format cleanly for the LLM
+    context_injection = {
+      "current user": "Jimmy",
+      "current_datetime": current_datetime.strftime("%A %Y-%m-%d %H:%M %Z"),
+      "current_location": current_location,
+      "current_timezone": str(current_datetime.tzinfo),
+      "note": "This is the real-time context. Use it to interpret relative dates like 'today', 'this week', 'last month', etc."
+    }
+
+    # Historical memory (newest first here), ranked and clipped to the
+    # STATE_MEMORY token budget; emitted oldest first, then the clock.
+    # Tasks started while the plan streams run before the graph exists:
+    # no history yet, but they still get the context.
+    return self.memory_packer.pack(self._memory_entries(), query=query, context=context_injection)
+
+  def _memory_entries(self) -> list[dict]:
+    """Past turns of this thread, newest first (empty before the graph is compiled)."""
     if not self.app:
-      return "{}"
+      return []
 
     config = {"configurable": {"thread_id": self.thread_id}}
     history = list(self.app.get_state_history(config))
@@ -214,32 +479,10 @@ class WorkflowManager:
       memory_entries.append(entry)
       seen_requests.add(user_request)
 
-      if len(memory_entries) >= limit:
+      if len(memory_entries) >= self.memory_packer.candidates:
         break
 
-    if not memory_entries:
-        base_context = {}
-    else:
-        base_context = {"state_memory": list(reversed(memory_entries))}
-
-    # === INJECT CURRENT CONTEXT ===
-    # You can get these from your session/user context
-    current_datetime = datetime.now().astimezone()  # or use a fixed one for consistency
-    current_location = "Hong Kong, HK"  # pull from user profile or IP
-
-    # Format cleanly for the LLM
-    context_injection = {
-      "current user": "Jimmy",
-      "current_datetime": current_datetime.strftime("%A %Y-%m-%d %H:%M:%S %Z"),
-      "current_location": current_location,
-      "current_timezone": str(current_datetime.tzinfo),
-      "note": "This is the real-time context. Use it to interpret relative dates like 'today', 'this week', 'last month', etc."
-    }
-
-    # Merge: context first, then historical memory
-    final_memory = {**context_injection, **base_context}
-
-    return json.dumps(final_memory, indent=2)
+    return memory_entries
 
   @staticmethod
   def _task_node_name(step: int, agent_name: str) -> str:
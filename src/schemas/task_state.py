@@ -3,7 +3,7 @@ from typing import Dict, Optional
 from pydantic import BaseModel, Field, ConfigDict
 from datetime import datetime, timezone
 from enum import Enum
-from .data_models import OrchestratorPlan
+from .data_models import OrchestratorPlan, TaskSpec
 
 class TaskStatus(str, Enum):
   """Allowed lifecycle states for a task."""
@@ -67,6 +67,15 @@ class TaskState(BaseModel):
     self.user_request = user_request
     self.updated_at = datetime.now(timezone.utc)
 
+  def add_task(self, task: TaskSpec):
+    """Register one task as it streams in (the plan is set once complete)."""
+    self.tasks[task.step] = TaskRuntimeState(
+      step=task.step,
+      agent=task.agent,
+      instruction=task.instruction
+    )
+    self.updated_at = datetime.now(timezone.utc)
+
   def mark_running(self, step: int):
     self.tasks[step].status = TaskStatus.RUNNING
     self.updated_at = datetime.now(timezone.utc)
@@ -4,6 +4,7 @@ from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 from langchain.tools import tool
 from .gmail import get_creds
+from ..utils.interval_tree import IntervalTree
 
 from datetime import timedelta
 
@@ -24,6 +25,108 @@ def _hkt_to_utc(dt_str: str) -> str:
 
     return dt.replace(tzinfo=timezone.utc).isoformat().replace("+00:00", "Z")
 
+def _to_hkt(value: str) -> datetime:
+    """
+    Convert an API timestamp (RFC3339 with offset/Z, or all-day "YYYY-MM-DD")
+    into a naive datetime in Hong Kong Time (UTC+8).
+    """
+    dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+    # All-day dates carry no timezone and are already calendar-local
+    if dt.tzinfo is None:
+        return dt
+
+    return (dt.astimezone(timezone.utc) + timedelta(hours=8)).replace(tzinfo=None)
+
+# Google accepts up to 1000 calls per batch, but recommends <= 50 for Calendar
+BATCH_LIMIT = 50
+
+def _event_time(value: str) -> dict:
+  """
+  Build a start/end payload: timed (HKT -> UTC) or all-day ("YYYY-MM-DD").
+  The other kind is sent as null: PATCH merges nested objects, so a timed
+  event moved to a date would otherwise keep its old dateTime.
+  """
+  if "T" in value:
+    return {"dateTime": _hkt_to_utc(value), "timeZone": "UTC", "date": None}
+  return {"date": value, "dateTime": None, "timeZone": None}
+
+def _shifted_end(event: dict, start_time: str) -> str:
+  """
+  New end_time (HKT, same format as start_time) for an event whose start
+  moves to `start_time`: keeps its duration, at least one day if all-day.
+  """
+  old_start = _to_hkt(event["start"].get("dateTime") or event["start"]["date"])
+  old_end = _to_hkt(event["end"].get("dateTime") or event["end"]["date"])
+  new_start = datetime.fromisoformat(start_time)
+  if "T" in start_time:
+    return (new_start + (old_end - old_start)).isoformat()
+  return (new_start + max(old_end - old_start, timedelta(days=1))).date().isoformat()
+
+def _event_body(
+  summary: str = None,
+  start_time: str = None,
+  end_time: str = None,
+  description: str = None,
+  location: str = None,
+  attendees: list[str] = None,
+) -> dict:
+  """
+  Build a partial event resource containing ONLY the provided fields.
+  Used both for inserts and for PATCH semantics on updates.
+  """
+  body = {}
+  if summary:
+    body["summary"] = summary
+  if description:
+    body["description"] = description
+  if location:
+    body["location"] = location
+  if start_time:
+    body["start"] = _event_time(start_time)
+  if end_time:
+    body["end"] = _event_time(end_time)
+  if attendees:
+    body["attendees"] = [{"email": email} for email in attendees]
+  return body
+
+def _execute_batch(service, requests: list) -> list[tuple]:
+  """
+  Execute API requests through the Google batch HTTP endpoint.
+
+  Requests are sent in chunks of BATCH_LIMIT. Returns one
+  (response, error) tuple per request, in the original order.
+  """
+  results = [(None, None)] * len(requests)
+
+  def callback(request_id, response, exception):
+    results[int(request_id)] = (response, exception)
+
+  for offset in range(0, len(requests), BATCH_LIMIT):
+    batch = service.new_batch_http_request(callback=callback)
+    for index, request in enumerate(requests[offset:offset + BATCH_LIMIT], start=offset):
+      batch.add(request, request_id=str(index))
+    batch.execute()
+
+  return results
+
+def _format_batch_report(action: str, labels: list[str], outcomes: list[tuple]) -> str:
+  """One line per item: [n] OK/FAILED, plus a totals header."""
+  lines = []
+  succeeded = 0
+  for i, (label, (response, error)) in enumerate(zip(labels, outcomes), 1):
+    if error is None:
+      succeeded += 1
+      detail = ""
+      if isinstance(response, dict) and response.get("id"):
+        detail = f" | ID: {response['id']} | Link: {response.get('htmlLink', 'N/A')}"
+      lines.append(f"[{i}] OK {label}{detail}")
+    else:
+      lines.append(f"[{i}] FAILED {label} | {error}")
+
+  header = f"Batch {action}: {succeeded}/{len(labels)} succeeded"
+  return "\n".join([header, *lines])
+
 @tool
 def search_calendar_events(
   time_min: str, 
@@ -133,24 +236,8 @@ def create_calendar_event(
   try:
     service = build("calendar", "v3", credentials=creds)
 
-    event = {
-      "summary": summary,
-      "description": description,
-      "location": location,
-      "start": {},
-      "end": {},
-    }
-
-    # Detect all-day vs timed
-    if "T" in start_time:
-      event["start"] = {"dateTime": _hkt_to_utc(start_time), "timeZone": "UTC"}
-      event["end"] = {"dateTime": _hkt_to_utc(end_time), "timeZone": "UTC"}
-    else:
-      event["start"] = {"date": start_time}
-      event["end"] = {"date": end_time}
-
-    if attendees:
-      event["attendees"] = [{"email": email} for email in attendees]
+    # Detect all-day vs timed inside _event_time
+    event = _event_body(summary, start_time, end_time, description, location, attendees)
 
     created_event = service.events().insert(calendarId=calendar_id, body=event).execute()
 
@@ -185,31 +272,22 @@ def update_calendar_event(
   creds = get_creds()
   try:
     service = build("calendar", "v3", credentials=creds)
-    event = service.events().get(calendarId=calendar_id, eventId=event_id).execute()
-
-    if summary:
-      event["summary"] = summary
-    if description:
-      event["description"] = description
-    if location:
-      event["location"] = location
 
-    if start_time or end_time:
-      if start_time and "T" in start_time:
-        event["start"] = {"dateTime": _hkt_to_utc(start_time), "timeZone": "UTC"}
-      elif start_time:
-        event["start"] = {"date": start_time}
+    # PATCH sends only the changed fields — a single round trip, no prior GET
+    # unless only the start moves: the end then shifts to keep the duration
+    if start_time and not end_time:
+      event = service.events().get(calendarId=calendar_id, eventId=event_id, fields="start,end").execute()
+      end_time = _shifted_end(event, start_time)
 
-      if end_time and "T" in end_time:
-        event["end"] = {"dateTime": _hkt_to_utc(end_time), "timeZone": "UTC"}
-      elif end_time:
-        event["end"] = {"date": end_time}
+    patch = _event_body(summary, start_time, end_time, description, location)
+    if not patch:
+      return "update_calendar_event error: no fields to update were provided."
 
-    updated_event = service.events().update(calendarId=calendar_id, eventId=event_id, body=event).execute()
+    updated_event = service.events().patch(calendarId=calendar_id, eventId=event_id, body=patch).execute()
 
     return f"Event updated successfully!\nTitle: {updated_event.get('summary')}\nLink: {updated_event.get('htmlLink')}"
 
-  except HttpError as e:
+  except (HttpError, ValueError, KeyError) as e:
     tb = traceback.format_exc()
     print("\n🔥 TASK FAILED TRACEBACK 🔥\n", tb, "\n🔥 END TRACEBACK 🔥\n")
     return f"update_calendar_event error: {str(e)}"
@@ -236,4 +314,340 @@ def delete_calendar_event(event_id: str, calendar_id: str = "primary") -> str:
   except HttpError as e:
     tb = traceback.format_exc()
     print("\n🔥 TASK FAILED TRACEBACK 🔥\n", tb, "\n🔥 END TRACEBACK 🔥\n")
-    return f"delete_calendar_event error: {str(e)}"
\ No newline at end of file
+    return f"delete_calendar_event error: {str(e)}"
+
+
+@tool
+def batch_create_calendar_events(events: list[dict], calendar_id: str = "primary") -> str:
+  """
+  Create many events in ONE batched request (e.g. "block every Friday afternoon for a month").
+
+  Args:
+    events: List of event objects. Each object accepts the same fields as
+      create_calendar_event:
+        - summary (required)
+        - start_time (required): naive HKT ISO datetime or "YYYY-MM-DD"
+        - end_time (required): same format as start_time
+        - description, location (optional)
+        - attendees (optional): list of email addresses
+    calendar_id: Target calendar
+
+  Returns:
+    Per-event report: one line per item with OK (ID + link) or FAILED (reason).
+  """
+  creds = get_creds()
+  try:
+    service = build("calendar", "v3", credentials=creds)
+
+    labels, requests, outcomes = [], [], []
+    for item in events:
+      label = f"'{item.get('summary', 'No title')}' {item.get('start_time', '?')}"
+      labels.append(label)
+      if not item.get("summary") or not item.get("start_time") or not item.get("end_time"):
+        outcomes.append((None, "summary, start_time and end_time are required"))
+        continue
+
+      body = _event_body(
+        item["summary"],
+        item["start_time"],
+        item["end_time"],
+        item.get("description"),
+        item.get("location"),
+        item.get("attendees"),
+      )
+      requests.append(service.events().insert(calendarId=calendar_id, body=body))
+      outcomes.append(None)
+
+    # Fill the pending slots with batch results, keeping input order
+    batch_results = iter(_execute_batch(service, requests))
+    outcomes = [outcome if outcome is not None else next(batch_results) for outcome in outcomes]
+
+    return _format_batch_report("create", labels, outcomes)
+
+  except HttpError as e:
+    tb = traceback.format_exc()
+    print("\n🔥 TASK FAILED TRACEBACK 🔥\n", tb, "\n🔥 END TRACEBACK 🔥\n")
+    return f"batch_create_calendar_events error: {str(e)}"
+
+
+@tool
+def batch_update_calendar_events(updates: list[dict], calendar_id: str = "primary") -> str:
+  """
+  Update many events in ONE batched request. Each update is a partial PATCH.
+
+  Args:
+    updates: List of update objects. Each object has:
+        - event_id (required)
+        - summary, start_time, end_time, description, location (optional):
+          only the fields to change, same formats as update_calendar_event
+    calendar_id: Calendar containing the events
+
+  Returns:
+    Per-event report: one line per item with OK or FAILED (reason).
+  """
+  creds = get_creds()
+  try:
+    service = build("calendar", "v3", credentials=creds)
+
+    # Moved starts without an end: fetch those events first (one batch) to keep their duration
+    moved = [
+      item["event_id"] for item in updates
+      if item.get("event_id") and item.get("start_time") and not item.get("end_time")
+    ]
+    current = dict(zip(moved, _execute_batch(service, [
+      service.events().get(calendarId=calendar_id, eventId=event_id, fields="start,end")
+      for event_id in moved
+    ])))
+
+    labels, requests, outcomes = [], [], []
+    for item in updates:
+      event_id = item.get("event_id")
+      labels.append(f"event {event_id}")
+
+      end_time = item.get("end_time")
+      if event_id in current and item.get("start_time") and not end_time:
+        event, error = current[event_id]
+        if error is not None:
+          outcomes.append((None, error))
+          continue
+        try:
+          end_time = _shifted_end(event, item["start_time"])
+        except (ValueError, KeyError) as e:
+          outcomes.append((None, f"invalid start_time: {e}"))
+          continue
+
+      patch = _event_body(
+        item.get("summary"),
+        item.get("start_time"),
+        end_time,
+        item.get("description"),
+        item.get("location"),
+      )
+      if not event_id or not patch:
+        outcomes.append((None, "event_id and at least one field to change are required"))
+        continue
+
+      requests.append(service.events().patch(calendarId=calendar_id, eventId=event_id, body=patch))
+      outcomes.append(None)
+
+    batch_results = iter(_execute_batch(service, requests))
+    outcomes = [outcome if outcome is not None else next(batch_results) for outcome in outcomes]
+
+    return _format_batch_report("update", labels, outcomes)
+
+  except HttpError as e:
+    tb = traceback.format_exc()
+    print("\n🔥 TASK FAILED TRACEBACK 🔥\n", tb, "\n🔥 END TRACEBACK 🔥\n")
+    return f"batch_update_calendar_events error: {str(e)}"
+
+
+@tool
+def batch_delete_calendar_events(event_ids: list[str], calendar_id: str = "primary") -> str:
+  """
+  Delete many events permanently in ONE batched request.
+
+  Args:
+    event_ids: Event IDs to delete
+    calendar_id: Calendar containing the events
+
+  Returns:
+    Per-event report: one line per item with OK or FAILED (reason).
+  """
+  creds = get_creds()
+  try:
+    service = build("calendar", "v3", credentials=creds)
+
+    requests = [
+      service.events().delete(calendarId=calendar_id, eventId=event_id)
+      for event_id in event_ids
+    ]
+    outcomes = _execute_batch(service, requests)
+
+    return _format_batch_report("delete", [f"event {event_id}" for event_id in event_ids], outcomes)
+
+  except HttpError as e:
+    tb = traceback.format_exc()
+    print("\n🔥 TASK FAILED TRACEBACK 🔥\n", tb, "\n🔥 END TRACEBACK 🔥\n")
+    return f"batch_delete_calendar_events error: {str(e)}"
+
+
+# ------------------------------------------------------------------
+# Free/busy + conflict engine (computed locally, compact output)
+# ------------------------------------------------------------------
+def _fmt_slot(start: datetime, end: datetime) -> str:
+  minutes = int((end - start).total_seconds() // 60)
+  return f"{start:%a %Y-%m-%d %H:%M}–{end:%H:%M} ({minutes} min)"
+
+def _free_slots(
+  busy: IntervalTree,
+  range_start: datetime,
+  range_end: datetime,
+  duration: timedelta,
+  work_start: str,
+  work_end: str,
+  include_weekends: bool,
+  max_slots: int,
+) -> list[tuple[datetime, datetime]]:
+  """Sweep each working-hour window, subtracting busy intervals from the tree."""
+  ws_hour, ws_minute = map(int, work_start.split(":"))
+  we_hour, we_minute = map(int, work_end.split(":"))
+
+  slots = []
+  day = range_start.replace(hour=0, minute=0, second=0, microsecond=0)
+  while day < range_end and len(slots) < max_slots:
+    if include_weekends or day.weekday() < 5:
+      window_start = max(day.replace(hour=ws_hour, minute=ws_minute), range_start)
+      window_end = min(day.replace(hour=we_hour, minute=we_minute), range_end)
+
+      cursor = window_start
+      for busy_start, busy_end, _ in busy.overlapping(window_start, window_end):
+        if busy_start - cursor >= duration:
+          slots.append((cursor, busy_start))
+        cursor = max(cursor, busy_end)
+      if window_end - cursor >= duration:
+        slots.append((cursor, window_end))
+
+    day += timedelta(days=1)
+
+  return slots[:max_slots]
+
+@tool
+def find_free_slots(
+  time_min: str,
+  time_max: str,
+  duration_minutes: int = 60,
+  work_start: str = "09:00",
+  work_end: str = "18:00",
+  include_weekends: bool = False,
+  calendar_ids: list[str] | None = None,
+  max_slots: int = 10,
+) -> str:
+  """
+  Find free time slots of at least `duration_minutes` within working hours.
+  Uses the Calendar freeBusy endpoint and computes slots locally —
+  prefer this over search_calendar_events for "when am I free" questions.
+
+  Args:
+    time_min: Range start, naive HKT ISO datetime (e.g. "2026-01-12T00:00:00")
+    time_max: Range end, naive HKT ISO datetime
+    duration_minutes: Minimum slot length (default 60)
+    work_start: Start of working hours, "HH:MM" HKT (default "09:00")
+    work_end: End of working hours, "HH:MM" HKT (default "18:00")
+    include_weekends: Also search Saturdays and Sundays (default False)
+    calendar_ids: Calendars to treat as busy (default ["primary"])
+    max_slots: Maximum number of slots to return (default 10)
+
+  Returns:
+    Compact list of free slots in HKT.
+  """
+  creds = get_creds()
+  try:
+    service = build("calendar", "v3", credentials=creds)
+    calendar_ids = calendar_ids or ["primary"]
+
+    response = service.freebusy().query(body={
+      "timeMin": _hkt_to_utc(time_min),
+      "timeMax": _hkt_to_utc(time_max),
+      "items": [{"id": calendar_id} for calendar_id in calendar_ids],
+    }).execute()
+
+    intervals = []
+    for calendar_id, info in response.get("calendars", {}).items():
+      if info.get("errors"):
+        return f"find_free_slots error: calendar '{calendar_id}': {info['errors']}"
+      for period in info.get("busy", []):
+        intervals.append((_to_hkt(period["start"]), _to_hkt(period["end"]), calendar_id))
+
+    slots = _free_slots(
+      IntervalTree(intervals),
+      datetime.fromisoformat(time_min),
+      datetime.fromisoformat(time_max),
+      timedelta(minutes=duration_minutes),
+      work_start,
+      work_end,
+      include_weekends,
+      max_slots,
+    )
+
+    if not slots:
+      return f"No free slots of {duration_minutes} min between {time_min} and {time_max} (HKT)."
+
+    lines = [f"Free slots (>= {duration_minutes} min, {work_start}-{work_end} HKT):"]
+    lines.extend(f"• {_fmt_slot(start, end)}" for start, end in slots)
+    return "\n".join(lines)
+
+  # Malformed or offset-aware times fail in parsing / naive-vs-aware comparisons
+  except (HttpError, ValueError, TypeError) as e:
+    tb = traceback.format_exc()
+    print("\n🔥 TASK FAILED TRACEBACK 🔥\n", tb, "\n🔥 END TRACEBACK 🔥\n")
+    return f"find_free_slots error: {str(e)}"
+
+@tool
+def check_conflicts(slots: list[dict], calendar_id: str = "primary") -> str:
+  """
+  Check one or more proposed time slots against existing events.
+  Call this before creating timed events instead of reading raw search results.
+
+  Args:
+    slots: List of {"start_time": ..., "end_time": ...} objects,
+      naive HKT ISO datetimes (e.g. "2026-01-10T20:00:00")
+    calendar_id: Calendar to check (default "primary")
+
+  Returns:
+    One line per slot: FREE, or CONFLICT with the overlapping event titles, times and IDs.
+  """
+  creds = get_creds()
+  try:
+    service = build("calendar", "v3", credentials=creds)
+
+    proposed = [
+      (datetime.fromisoformat(slot["start_time"]), datetime.fromisoformat(slot["end_time"]))
+      for slot in slots
+    ]
+    if not proposed:
+      return "check_conflicts error: no slots provided."
+
+    # One fetch covering every proposed slot
+    params = {
+      "calendarId": calendar_id,
+      "timeMin": _hkt_to_utc(min(start for start, _ in proposed).isoformat()),
+      "timeMax": _hkt_to_utc(max(end for _, end in proposed).isoformat()),
+      "singleEvents": True,
+      "maxResults": 2500,
+    }
+    intervals = []
+    while True:
+      events_result = service.events().list(**params).execute()
+      for event in events_result.get("items", []):
+        # "Show as available" events never block time
+        if event.get("transparency") == "transparent":
+          continue
+        start = _to_hkt(event["start"].get("dateTime", event["start"].get("date")))
+        end = _to_hkt(event["end"].get("dateTime", event["end"].get("date")))
+        intervals.append((start, end, event))
+
+      params["pageToken"] = events_result.get("nextPageToken")
+      if not params["pageToken"]:
+        break
+
+    tree = IntervalTree(intervals)
+
+    lines = []
+    for i, (start, end) in enumerate(proposed, 1):
+      conflicts = tree.overlapping(start, end)
+      if not conflicts:
+        lines.append(f"[{i}] FREE {_fmt_slot(start, end)}")
+        continue
+      details = "; ".join(
+        f"'{event.get('summary', 'No title')}' {c_start:%Y-%m-%d %H:%M}–{c_end:%H:%M} (ID: {event['id']})"
+        for c_start, c_end, event in conflicts
+      )
+      lines.append(f"[{i}] CONFLICT {_fmt_slot(start, end)} with {details}")
+
+    return "\n".join(lines)
+
+  # KeyError: a slot without start_time / end_time
+  except (HttpError, ValueError, TypeError, KeyError) as e:
+    tb = traceback.format_exc()
+    print("\n🔥 TASK FAILED TRACEBACK 🔥\n", tb, "\n🔥 END TRACEBACK 🔥\n")
+    return f"check_conflicts error: {str(e)}"
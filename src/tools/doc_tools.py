@@ -1,7 +1,7 @@
 from langchain.tools import tool
 from langchain_community.vectorstores import FAISS
-from langchain_ollama import OllamaEmbeddings
 from typing import Literal
+from ..managers.ollama_session import ollama_session
 import traceback
 import os
 
@@ -13,7 +13,7 @@ PROFESSOR_INDEX_FILE = os.path.join(PROFESSOR_VDB_PATH, "index.faiss")
 MEMORY_FULL_INDEX_FILE = os.path.join(MEMORY_VDB_FULL_PATH, "index.faiss")
 MEMORY_CHUNKS_INDEX_FILE = os.path.join(MEMORY_VDB_CHUNKS_PATH, "index.faiss")
 
-embeddings = OllamaEmbeddings(model="nomic-embed-text")
+embeddings = ollama_session.embeddings()
 
 @tool
 def search_documents(query: str, k: int = 5) -> str:
@@ -137,7 +137,7 @@ def search_memory(
       return ""
     
     path = MEMORY_VDB_FULL_PATH if mode == "full" else MEMORY_VDB_CHUNKS_PATH
-    embeddings = OllamaEmbeddings(model="nomic-embed-text")
+    embeddings = ollama_session.embeddings()
     vectorstore = FAISS.load_local(
       path,
       embeddings,
@@ -1,6 +1,6 @@
 import os.path
 import base64
-import re
+import threading
 import traceback
 from email import policy
 from email.parser import BytesParser
@@ -21,23 +21,31 @@ SCOPES = [
   "https://www.googleapis.com/auth/calendar"
 ]
 
+# Gmail / Calendar tool calls of one step run in parallel: one refresh
+# (and one token.json write) at a time, valid credentials reused in memory
+_creds = None
+_creds_lock = threading.Lock()
+
 def get_creds():
-  creds = None
-  if os.path.exists("token.json"):
-    creds = Credentials.from_authorized_user_file("token.json", SCOPES)
-  if not creds or not creds.valid:
-    if creds and creds.expired and creds.refresh_token:
-      creds.refresh(Request())
-    else:
-      flow = InstalledAppFlow.from_client_secrets_file(
-        "credentials.json", SCOPES
-      )
-      creds = flow.run_local_server(port=0)
-    # Save the credentials for the next run
-    with open("token.json", "w") as token:
-      token.write(creds.to_json())
+  global _creds
+  with _creds_lock:
+    creds = _creds
+    if creds is None and os.path.exists("token.json"):
+      creds = Credentials.from_authorized_user_file("token.json", SCOPES)
+    if not creds or not creds.valid:
+      if creds and creds.expired and creds.refresh_token:
+        creds.refresh(Request())
+      else:
+        flow = InstalledAppFlow.from_client_secrets_file(
+          "credentials.json", SCOPES
+        )
+        creds = flow.run_local_server(port=0)
+      # Save the credentials for the next run
+      with open("token.json", "w") as token:
+        token.write(creds.to_json())
 
-  return creds
+    _creds = creds
+    return creds
 
 def get_email(service, id: str):
   try:
@@ -68,8 +76,8 @@ def get_email(service, id: str):
           body = part.get_content()
           break
         elif part.get_content_type() == "text/html" and not body:
-          html_content = part.get_content()
-          body = re.sub(r'<[^>]+>', '', html_content)
+          # Cleaned (style/script dropped, entities decoded) below
+          body = part.get_content()
     else:
         body = msg.get_content()
     
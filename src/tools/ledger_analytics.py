@@ -0,0 +1,329 @@
+"""
+Vectorized ledger analytics — the numbers are computed here, not by the model.
+
+Transactions are loaded once per data version into columnar NumPy arrays
+(day, cents, category code, description code) and every statistic is a
+handful of array operations:
+  - rolling budgets:   daily totals via bincount, windows via cumsum differences
+  - anomalies:         per-category mean/std via bincount, z-score per transaction
+  - recurring charges: lexsort by (series, day), diff, per-series interval stats
+
+The tools return a few compact lines, never raw rows.
+"""
+import re
+import traceback
+from datetime import date, timedelta
+from typing import NamedTuple
+import numpy as np
+from langchain.tools import tool
+from .sqlite import cached_read, ledger
+
+# Common periods (days) a recurring series is matched against
+PERIODS = {"weekly": 7, "biweekly": 14, "monthly": 30.44, "quarterly": 91.31, "yearly": 365.25}
+
+_DIGITS_RE = re.compile(r"\d+")
+_SPACE_RE = re.compile(r"\s+")
+
+class LedgerColumns(NamedTuple):
+  day: np.ndarray              # datetime64[D]
+  cents: np.ndarray            # int64, signed (negative = expense)
+  category: np.ndarray         # int64 codes into category_labels
+  category_labels: np.ndarray
+  description: np.ndarray      # int64 codes into description_labels (normalized text)
+  description_labels: np.ndarray
+  raw_description: np.ndarray  # original text, for display
+
+def _normalize_description(text: str) -> str:
+  """'NETFLIX.COM  8842' and 'Netflix.com 9931' -> 'netflix.com #'."""
+  return _SPACE_RE.sub(" ", _DIGITS_RE.sub("#", text.lower())).strip()
+
+def _to_columns(rows: list) -> LedgerColumns:
+  if not rows:
+    empty = np.array([], dtype=np.int64)
+    return LedgerColumns(
+      np.array([], dtype="datetime64[D]"), empty, empty, np.array([], dtype=object),
+      empty, np.array([], dtype=object), np.array([], dtype=object),
+    )
+
+  when, amount, description, category = zip(*rows)
+  category_labels, category_codes = np.unique(np.array(category, dtype=object), return_inverse=True)
+  description_labels, description_codes = np.unique(
+    np.array([_normalize_description(text) for text in description], dtype=object),
+    return_inverse=True,
+  )
+  return LedgerColumns(
+    day=np.array([value[:10] for value in when], dtype="datetime64[D]"),
+    cents=np.rint(np.array(amount, dtype=np.float64) * 100).astype(np.int64),
+    category=category_codes.astype(np.int64),
+    category_labels=category_labels,
+    description=description_codes.astype(np.int64),
+    description_labels=description_labels,
+    raw_description=np.array(description, dtype=object),
+  )
+
+def load_columns(start: date, end: date) -> LedgerColumns:
+  """Transactions with start <= day <= end, as arrays (cached until the next write)."""
+  query = """
+    SELECT datetime, amount, description, category
+    FROM transactions
+    WHERE datetime >= ? AND datetime < ?
+    ORDER BY datetime
+  """
+  params = (f"{start.isoformat()} 00:00:00", f"{(end + timedelta(days=1)).isoformat()} 00:00:00")
+  return cached_read(query, params, compute=lambda: _to_columns(ledger.connection.execute(query, params).fetchall()))
+
+def _category_mask(columns: LedgerColumns, category: str | None) -> np.ndarray:
+  if not category:
+    return np.ones(len(columns.cents), dtype=bool)
+  matches = np.flatnonzero(columns.category_labels == category.strip().lower())
+  return np.isin(columns.category, matches)
+
+# ------------------------------------------------------------------
+# Rolling budgets
+# ------------------------------------------------------------------
+def rolling_spend(columns: LedgerColumns, start: date, end: date, window_days: int, mask: np.ndarray) -> np.ndarray:
+  """Expense total (cents, positive) of the `window_days` ending on each day in [start, end]."""
+  n_days = (end - start).days + 1
+  offset = (columns.day - np.datetime64(start, "D")).astype(np.int64)
+  expense = mask & (columns.cents < 0) & (offset >= 0) & (offset < n_days)
+  daily = np.bincount(offset[expense], weights=-columns.cents[expense], minlength=n_days)
+  cumulative = np.concatenate(([0.0], np.cumsum(daily)))
+  ends = np.arange(1, n_days + 1)
+  return cumulative[ends] - cumulative[np.maximum(ends - window_days, 0)]
+
+@tool
+def budget_status(budget: float, window_days: int = 30, lookback_days: int = 180, category: str = None) -> str:
+  """Rolling-window spending against a budget, with month-end projection.
+
+  Use for "am I on budget?", "how much have I spent in the last 30 days?",
+  "will I go over my food budget this month?". All arithmetic is done here.
+
+  Args:
+    budget (float): Spending limit per window (e.g. 2000 for a $2000 / 30-day budget).
+    window_days (int): Rolling window length in days (default 30).
+    lookback_days (int): History to evaluate (default 180).
+    category (str, optional): Restrict to one category (e.g. "food").
+
+  Returns:
+    str: Current window spend vs budget, month-to-date and projected month total,
+      and how often / how far the window went over budget in the lookback.
+  """
+  try:
+    window_days = max(1, window_days)
+    today = date.today()
+    start = today - timedelta(days=max(lookback_days, window_days) + window_days - 1)
+    columns = load_columns(start, today)
+    mask = _category_mask(columns, category)
+
+    rolling = rolling_spend(columns, start, today, window_days, mask) / 100
+    evaluated = rolling[window_days - 1:]  # only windows fully inside the loaded range
+    current = evaluated[-1]
+    over = evaluated > budget
+
+    month_start = today.replace(day=1)
+    month_to_date = rolling_spend(columns, month_start, today, today.day, mask)[-1] / 100
+    next_month = (month_start + timedelta(days=32)).replace(day=1)
+    days_in_month = (next_month - month_start).days
+    projected = month_to_date / today.day * days_in_month
+
+    scope = f" ({category})" if category else ""
+    lines = [
+      f"**Budget{scope}: ${budget:.2f} per {window_days} days**",
+      f"Last {window_days} days: -${current:.2f} ({current / budget * 100:.0f}% of budget, "
+      f"{'OVER' if current > budget else f'${budget - current:.2f} left'})",
+      f"Month to date: -${month_to_date:.2f} | projected month total: -${projected:.2f}",
+    ]
+    if over.any():
+      peak = int(np.argmax(evaluated))
+      peak_day = today - timedelta(days=len(evaluated) - 1 - peak)
+      lines.append(
+        f"Over budget on {int(over.sum())} of the last {len(evaluated)} days; "
+        f"peak window -${evaluated[peak]:.2f} ending {peak_day.isoformat()}"
+      )
+    else:
+      lines.append(f"Never over budget in the last {len(evaluated)} days (peak window -${evaluated.max():.2f})")
+    return "\n".join(lines)
+  except Exception as e:
+    tb = traceback.format_exc()
+    print("\n🔥 BUDGET_STATUS ERROR 🔥\n", tb, "\n🔥 END 🔥\n")
+    return f"budget_status error: {str(e)}"
+
+# ------------------------------------------------------------------
+# Anomalies
+# ------------------------------------------------------------------
+def category_zscores(columns: LedgerColumns, min_count: int = 5) -> np.ndarray:
+  """z-score of every expense against its category's expenses (NaN where undefined)."""
+  expense = columns.cents < 0
+  spend = np.where(expense, -columns.cents, 0).astype(np.float64)
+  n_categories = len(columns.category_labels)
+
+  count = np.bincount(columns.category, weights=expense, minlength=n_categories)
+  total = np.bincount(columns.category, weights=spend, minlength=n_categories)
+  squares = np.bincount(columns.category, weights=spend ** 2, minlength=n_categories)
+
+  with np.errstate(divide="ignore", invalid="ignore"):
+    mean = total / count
+    std = np.sqrt(np.maximum(squares / count - mean ** 2, 0.0))
+    z = (spend - mean[columns.category]) / std[columns.category]
+
+  valid = expense & (count[columns.category] >= min_count) & (std[columns.category] > 0)
+  return np.where(valid, z, np.nan)
+
+@tool
+def spending_anomalies(lookback_days: int = 365, z_threshold: float = 2.5, limit: int = 10) -> str:
+  """Find unusually large expenses compared with the rest of their category.
+
+  Use for "anything unusual in my spending?", "biggest outliers", "suspicious charges".
+
+  Args:
+    lookback_days (int): History to analyse (default 365).
+    z_threshold (float): How many standard deviations above the category mean
+      counts as unusual (default 2.5).
+    limit (int): Max anomalies to list (default 10).
+
+  Returns:
+    str: Unusual expenses, most extreme first, with their category's typical amount.
+  """
+  try:
+    today = date.today()
+    columns = load_columns(today - timedelta(days=lookback_days), today)
+    z = category_zscores(columns)
+
+    flagged = np.flatnonzero(np.nan_to_num(z, nan=-np.inf) >= z_threshold)
+    if not len(flagged):
+      return f"No unusual expenses in the last {lookback_days} days (threshold {z_threshold} std devs)."
+
+    flagged = flagged[np.argsort(-z[flagged])][:max(1, limit)]
+    expense = columns.cents < 0
+    lines = [f"**Unusual expenses (last {lookback_days} days)** — {len(flagged)} shown"]
+    for index in flagged:
+      code = columns.category[index]
+      in_category = expense & (columns.category == code)
+      typical = np.median(-columns.cents[in_category]) / 100
+      lines.append(
+        f"• {columns.day[index]} | -${-columns.cents[index] / 100:.2f} | {columns.raw_description[index]} "
+        f"| {columns.category_labels[code]} (typical -${typical:.2f}, z={z[index]:.1f})"
+      )
+    return "\n".join(lines)
+  except Exception as e:
+    tb = traceback.format_exc()
+    print("\n🔥 SPENDING_ANOMALIES ERROR 🔥\n", tb, "\n🔥 END 🔥\n")
+    return f"spending_anomalies error: {str(e)}"
+
+# ------------------------------------------------------------------
+# Recurring charges
+# ------------------------------------------------------------------
+class RecurringSeries(NamedTuple):
+  description: str
+  cents: int
+  period: str
+  interval_days: float
+  count: int
+  last_day: np.datetime64
+
+def detect_recurring(columns: LedgerColumns, min_occurrences: int = 3, tolerance: float = 0.15) -> list[RecurringSeries]:
+  """
+  Series = same normalized description + same amount. A series is recurring
+  when it has `min_occurrences`+ entries, all gaps within `tolerance` of the
+  mean gap (at least +-3 days), and the mean gap is close to a common period.
+  """
+  if not len(columns.cents):
+    return []
+
+  # One integer id per (description, amount) pair
+  pairs = np.stack([columns.description, columns.cents], axis=1)
+  _, series = np.unique(pairs, axis=0, return_inverse=True)
+  series = series.reshape(-1)
+  n_series = int(series.max()) + 1
+
+  order = np.lexsort((columns.day, series))
+  series_sorted = series[order]
+  days_sorted = columns.day[order].astype(np.int64)
+
+  gaps = np.diff(days_sorted).astype(np.float64)
+  same = series_sorted[1:] == series_sorted[:-1]
+  gap_series = series_sorted[1:][same]
+  gaps = gaps[same]
+
+  count = np.bincount(series, minlength=n_series)
+  gap_count = np.bincount(gap_series, minlength=n_series)
+  with np.errstate(divide="ignore", invalid="ignore"):
+    mean_gap = np.bincount(gap_series, weights=gaps, minlength=n_series) / gap_count
+
+  min_gap = np.full(n_series, np.inf)
+  max_gap = np.full(n_series, -np.inf)
+  np.minimum.at(min_gap, gap_series, gaps)
+  np.maximum.at(max_gap, gap_series, gaps)
+
+  allowed = np.maximum(mean_gap * tolerance, 3.0)
+  regular = (
+    (count >= min_occurrences)
+    & (min_gap >= mean_gap - allowed)
+    & (max_gap <= mean_gap + allowed)
+    & (mean_gap > 0)
+  )
+
+  period_names = np.array(list(PERIODS))
+  period_days = np.array(list(PERIODS.values()))
+  nearest = np.argmin(np.abs(mean_gap[:, None] - period_days[None, :]), axis=1)
+  regular &= np.abs(mean_gap - period_days[nearest]) <= np.maximum(period_days[nearest] * tolerance, 3.0)
+
+  # Last occurrence of each series = last element of its block in sorted order
+  last_index = np.flatnonzero(np.append(series_sorted[1:] != series_sorted[:-1], True))
+  last = {int(series_sorted[i]): order[i] for i in last_index}
+
+  result = []
+  for code in np.flatnonzero(regular):
+    index = last[int(code)]
+    result.append(RecurringSeries(
+      description=columns.raw_description[index],
+      cents=int(columns.cents[index]),
+      period=str(period_names[nearest[code]]),
+      interval_days=float(mean_gap[code]),
+      count=int(count[code]),
+      last_day=columns.day[index],
+    ))
+  return result
+
+@tool
+def recurring_charges(lookback_days: int = 400, min_occurrences: int = 3, include_income: bool = False) -> str:
+  """Detect subscriptions and other recurring charges (same amount + description at regular intervals).
+
+  Use for "what subscriptions do I have?", "recurring bills", "what am I paying every month?".
+
+  Args:
+    lookback_days (int): History to analyse (default 400, enough to see yearly charges once a year).
+    min_occurrences (int): Minimum repetitions to count as recurring (default 3).
+    include_income (bool): Also list recurring income such as salary (default False).
+
+  Returns:
+    str: One line per recurring series (period, amount, next expected date) and the
+      total yearly cost of recurring expenses.
+  """
+  try:
+    today = date.today()
+    columns = load_columns(today - timedelta(days=lookback_days), today)
+    found = [
+      item for item in detect_recurring(columns, min_occurrences)
+      if include_income or item.cents < 0
+    ]
+    if not found:
+      return f"No recurring charges found in the last {lookback_days} days."
+
+    found.sort(key=lambda item: item.cents)
+    yearly_cost = sum(-item.cents / 100 * 365.25 / item.interval_days for item in found if item.cents < 0)
+
+    lines = [f"**Recurring ({len(found)} found, last {lookback_days} days)**"]
+    for item in found:
+      next_day = item.last_day + np.timedelta64(int(round(item.interval_days)), "D")
+      sign = "+" if item.cents > 0 else "-"
+      lines.append(
+        f"• {item.description} | {sign}${abs(item.cents) / 100:.2f} {item.period} "
+        f"| {item.count}x, last {item.last_day}, next ~{next_day}"
+      )
+    lines.append(f"Recurring expenses per year: -${yearly_cost:.2f}")
+    return "\n".join(lines)
+  except Exception as e:
+    tb = traceback.format_exc()
+    print("\n🔥 RECURRING_CHARGES ERROR 🔥\n", tb, "\n🔥 END 🔥\n")
+    return f"recurring_charges error: {str(e)}"
@@ -0,0 +1,361 @@
+"""
+Bulk transaction import (CSV / OFX bank statements) — no LLM in the loop.
+
+Pipeline:
+  1. stream-parse the file into (datetime, amount, description, category) rows,
+     normalizing dates to 'YYYY-MM-DD HH:MM:SS' and amounts to signed floats
+  2. executemany the rows into a TEMP staging table in batches
+  3. one INSERT ... SELECT moves only NEW rows into `transactions`, comparing
+     fingerprints (day | cents | description) against existing rows; a row
+     that appears N times in the file is inserted until the ledger holds N
+
+The whole import is one transaction: it lands completely or not at all.
+
+CLI:
+  python -m src.tools.ledger_import statement.csv [--category food] [--dry-run]
+"""
+import argparse
+import csv
+import os
+import re
+import traceback
+from datetime import datetime as dt
+from functools import lru_cache
+from itertools import islice
+from typing import Iterable, Iterator, Literal
+from langchain.tools import tool
+from .sqlite import ledger
+from .ledger_schema import FINGERPRINT_SQL
+
+BATCH_SIZE = 500
+DEFAULT_CATEGORY = "uncategorized"
+
+Row = tuple[str, float, str, str]
+
+# ------------------------------------------------------------------
+# Normalization
+# ------------------------------------------------------------------
+_DAY_FIRST_FORMATS = ["%d/%m/%Y", "%d-%m-%Y", "%d.%m.%Y", "%d/%m/%y"]
+_MONTH_FIRST_FORMATS = ["%m/%d/%Y", "%m-%d-%Y", "%m/%d/%y"]
+_UNAMBIGUOUS_FORMATS = ["%Y-%m-%d", "%Y/%m/%d", "%Y%m%d", "%d %b %Y", "%d %B %Y", "%b %d, %Y", "%B %d, %Y"]
+_TIME_SUFFIXES = ["", " %H:%M:%S", " %H:%M", "T%H:%M:%S", "T%H:%M"]
+
+# Candidate formats in preference order, by day_first
+_DATE_FORMATS = {
+  day_first: [
+    date_format + suffix
+    for date_format in _UNAMBIGUOUS_FORMATS + ambiguous
+    for suffix in _TIME_SUFFIXES
+  ]
+  for day_first, ambiguous in (
+    (True, _DAY_FIRST_FORMATS + _MONTH_FIRST_FORMATS),
+    (False, _MONTH_FIRST_FORMATS + _DAY_FIRST_FORMATS),
+  )
+}
+
+@lru_cache(maxsize=8192)
+def _parse_date(value: str, date_format: str) -> str | None:
+  """Cached: statements repeat the same few hundred dates thousands of times."""
+  try:
+    return dt.strptime(value, date_format).strftime("%Y-%m-%d %H:%M:%S")
+  except ValueError:
+    return None
+
+def detect_date_format(values: Iterable[str], day_first: bool = True) -> str | None:
+  """
+  The format that reads the most of a file's dates. Ties go to the preferred
+  order, so a file of only ambiguous dates (03/04/2026) follows day_first,
+  while one unambiguous date (12/25/2026) settles the whole file.
+  """
+  formats = _DATE_FORMATS[day_first]
+  counts = [0] * len(formats)
+  for value in {value.strip() for value in values}:
+    for index, date_format in enumerate(formats):
+      if _parse_date(value, date_format):
+        counts[index] += 1
+  best = max(range(len(formats)), key=lambda index: (counts[index], -index))
+  return formats[best] if counts[best] else None
+
+def normalize_date(value: str, day_first: bool = True, date_format: str | None = None) -> str:
+  """
+  Parse common bank date formats into 'YYYY-MM-DD HH:MM:SS'.
+  `date_format` (see detect_date_format) is tried first; a date it cannot
+  read falls back to the candidates in day_first order.
+  """
+  value = value.strip()
+  try:
+    return dt.fromisoformat(value.replace("Z", "")).strftime("%Y-%m-%d %H:%M:%S")
+  except ValueError:
+    pass
+
+  candidates = _DATE_FORMATS[day_first]
+  if date_format:
+    candidates = [date_format, *candidates]
+  for candidate in candidates:
+    parsed = _parse_date(value, candidate)
+    if parsed:
+      return parsed
+  raise ValueError(f"unrecognized date: {value!r}")
+
+_AMOUNT_JUNK_RE = re.compile(r"[^\d.\-]")
+
+def parse_amount(value: str) -> float:
+  """'1,234.56', '$-12', '(12.00)', '12.00 DR', '12.00 CR' -> signed float."""
+  text = value.strip().upper()
+  if not text:
+    raise ValueError("empty amount")
+
+  negative = text.startswith("(") and text.endswith(")") or text.endswith("DR")
+  number = float(_AMOUNT_JUNK_RE.sub("", text))
+  return -abs(number) if negative else number
+
+# ------------------------------------------------------------------
+# Parsers (generators — rows are streamed, never fully materialized)
+# ------------------------------------------------------------------
+_CSV_COLUMNS = {
+  "date": ("date", "transaction date", "posted date", "posting date", "booking date", "value date", "datetime"),
+  "description": ("description", "payee", "merchant", "name", "details", "narrative", "memo", "reference"),
+  "amount": ("amount", "value", "transaction amount"),
+  "debit": ("debit", "withdrawal", "withdrawals", "money out", "paid out"),
+  "credit": ("credit", "deposit", "deposits", "money in", "paid in"),
+  "category": ("category",),
+}
+
+def _find_column(header: list[str], role: str) -> int | None:
+  for candidate in _CSV_COLUMNS[role]:
+    if candidate in header:
+      return header.index(candidate)
+  return None
+
+def _column_values(path: str, column: int) -> Iterator[str]:
+  with open(path, "r", encoding="utf-8-sig", newline="") as file:
+    reader = csv.reader(file)
+    next(reader, None)
+    for record in reader:
+      if column < len(record) and record[column].strip():
+        yield record[column]
+
+def parse_csv(path: str, day_first: bool = True, errors: list | None = None) -> Iterator[tuple]:
+  """
+  Yield (datetime, amount, description, category|None) from a bank CSV export.
+  The date column is scanned first: one date format for the whole file.
+  """
+  with open(path, "r", encoding="utf-8-sig", newline="") as file:
+    reader = csv.reader(file)
+    header = [column.strip().lower() for column in next(reader, [])]
+
+    date_col = _find_column(header, "date")
+    desc_col = _find_column(header, "description")
+    amount_col = _find_column(header, "amount")
+    debit_col = _find_column(header, "debit")
+    credit_col = _find_column(header, "credit")
+    category_col = _find_column(header, "category")
+
+    if date_col is None or desc_col is None or (amount_col is None and debit_col is None and credit_col is None):
+      raise ValueError(f"CSV needs date, description and amount (or debit/credit) columns; got {header}")
+    date_format = detect_date_format(_column_values(path, date_col), day_first)
+
+    for line_number, record in enumerate(reader, start=2):
+      if not any(cell.strip() for cell in record):
+        continue
+      try:
+        if amount_col is not None:
+          amount = parse_amount(record[amount_col])
+        else:
+          # Separate columns: credit is money in, debit is money out
+          credit = record[credit_col].strip() if credit_col is not None else ""
+          debit = record[debit_col].strip() if debit_col is not None else ""
+          amount = (abs(parse_amount(credit)) if credit else 0.0) - (abs(parse_amount(debit)) if debit else 0.0)
+
+        category = record[category_col].strip() if category_col is not None else None
+        yield normalize_date(record[date_col], day_first, date_format), amount, record[desc_col].strip(), category or None
+      except (ValueError, IndexError) as e:
+        if errors is not None:
+          errors.append(f"line {line_number}: {e}")
+
+_OFX_TRANSACTION_RE = re.compile(r"<STMTTRN>(.*?)</STMTTRN>", re.DOTALL | re.IGNORECASE)
+_OFX_FIELD_RE = re.compile(r"<(DTPOSTED|TRNAMT|NAME|MEMO|PAYEE)>([^<\r\n]*)", re.IGNORECASE)
+
+_OFX_CHUNK_CHARS = 1 << 16
+
+def _ofx_blocks(file, chunk_size: int = _OFX_CHUNK_CHARS) -> Iterator[str]:
+  """<STMTTRN> bodies, scanned chunk by chunk: only the open transaction is buffered."""
+  buffer = ""
+  while True:
+    chunk = file.read(chunk_size)
+    buffer += chunk
+    end = 0
+    for block in _OFX_TRANSACTION_RE.finditer(buffer):
+      yield block.group(1)
+      end = block.end()
+    buffer = buffer[end:]
+    if not chunk:
+      return
+    # Keep an unclosed <STMTTRN> (or a tag split by the chunk), drop the rest
+    start = buffer.upper().find("<STMTTRN>")
+    buffer = buffer[start:] if start >= 0 else buffer[-(len("<STMTTRN>") - 1):]
+
+def parse_ofx(path: str, errors: list | None = None) -> Iterator[tuple]:
+  """Yield (datetime, amount, description, None) from OFX 1.x (SGML) or 2.x (XML)."""
+  with open(path, "r", encoding="utf-8", errors="replace") as file:
+    yield from _ofx_transactions(_ofx_blocks(file), errors)
+
+def _ofx_transactions(blocks: Iterable[str], errors: list | None) -> Iterator[tuple]:
+  for index, block in enumerate(blocks, start=1):
+    fields = {name.upper(): value.strip() for name, value in _OFX_FIELD_RE.findall(block)}
+    try:
+      # DTPOSTED: YYYYMMDD[HHMMSS[.XXX]][[+-]TZ:NAME]
+      posted = re.match(r"\d{8}(\d{6})?", fields.get("DTPOSTED", ""))
+      if not posted:
+        raise ValueError(f"bad DTPOSTED {fields.get('DTPOSTED')!r}")
+      stamp = posted.group(0).ljust(14, "0")
+      when = dt.strptime(stamp, "%Y%m%d%H%M%S").strftime("%Y-%m-%d %H:%M:%S")
+
+      name = fields.get("NAME") or fields.get("PAYEE") or ""
+      memo = fields.get("MEMO", "")
+      description = name if not memo or memo == name else (f"{name} - {memo}" if name else memo)
+      yield when, parse_amount(fields["TRNAMT"]), description, None
+    except (ValueError, KeyError) as e:
+      if errors is not None:
+        errors.append(f"transaction {index}: {e}")
+
+# ------------------------------------------------------------------
+# Batched, deduplicating insert
+# ------------------------------------------------------------------
+_NEW_ROWS_SQL = f"""
+  SELECT datetime, amount, description, category
+  FROM (
+    SELECT s.*, ROW_NUMBER() OVER (PARTITION BY fp ORDER BY seq) AS occurrence
+    FROM (SELECT *, {FINGERPRINT_SQL.format(row='')} AS fp FROM import_staging) s
+  ) s
+  WHERE occurrence > (SELECT COUNT(*) FROM transactions t WHERE t.fingerprint = s.fp)
+  ORDER BY seq
+"""
+
+def _batched(rows: Iterable, size: int) -> Iterator[list]:
+  iterator = iter(rows)
+  while batch := list(islice(iterator, size)):
+    yield batch
+
+def import_rows(rows: Iterable[tuple], category: str | None = None, invert_sign: bool = False, dry_run: bool = False) -> dict:
+  """
+  Stage and insert parsed rows. Returns counts:
+  {"parsed", "inserted", "duplicates"}.
+  """
+  default_category = (category or DEFAULT_CATEGORY).strip().lower()
+  sign = -1.0 if invert_sign else 1.0
+
+  def prepared() -> Iterator[Row]:
+    for when, amount, description, row_category in rows:
+      yield when, sign * amount, description, (row_category or default_category).strip().lower()
+
+  with ledger.transaction() as conn:
+    conn.execute("""
+      CREATE TEMP TABLE IF NOT EXISTS import_staging (
+        seq INTEGER PRIMARY KEY,
+        datetime TEXT NOT NULL,
+        amount REAL NOT NULL,
+        description TEXT NOT NULL,
+        category TEXT NOT NULL
+      )
+    """)
+    conn.execute("DELETE FROM import_staging")
+
+    parsed = 0
+    for batch in _batched(prepared(), BATCH_SIZE):
+      conn.executemany(
+        "INSERT INTO import_staging (datetime, amount, description, category) VALUES (?, ?, ?, ?)",
+        batch,
+      )
+      parsed += len(batch)
+
+    if dry_run:
+      inserted = conn.execute(f"SELECT COUNT(*) FROM ({_NEW_ROWS_SQL})").fetchone()[0]
+    else:
+      inserted = conn.execute(
+        f"INSERT INTO transactions (datetime, amount, description, category) {_NEW_ROWS_SQL}"
+      ).rowcount
+
+    conn.execute("DELETE FROM import_staging")
+
+  return {"parsed": parsed, "inserted": inserted, "duplicates": parsed - inserted}
+
+def import_statement_file(
+  path: str,
+  format: Literal["auto", "csv", "ofx"] = "auto",
+  category: str | None = None,
+  invert_sign: bool = False,
+  day_first: bool = True,
+  dry_run: bool = False,
+) -> dict:
+  """Parse + import one statement file. Adds "errors" (unparseable rows) to the counts."""
+  if format == "auto":
+    format = "ofx" if os.path.splitext(path)[1].lower() in (".ofx", ".qfx") else "csv"
+
+  errors: list[str] = []
+  rows = parse_ofx(path, errors) if format == "ofx" else parse_csv(path, day_first, errors)
+  result = import_rows(rows, category=category, invert_sign=invert_sign, dry_run=dry_run)
+  result["errors"] = errors
+  return result
+
+def _format_report(path: str, result: dict, dry_run: bool = False) -> str:
+  verb = "Would import" if dry_run else "Imported"
+  lines = [
+    f"{verb} {result['inserted']} new transaction(s) from {os.path.basename(path)} "
+    f"({result['parsed']} parsed, {result['duplicates']} duplicate(s) skipped, {len(result['errors'])} unreadable row(s))."
+  ]
+  lines.extend(f"• {error}" for error in result["errors"][:5])
+  if len(result["errors"]) > 5:
+    lines.append(f"• ... {len(result['errors']) - 5} more")
+  return "\n".join(lines)
+
+@tool
+def import_transactions(
+  file_path: str,
+  format: Literal["auto", "csv", "ofx"] = "auto",
+  category: str = None,
+  invert_sign: bool = False,
+  day_first: bool = True,
+) -> str:
+  """Bulk-import a bank statement file (CSV or OFX) into the ledger in one step.
+
+  Use this instead of calling add_transaction once per row. Rows already in
+  the ledger (same day, amount and description) are skipped automatically.
+
+  Args:
+    file_path (str): Path to the .csv / .ofx / .qfx statement file.
+    format (str): "auto" (by extension), "csv" or "ofx".
+    category (str, optional): Category for rows that have none (default "uncategorized").
+    invert_sign (bool): Set True for statements that list spending as POSITIVE
+      numbers (e.g. most credit-card exports).
+    day_first (bool): Interpret ambiguous dates like 03/04/2026 as day/month (default True).
+
+  Returns:
+    str: Counts of imported, duplicate and unreadable rows.
+  """
+  try:
+    result = import_statement_file(file_path, format, category, invert_sign, day_first)
+    return _format_report(file_path, result)
+  except Exception as e:
+    tb = traceback.format_exc()
+    print("\n🔥 IMPORT_TRANSACTIONS ERROR 🔥\n", tb, "\n🔥 END 🔥\n")
+    return f"import_transactions error: {str(e)}"
+
+def main():
+  parser = argparse.ArgumentParser(description="Bulk-import bank statements into the accountant ledger.")
+  parser.add_argument("files", nargs="+", help="CSV / OFX statement files")
+  parser.add_argument("--format", choices=["auto", "csv", "ofx"], default="auto")
+  parser.add_argument("--category", help="Category for rows without one")
+  parser.add_argument("--invert-sign", action="store_true", help="Spending is listed as positive numbers")
+  parser.add_argument("--month-first", action="store_true", help="Ambiguous dates are month/day")
+  parser.add_argument("--dry-run", action="store_true", help="Report what would be imported, write nothing")
+  args = parser.parse_args()
+
+  for path in args.files:
+    result = import_statement_file(
+      path, args.format, args.category, args.invert_sign, not args.month_first, args.dry_run
+    )
+    print(_format_report(path, result, args.dry_run))
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,148 @@
+"""
+Versioned schema for the accountant ledger.
+
+Append new migrations to the END of MIGRATIONS with the next version
+number; never edit a migration that has already shipped. Applied on
+startup by `ledger.migrate(MIGRATIONS)` (see sqlite.py).
+"""
+
+def _add_category_column(conn):
+  columns = {row[1] for row in conn.execute("PRAGMA table_info(transactions)")}
+  if "category" not in columns:
+    conn.execute("ALTER TABLE transactions ADD COLUMN category TEXT NOT NULL DEFAULT 'uncategorized'")
+
+# Signed amount -> exact integer cents split into income / expense parts
+_INCOME_CENTS = "max(CAST(round({row}.amount * 100) AS INTEGER), 0)"
+_EXPENSE_CENTS = "max(-CAST(round({row}.amount * 100) AS INTEGER), 0)"
+
+def _aggregate_add(row: str) -> str:
+  return f"""
+      INSERT INTO ledger_monthly (month, category, income_cents, expense_cents, tx_count)
+      VALUES (substr({row}.datetime, 1, 7), {row}.category, {_INCOME_CENTS.format(row=row)}, {_EXPENSE_CENTS.format(row=row)}, 1)
+      ON CONFLICT (month, category) DO UPDATE SET
+        income_cents = income_cents + excluded.income_cents,
+        expense_cents = expense_cents + excluded.expense_cents,
+        tx_count = tx_count + 1;"""
+
+def _aggregate_remove(row: str) -> str:
+  where = f"month = substr({row}.datetime, 1, 7) AND category = {row}.category"
+  return f"""
+      UPDATE ledger_monthly SET
+        income_cents = income_cents - {_INCOME_CENTS.format(row=row)},
+        expense_cents = expense_cents - {_EXPENSE_CENTS.format(row=row)},
+        tx_count = tx_count - 1
+      WHERE {where};
+      DELETE FROM ledger_monthly WHERE {where} AND tx_count <= 0;"""
+
+# Dedup key for imports: day | signed cents | normalized description.
+# Shared by the generated column below and the import staging query.
+FINGERPRINT_SQL = (
+  "substr({row}datetime, 1, 10) || '|' || "
+  "CAST(round({row}amount * 100) AS INTEGER) || '|' || "
+  "lower(trim({row}description))"
+)
+
+def _add_fingerprint_column(conn):
+  columns = {row[1] for row in conn.execute("PRAGMA table_xinfo(transactions)")}
+  if "fingerprint" not in columns:
+    conn.execute(
+      "ALTER TABLE transactions ADD COLUMN fingerprint TEXT "
+      f"GENERATED ALWAYS AS ({FINGERPRINT_SQL.format(row='')}) VIRTUAL"
+    )
+
+MIGRATIONS = [
+  # v1 — base table (no-op on databases created before migrations existed)
+  (1, [
+    """
+    CREATE TABLE IF NOT EXISTS transactions (
+      id TEXT PRIMARY KEY DEFAULT (lower(hex(randomblob(16)))),
+      datetime TEXT NOT NULL DEFAULT (datetime('now', 'localtime')),
+      amount REAL NOT NULL,
+      description TEXT NOT NULL
+    )
+    """,
+  ]),
+
+  # v2 — every tool filters/sorts on datetime; (datetime, amount) also
+  # covers the monthly SUM(CASE amount ...) without touching the table
+  (2, [
+    "CREATE INDEX IF NOT EXISTS idx_transactions_datetime_amount ON transactions (datetime, amount)",
+    "CREATE INDEX IF NOT EXISTS idx_transactions_amount ON transactions (amount)",
+  ]),
+
+  # v3 — FTS5 index over descriptions (porter stemming: "coffees" ~ "coffee").
+  # External-content table keyed on the implicit rowid, kept in sync by
+  # triggers. NOTE: after a VACUUM rebuild it with
+  #   INSERT INTO transactions_fts(transactions_fts) VALUES ('rebuild')
+  (3, [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS transactions_fts USING fts5(
+      description,
+      content='transactions',
+      content_rowid='rowid',
+      tokenize='porter unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS transactions_fts_ai AFTER INSERT ON transactions BEGIN
+      INSERT INTO transactions_fts (rowid, description) VALUES (new.rowid, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS transactions_fts_ad AFTER DELETE ON transactions BEGIN
+      INSERT INTO transactions_fts (transactions_fts, rowid, description) VALUES ('delete', old.rowid, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS transactions_fts_au AFTER UPDATE OF description ON transactions BEGIN
+      INSERT INTO transactions_fts (transactions_fts, rowid, description) VALUES ('delete', old.rowid, old.description);
+      INSERT INTO transactions_fts (rowid, description) VALUES (new.rowid, new.description);
+    END
+    """,
+    # Index rows that existed before this migration
+    "INSERT INTO transactions_fts (transactions_fts) VALUES ('rebuild')",
+  ]),
+
+  # v4 — categories + materialized (month, category) aggregates, maintained
+  # incrementally by triggers so summaries/trends read O(months) rows.
+  # Amounts are stored as integer cents: repeated +/- never drifts.
+  (4, [
+    _add_category_column,
+    """
+    CREATE TABLE IF NOT EXISTS ledger_monthly (
+      month TEXT NOT NULL,              -- 'YYYY-MM'
+      category TEXT NOT NULL,
+      income_cents INTEGER NOT NULL DEFAULT 0,
+      expense_cents INTEGER NOT NULL DEFAULT 0,
+      tx_count INTEGER NOT NULL DEFAULT 0,
+      PRIMARY KEY (month, category)
+    ) WITHOUT ROWID
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS ledger_monthly_ai AFTER INSERT ON transactions BEGIN{_aggregate_add("new")}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS ledger_monthly_ad AFTER DELETE ON transactions BEGIN{_aggregate_remove("old")}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS ledger_monthly_au AFTER UPDATE OF datetime, amount, category ON transactions BEGIN{_aggregate_remove("old")}{_aggregate_add("new")}
+    END
+    """,
+    # Backfill from existing rows
+    "DELETE FROM ledger_monthly",
+    f"""
+    INSERT INTO ledger_monthly (month, category, income_cents, expense_cents, tx_count)
+    SELECT substr(t.datetime, 1, 7), t.category, SUM({_INCOME_CENTS.format(row="t")}), SUM({_EXPENSE_CENTS.format(row="t")}), COUNT(*)
+    FROM transactions t
+    GROUP BY 1, 2
+    """,
+  ]),
+
+  # v5 — virtual fingerprint column (+ index) for import deduplication
+  (5, [
+    _add_fingerprint_column,
+    "CREATE INDEX IF NOT EXISTS idx_transactions_fingerprint ON transactions (fingerprint)",
+  ]),
+]
@@ -1,8 +1,11 @@
 from .tavily import tavily_search_api, tavily_extract_content
 from .doc_tools import search_documents, search_memory
 from .gmail import get_emails, gmail_send_message
-from .calendar import search_calendar_events, create_calendar_event, update_calendar_event, delete_calendar_event
-from .sqlite import add_transaction, get_recent_transactions, search_transactions, delete_last_transaction, summarize_month, execute_sql_write, sql_list_tables, sql_get_schema, sql_query, sql_query_checker
+from .calendar import search_calendar_events, create_calendar_event, update_calendar_event, delete_calendar_event, batch_create_calendar_events, batch_update_calendar_events, batch_delete_calendar_events, find_free_slots, check_conflicts
+from .ledger_import import import_transactions
+from .ledger_analytics import budget_status, spending_anomalies, recurring_charges
+from .tool_output import read_more
+from .sqlite import add_transaction, get_recent_transactions, search_transactions, delete_last_transaction, summarize_month, spending_trend, compare_months, execute_sql_write, sql_list_tables, sql_get_schema, sql_query, sql_query_checker
 
 TOOL_REGISTRY = {
   "tavily_search_api": tavily_search_api,
@@ -18,15 +21,28 @@ TOOL_REGISTRY = {
   "create_calendar_event": create_calendar_event,
   "update_calendar_event": update_calendar_event,
   "delete_calendar_event": delete_calendar_event,
+  "batch_create_calendar_events": batch_create_calendar_events,
+  "batch_update_calendar_events": batch_update_calendar_events,
+  "batch_delete_calendar_events": batch_delete_calendar_events,
+  "find_free_slots": find_free_slots,
+  "check_conflicts": check_conflicts,
 
   "add_transaction": add_transaction,
   "get_recent_transactions": get_recent_transactions,
   "search_transactions": search_transactions,
   "delete_last_transaction": delete_last_transaction,
   "summarize_month": summarize_month,
+  "spending_trend": spending_trend,
+  "compare_months": compare_months,
   "execute_sql_write": execute_sql_write,
+  "import_transactions": import_transactions,
+  "budget_status": budget_status,
+  "spending_anomalies": spending_anomalies,
+  "recurring_charges": recurring_charges,
   "sql_list_tables": sql_list_tables,
   "sql_get_schema": sql_get_schema,
   "sql_query": sql_query,
   "sql_query_checker": sql_query_checker,
+
+  "read_more": read_more,
 }
\ No newline at end of file
@@ -0,0 +1,129 @@
+"""
+Local, LLM-free SQL validation for the read path.
+
+The query is compiled by SQLite itself (EXPLAIN QUERY PLAN) against the
+real schema, under an authorizer that only permits reads — so syntax
+errors, unknown tables/columns and any write/DDL/PRAGMA are rejected
+without executing anything. The query plan is then inspected for full
+table scans on large tables.
+"""
+import re
+import sqlite3
+from typing import NamedTuple
+
+# Everything else (INSERT/UPDATE/DELETE, DDL, PRAGMA, ATTACH, ...) is denied
+_READ_ACTIONS = {
+  sqlite3.SQLITE_SELECT,
+  sqlite3.SQLITE_READ,
+  sqlite3.SQLITE_FUNCTION,
+  sqlite3.SQLITE_RECURSIVE,
+}
+
+# For error messages only (authorizer action codes share values with other SQLITE_* constants)
+_ACTION_NAMES = {
+  sqlite3.SQLITE_INSERT: "INSERT",
+  sqlite3.SQLITE_UPDATE: "UPDATE",
+  sqlite3.SQLITE_DELETE: "DELETE",
+  sqlite3.SQLITE_PRAGMA: "PRAGMA",
+  sqlite3.SQLITE_ATTACH: "ATTACH",
+  sqlite3.SQLITE_DETACH: "DETACH",
+  sqlite3.SQLITE_TRANSACTION: "TRANSACTION",
+  sqlite3.SQLITE_ALTER_TABLE: "ALTER TABLE",
+  sqlite3.SQLITE_CREATE_TABLE: "CREATE TABLE",
+  sqlite3.SQLITE_CREATE_INDEX: "CREATE INDEX",
+  sqlite3.SQLITE_DROP_TABLE: "DROP TABLE",
+  sqlite3.SQLITE_DROP_INDEX: "DROP INDEX",
+}
+
+# "SCAN transactions" / "SCAN t" — but not "SCAN t USING [COVERING] INDEX ..."
+_FULL_SCAN_RE = re.compile(r"^SCAN (\w+)(?: AS \w+)?$")
+
+class ValidationResult(NamedTuple):
+  valid: bool
+  query: str
+  plan: list[str]
+  warnings: list[str]
+  error: str | None = None
+
+def _normalize(query: str) -> str:
+  query = query.strip()
+  # Models often wrap SQL in a markdown fence
+  if query.startswith("```"):
+    query = re.sub(r"^```\w*\s*|\s*```$", "", query)
+  return query.strip().rstrip(";").strip()
+
+def _table_rows(conn: sqlite3.Connection, table: str) -> int:
+  """Cheap row-count estimate: max(rowid) is an O(log n) index lookup."""
+  try:
+    return conn.execute(f'SELECT max(rowid) FROM "{table}"').fetchone()[0] or 0
+  except sqlite3.Error:
+    return 0
+
+def _connect_virtual_tables(conn: sqlite3.Connection):
+  """
+  Open every virtual table (the FTS index) on `conn` before the authorizer
+  is installed: a vtab's first use on a connection reads its schema through
+  an UPDATE on sqlite_master and PRAGMA data_version, which the read-only
+  authorizer would deny, making validity depend on the connection's history.
+  """
+  names = conn.execute(
+    "SELECT name FROM sqlite_master WHERE type = 'table' AND sql LIKE 'CREATE VIRTUAL TABLE%'"
+  ).fetchall()
+  for (name,) in names:
+    try:
+      conn.execute(f'SELECT 1 FROM "{name}" LIMIT 0').fetchall()
+    except sqlite3.Error:
+      pass   # unusable vtab: the query itself will report it
+
+def validate_read_query(conn: sqlite3.Connection, query: str, large_table_rows: int = 10000) -> ValidationResult:
+  """Compile `query` read-only against `conn`'s schema and inspect its plan."""
+  query = _normalize(query)
+  if not query:
+    return ValidationResult(False, query, [], [], "empty query")
+
+  denied = []
+
+  def authorizer(action, arg1, arg2, db_name, trigger):
+    if action in _READ_ACTIONS:
+      return sqlite3.SQLITE_OK
+    denied.append(_ACTION_NAMES.get(action, "schema change"))
+    return sqlite3.SQLITE_DENY
+
+  _connect_virtual_tables(conn)
+  conn.set_authorizer(authorizer)
+  try:
+    rows = conn.execute(f"EXPLAIN QUERY PLAN {query}").fetchall()
+  except (sqlite3.Error, sqlite3.Warning) as e:
+    if denied:
+      return ValidationResult(False, query, [], [], f"read-only path: {', '.join(dict.fromkeys(denied))} is not allowed")
+    return ValidationResult(False, query, [], [], str(e))
+  finally:
+    conn.set_authorizer(None)
+
+  plan = [row[3] for row in rows]
+  tables = {
+    row[0]
+    for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+  }
+
+  warnings = []
+  for detail in plan:
+    match = _FULL_SCAN_RE.match(detail)
+    if match and match.group(1) in tables:
+      count = _table_rows(conn, match.group(1))
+      if count >= large_table_rows:
+        warnings.append(
+          f"full scan of '{match.group(1)}' (~{count} rows) — filter on an indexed column "
+          f"(datetime, amount) or use summarize_month / spending_trend"
+        )
+
+  return ValidationResult(True, query, plan, warnings)
+
+def format_result(result: ValidationResult) -> str:
+  if not result.valid:
+    return f"INVALID: {result.error}\nQuery: {result.query}"
+
+  lines = ["VALID (read-only)", f"Query: {result.query}", "Plan:"]
+  lines.extend(f"- {detail}" for detail in result.plan)
+  lines.extend(f"WARNING: {warning}" for warning in result.warnings)
+  return "\n".join(lines)
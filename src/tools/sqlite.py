@@ -1,19 +1,78 @@
-import sqlite3
+import os
+import re
 import traceback
+from datetime import datetime as dt
+from typing import Literal
+from dotenv import load_dotenv
 from langchain.tools import tool
 from langchain_community.utilities import SQLDatabase
-from langchain_community.agent_toolkits import SQLDatabaseToolkit
+from langchain_community.tools.sql_database.tool import InfoSQLDatabaseTool, ListSQLDatabaseTool
 from configs.settings_loader import settings
-from langchain_ollama import ChatOllama
+from ..utils.cache import TTLCache, make_key
+from ..utils.db import SQLiteManager
+from .ledger_schema import MIGRATIONS
+from .sql_validator import format_result, validate_read_query
 
-# Update this path if needed
-DB_PATH = "C:/Users/ASUS/Documents/vscode/second brain OS/data/sqlite/accountant.db"
+load_dotenv()
+db_config = settings.get_database_config("accountant")
 
-def get_connection():
-  return sqlite3.connect(DB_PATH)
+# Location: ACCOUNTANT_DB_PATH env var > DATABASES.accountant.path > default
+DB_PATH = os.getenv("ACCOUNTANT_DB_PATH") or db_config.get("path", "data/sqlite/accountant.db")
+
+# Thread-local persistent connections (WAL + tuned pragmas), shared by every tool
+ledger = SQLiteManager(DB_PATH, pragmas=db_config.get("pragmas"))
+
+# Create / upgrade the schema (tables, indexes) before any tool runs
+SCHEMA_VERSION = ledger.migrate(MIGRATIONS)
+
+# ------------------------------------------------------------------
+# Read cache: results are keyed on the ledger's data version, so any
+# committed write (tools, import, other processes) invalidates them all
+# ------------------------------------------------------------------
+cache_config = settings.get_tool_cache_config("accountant")
+read_cache = TTLCache(
+  default_ttl=cache_config.get("ttl", 3600),
+  max_entries=cache_config.get("max_entries", 512),
+)
+
+# Collapse whitespace outside string literals and drop a trailing ';'
+_SQL_LAYOUT_RE = re.compile(r"""('(?:[^']|'')*'|"(?:[^"]|"")*")|\s+""")
+
+def normalize_sql(query: str) -> str:
+  query = _SQL_LAYOUT_RE.sub(lambda match: match.group(1) or " ", query)
+  return query.strip().rstrip(";").strip()
+
+# Results that change without a write: the clock ('now', CURRENT_*, a
+# date/time function with no time value), random values, connection state
+_NONDETERMINISTIC_SQL_RE = re.compile(
+  r"""\b(?:random|randomblob|changes|total_changes|last_insert_rowid)\s*\("""
+  r"""|\bcurrent_(?:date|time|timestamp)\b"""
+  r"""|'now'"""
+  r"""|\b(?:date|time|datetime|julianday|unixepoch)\s*\(\s*\)"""
+  r"""|\bstrftime\s*\(\s*'(?:[^']|'')*'\s*\)""",
+  re.IGNORECASE,
+)
+
+def is_deterministic(query: str, params=()) -> bool:
+  if _NONDETERMINISTIC_SQL_RE.search(query):
+    return False
+  return not any(isinstance(param, str) and param.strip().lower() == "now" for param in params)
+
+def cached_read(query: str, params=(), compute=None):
+  """
+  Rows of a read query, served from memory while the data is unchanged.
+  `compute` overrides how the result is produced (default: fetchall()).
+  Queries that depend on the clock or on random values always run.
+  """
+  if compute is None:
+    compute = lambda: ledger.connection.execute(query, params).fetchall()
+  if not is_deterministic(query, params):
+    return compute()
+  key = make_key(ledger.data_version(), normalize_sql(query), list(params))
+  return read_cache.get_or_compute(key, compute)
 
 @tool
-def add_transaction(amount: float, description: str, datetime: str = None) -> str:
+def add_transaction(amount: float, description: str, datetime: str = None, category: str = None) -> str:
   """Add a new transaction to the database.
 
   Use this tool whenever the user wants to record income or expense.
@@ -25,31 +84,28 @@ def add_transaction(amount: float, description: str, datetime: str = None) -> st
     amount (float): Signed amount (e.g., -45.50 for expense, 2000.00 for income)
     description (str): Free-text description (e.g., "Starbucks coffee", "Salary January")
     datetime (str, optional): When the transaction occurred. Defaults to now.
+    category (str, optional): Short lowercase category (e.g., "food", "transport", "salary").
+      Defaults to "uncategorized".
 
   Returns:
     str: Confirmation message
   """
   # print(f"Adding Transaction: amount {amount} | description {description} | datetime {datetime}")
-  conn = get_connection()
-  cursor = conn.cursor()
+  values = {"amount": amount, "description": description}
+  if datetime is not None:
+    values["datetime"] = datetime
+  if category:
+    values["category"] = category.strip().lower()
 
   try:
-    if datetime is None:
-      cursor.execute("""
-        INSERT INTO transactions (amount, description)
-        VALUES (?, ?)
-      """, (amount, description))
-    else:
-      cursor.execute("""
-        INSERT INTO transactions (datetime, amount, description)
-        VALUES (?, ?, ?)
-      """, (datetime, amount, description))
-
-    conn.commit()
-    conn.close()
+    with ledger.transaction() as conn:
+      conn.execute(
+        f"INSERT INTO transactions ({', '.join(values)}) VALUES ({', '.join('?' * len(values))})",
+        tuple(values.values()),
+      )
+
     return f"Successfully recorded: {amount:+.2f} — {description}"
   except Exception as e:
-    conn.close()
     tb = traceback.format_exc()
     print("\n🔥 ADD_TRANSACTION ERROR 🔥\n", tb, "\n🔥 END 🔥\n")
     return f"Error recording transaction: {str(e)}"
@@ -65,20 +121,15 @@ def get_recent_transactions(limit: int = 10) -> str:
     str: Formatted list of recent transactions.
   """
   # print(f"Getting Transaction: limit {limit}")
-  conn = get_connection()
-  cursor = conn.cursor()
   safe_limit = min(max(1, limit), 50)
   
-  cursor.execute("""
+  rows = cached_read("""
     SELECT datetime, amount, description 
     FROM transactions 
     ORDER BY datetime DESC 
     LIMIT ?
   """, (safe_limit,))
   
-  rows = cursor.fetchall()
-  conn.close()
-  
   if not rows:
     return "No transactions recorded yet."
   
@@ -89,41 +140,79 @@ def get_recent_transactions(limit: int = 10) -> str:
   
   return "\n".join(lines)
 
+_FTS_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+def _fts_query(keyword: str, operator: str = "AND") -> str | None:
+  """
+  Turn free text into a safe FTS5 query: every word becomes a quoted
+  prefix term ("star"* matches Starbucks). Returns None if no words.
+  """
+  terms = [f'"{token}"*' for token in _FTS_TOKEN_RE.findall(keyword)]
+  if not terms:
+    return None
+  return f" {operator} ".join(terms)
+
+def _search_ranked(fts_query: str, date_filters: str, date_params: list, limit: int) -> list:
+  return cached_read(f"""
+    SELECT t.datetime, t.amount, t.description
+    FROM transactions_fts
+    JOIN transactions t ON t.rowid = transactions_fts.rowid
+    WHERE transactions_fts MATCH ?{date_filters}
+    ORDER BY bm25(transactions_fts), t.datetime DESC
+    LIMIT ?
+  """, [fts_query, *date_params, limit])
+
 @tool
-def search_transactions(keyword: str = None, start_date: str = None, end_date: str = None, limit: int = 20) -> str:
+def search_transactions(
+  keyword: str = None,
+  start_date: str = None,
+  end_date: str = None,
+  limit: int = 20,
+  mode: Literal["ranked", "substring"] = "ranked",
+) -> str:
   """Search transactions by keyword in description or date range.
   
   Args:
     keyword (str, optional): Search term in specified requests (case-insensitive).
+      In "ranked" mode several words match in any order, and word prefixes and
+      variants match too ("coffee star" finds "Starbucks coffees").
     start_date (str, optional): ISO date '2026-01-01'
     end_date (str, optional): ISO date '2026-02-01'
     limit (int): Max results (default 20).
+    mode (str): "ranked" (default) = full-text search, best matches first;
+      "substring" = exact substring match, newest first.
   Returns:
     str: Matching transactions.
   """
   # print(f"Searching Transaction: keyword {keyword} | start_date {start_date} | end_date {end_date} | limit {limit}")
-  conn = get_connection()
-  cursor = conn.cursor()
-  
-  query = "SELECT datetime, amount, description FROM transactions WHERE 1=1"
-  params = []
-  
-  if keyword:
-    query += " AND description LIKE ?"
-    params.append(f"%{keyword}%")
+  date_filters = ""
+  date_params = []
   if start_date:
-    query += " AND datetime >= ?"
-    params.append(f"{start_date} 00:00:00")
+    date_filters += " AND datetime >= ?"
+    date_params.append(f"{start_date} 00:00:00")
   if end_date:
-    query += " AND datetime < ?"
-    params.append(f"{end_date} 00:00:00")
-  
-  query += " ORDER BY datetime DESC LIMIT ?"
-  params.append(limit)
-  
-  cursor.execute(query, params)
-  rows = cursor.fetchall()
-  conn.close()
+    date_filters += " AND datetime < ?"
+    date_params.append(f"{end_date} 00:00:00")
+
+  fts_query = _fts_query(keyword) if keyword and mode == "ranked" else None
+
+  if fts_query:
+    rows = _search_ranked(fts_query, date_filters, date_params, limit)
+    # All words together found nothing: fall back to ANY word, still ranked
+    if not rows and " AND " in fts_query:
+      rows = _search_ranked(_fts_query(keyword, "OR"), date_filters, date_params, limit)
+  else:
+    query = "SELECT datetime, amount, description FROM transactions WHERE 1=1"
+    params = []
+
+    if keyword:
+      query += " AND description LIKE ?"
+      params.append(f"%{keyword}%")
+
+    query += date_filters + " ORDER BY datetime DESC LIMIT ?"
+    params.extend([*date_params, limit])
+
+    rows = cached_read(query, params)
   
   if not rows:
       return "No matching transactions found."
@@ -143,32 +232,52 @@ def delete_last_transaction() -> str:
     str: Confirmation or error.
   """
   # print(f"Deleting Last Transaction")
-  conn = get_connection()
-  cursor = conn.cursor()
-  
-  # Get the latest one first for confirmation
-  cursor.execute("""
-    SELECT datetime, amount, description 
-    FROM transactions 
-    ORDER BY datetime DESC LIMIT 1
-  """)
-  row = cursor.fetchone()
-  
-  if not row:
-    conn.close()
-    return "No transactions to delete."
-  
-  dt, amt, desc = row
-  cursor.execute("DELETE FROM transactions WHERE datetime = ? AND amount = ? AND description = ?", (dt, amt, desc))
-  
+  # Select + delete in ONE transaction so nothing can slip in between
+  with ledger.transaction() as conn:
+    # Get the latest one first for confirmation
+    row = conn.execute("""
+      SELECT rowid, datetime, amount, description 
+      FROM transactions 
+      ORDER BY datetime DESC LIMIT 1
+    """).fetchone()
+
+    if not row:
+      return "No transactions to delete."
+
+    rowid, dt, amt, desc = row
+    cursor = conn.execute("DELETE FROM transactions WHERE rowid = ?", (rowid,))
+
   if cursor.rowcount == 1:
-    conn.commit()
-    conn.close()
     return f"Deleted the last transaction: {amt:+.2f} — {desc} ({dt[:16]})"
   else:
-    conn.close()
     return "Failed to delete — transaction may have been modified."
   
+# ------------------------------------------------------------------
+# Summaries read the trigger-maintained ledger_monthly aggregates
+# (one row per month x category) instead of scanning transactions
+# ------------------------------------------------------------------
+MONTH_NAMES = ["Jan","Feb","Mar","Apr","May","Jun","Jul","Aug","Sep","Oct","Nov","Dec"]
+
+def _month_key(value: str) -> str:
+  """'YYYY-MM' (zero-padded: month keys compare as strings); ValueError otherwise."""
+  try:
+    return dt.strptime(str(value).strip(), "%Y-%m").strftime("%Y-%m")
+  except ValueError:
+    raise ValueError(f"month must be 'YYYY-MM' (e.g. '2026-03'), got {value!r}") from None
+
+def _month_label(month_key: str) -> str:
+  year, month = month_key.split("-")
+  return f"{MONTH_NAMES[int(month) - 1]} {year}"
+
+def _category_totals(month_key: str) -> list:
+  """(category, income_cents, expense_cents, tx_count) for one 'YYYY-MM', biggest spend first."""
+  return cached_read("""
+    SELECT category, income_cents, expense_cents, tx_count
+    FROM ledger_monthly
+    WHERE month = ?
+    ORDER BY expense_cents DESC, income_cents DESC
+  """, (month_key,))
+
 @tool
 def summarize_month(year: int, month: int) -> str:
   """Get income, expenses, and net for a specific month.
@@ -178,38 +287,135 @@ def summarize_month(year: int, month: int) -> str:
     month (int): 1-12
   
   Returns:
-    str: Summary with totals.
+    str: Summary with totals and a per-category breakdown.
   """
-  # print(f"Summarizing Month Transaction: year {year} | month {month}")
-  conn = get_connection()
-  cursor = conn.cursor()
+  try:
+    # print(f"Summarizing Month Transaction: year {year} | month {month}")
+    if not 1 <= int(month) <= 12:
+      raise ValueError(f"month must be 1-12, got {month!r}")
+    rows = _category_totals(_month_key(f"{int(year):04d}-{int(month):02d}"))
+
+    income = sum(row[1] for row in rows) / 100
+    expenses = sum(row[2] for row in rows) / 100
+    net = income - expenses
   
-  start = f"{year:04d}-{month:02d}-01 00:00:00"
-  end = f"{year:04d}-{month:02d+1:02d}-01 00:00:00" if month < 12 else f"{year+1:04d}-01-01 00:00:00"
+    month_name = MONTH_NAMES[int(month) - 1]
   
-  cursor.execute("""
-    SELECT 
-      SUM(CASE WHEN amount > 0 THEN amount ELSE 0 END) as income,
-      SUM(CASE WHEN amount < 0 THEN ABS(amount) ELSE 0 END) as expenses
-    FROM transactions 
-    WHERE datetime >= ? AND datetime < ?
-  """, (start, end))
+    lines = [f"**{month_name} {year} Summary**\nIncome: +${income:.2f}\nExpenses: -${expenses:.2f}\nNet: {net:+.2f}"]
+    if rows:
+      lines.append("By category:")
+      for category, income_cents, expense_cents, count in rows:
+        lines.append(f"• {category} | +${income_cents / 100:.2f} | -${expense_cents / 100:.2f} | {count} tx")
+
+    return "\n".join(lines)
+  except Exception as e:
+    tb = traceback.format_exc()
+    print("\n🔥 SUMMARIZE_MONTH ERROR 🔥\n", tb, "\n🔥 END 🔥\n")
+    return f"summarize_month error: {str(e)}"
+
+@tool
+def spending_trend(start_month: str, end_month: str, category: str = None) -> str:
+  """Month-by-month income, expenses and net over a range (trends, year-to-date).
   
-  row = cursor.fetchone()
-  conn.close()
+  Args:
+    start_month (str): First month, 'YYYY-MM' (e.g. '2026-01'; use 'YYYY-01' for year-to-date)
+    end_month (str): Last month, inclusive, 'YYYY-MM'
+    category (str, optional): Restrict to one category (e.g. "food")
   
-  income = row[0] or 0.0
-  expenses = row[1] or 0.0
-  net = income - expenses
+  Returns:
+    str: One line per month plus range totals and monthly averages.
+  """
+  try:
+    start_month, end_month = _month_key(start_month), _month_key(end_month)
+    if start_month > end_month:
+      raise ValueError(f"start_month {start_month} is after end_month {end_month}")
+    query = """
+      SELECT month, SUM(income_cents), SUM(expense_cents)
+      FROM ledger_monthly
+      WHERE month BETWEEN ? AND ?
+    """
+    params = [start_month, end_month]
+    if category:
+      query += " AND category = ?"
+      params.append(category.strip().lower())
+    query += " GROUP BY month ORDER BY month"
+
+    rows = cached_read(query, params)
+    if not rows:
+      return "No transactions recorded in this period."
+
+    scope = f" ({category})" if category else ""
+    lines = [f"**Trend {start_month} to {end_month}{scope}**"]
+    for month_key, income_cents, expense_cents in rows:
+      net = (income_cents - expense_cents) / 100
+      lines.append(f"• {_month_label(month_key)} | +${income_cents / 100:.2f} | -${expense_cents / 100:.2f} | net {net:+.2f}")
+
+    total_income = sum(row[1] for row in rows) / 100
+    total_expenses = sum(row[2] for row in rows) / 100
+    lines.append(
+      f"Total: +${total_income:.2f} | -${total_expenses:.2f} | net {total_income - total_expenses:+.2f}\n"
+      f"Monthly average expenses: -${total_expenses / len(rows):.2f} over {len(rows)} month(s) with activity"
+    )
+    return "\n".join(lines)
+  except Exception as e:
+    tb = traceback.format_exc()
+    print("\n🔥 SPENDING_TREND ERROR 🔥\n", tb, "\n🔥 END 🔥\n")
+    return f"spending_trend error: {str(e)}"
+
+@tool
+def compare_months(month_a: str, month_b: str) -> str:
+  """Compare two months: totals and per-category changes (month-over-month, year-over-year).
   
-  month_name = ["Jan","Feb","Mar","Apr","May","Jun","Jul","Aug","Sep","Oct","Nov","Dec"][month-1]
+  Args:
+    month_a (str): Baseline month, 'YYYY-MM'
+    month_b (str): Month to compare against the baseline, 'YYYY-MM'
   
-  return f"**{month_name} {year} Summary**\nIncome: +${income:.2f}\nExpenses: -${expenses:.2f}\nNet: {net:+.2f}"
+  Returns:
+    str: Totals for both months and expense change per category, largest change first.
+  """
+  try:
+    month_a, month_b = _month_key(month_a), _month_key(month_b)
+    totals_a = {row[0]: row for row in _category_totals(month_a)}
+    totals_b = {row[0]: row for row in _category_totals(month_b)}
+    if not totals_a and not totals_b:
+      return "No transactions recorded in either month."
+
+    def totals(rows):
+      return sum(row[1] for row in rows.values()) / 100, sum(row[2] for row in rows.values()) / 100
+
+    income_a, expenses_a = totals(totals_a)
+    income_b, expenses_b = totals(totals_b)
+    label_a, label_b = _month_label(month_a), _month_label(month_b)
+
+    lines = [
+      f"**{label_a} vs {label_b}**",
+      f"Income: +${income_a:.2f} -> +${income_b:.2f} ({income_b - income_a:+.2f})",
+      f"Expenses: -${expenses_a:.2f} -> -${expenses_b:.2f} ({expenses_b - expenses_a:+.2f})",
+      f"Net: {income_a - expenses_a:+.2f} -> {income_b - expenses_b:+.2f}",
+      "Expense change by category:",
+    ]
+
+    changes = []
+    for category in totals_a.keys() | totals_b.keys():
+      before = totals_a[category][2] / 100 if category in totals_a else 0.0
+      after = totals_b[category][2] / 100 if category in totals_b else 0.0
+      if before or after:
+        changes.append((after - before, category, before, after))
+
+    for delta, category, before, after in sorted(changes, key=lambda change: -abs(change[0])):
+      lines.append(f"• {category} | -${before:.2f} -> -${after:.2f} ({delta:+.2f})")
+
+    return "\n".join(lines)
+
+  # ------------------------------------------------------------------
+  # Keep execute_sql_write for advanced cases (editing/deleting by user request)
+  # But make it safer and clearer
+  # ------------------------------------------------------------------
+  except Exception as e:
+    tb = traceback.format_exc()
+    print("\n🔥 COMPARE_MONTHS ERROR 🔥\n", tb, "\n🔥 END 🔥\n")
+    return f"compare_months error: {str(e)}"
 
-# ------------------------------------------------------------------
-# Keep execute_sql_write for advanced cases (editing/deleting by user request)
-# But make it safer and clearer
-# ------------------------------------------------------------------
 @tool
 def execute_sql_write(query: str) -> str:
   """Execute a single INSERT, UPDATE, or DELETE statement.
@@ -225,41 +431,62 @@ def execute_sql_write(query: str) -> str:
       str: Success or error message.
   """
   print(f"Executing SQL Write: query {query}")
-  conn = get_connection()
-  cursor = conn.cursor()
-
   try:
-    cursor.execute(query)
-    conn.commit()
-    rows = cursor.rowcount
-    conn.close()
+    with ledger.transaction() as conn:
+      rows = conn.execute(query).rowcount
     return f"Success: {rows} row(s) affected."
   except Exception as e:
-    conn.close()
     tb = traceback.format_exc()
     print("\n🔥 EXECUTE_SQL_WRITE ERROR 🔥\n", tb, "\n🔥 END 🔥\n")
     return f"execute_sql_write error: {str(e)}"
 
 
 # ------------------------------------------------------------------
-# SQLDatabase toolkit setup (read-only operations)
+# SQLDatabase tools (read-only operations)
 # ------------------------------------------------------------------
-db = SQLDatabase.from_uri(f"sqlite:///{DB_PATH}")
-
-agent_config = settings.get_agent_model_config("Accountant")
-llm = ChatOllama(
-  model=agent_config["model"],
-  temperature=agent_config.get("temperature", 0.0),
-  num_ctx=agent_config.get("num_ctx", 8192),
-  num_predict=agent_config.get("num_predict", -1),
-  base_url=settings.get_base_url(),
-  format=agent_config.get("format", ""),
-)
+# Same database, same pragmas — via the manager's pooled SQLAlchemy engine
+db = SQLDatabase(ledger.engine())
+
+# Plans scanning a table at least this big get a warning from the checker
+LARGE_TABLE_ROWS = db_config.get("large_table_rows", 10000)
+
+sql_list_tables = ListSQLDatabaseTool(db=db)
+sql_get_schema = InfoSQLDatabaseTool(db=db)
 
-toolkit = SQLDatabaseToolkit(db=db, llm=llm)
+@tool("sql_db_query_checker")
+def sql_query_checker(query: str) -> str:
+  """Check a SQL query before executing it with sql_db_query.
 
-# Extract the standard SQL tools
-sql_list_tables = next(t for t in toolkit.get_tools() if t.name == "sql_db_list_tables")
-sql_get_schema = next(t for t in toolkit.get_tools() if t.name == "sql_db_schema")
-sql_query = next(t for t in toolkit.get_tools() if t.name == "sql_db_query")
-sql_query_checker = next(t for t in toolkit.get_tools() if t.name == "sql_db_query_checker")
\ No newline at end of file
+  Always use this tool before executing a query with sql_db_query!
+  Compiles the query against the real schema (nothing is executed) and reports
+  syntax errors, unknown tables/columns, write statements (not allowed here)
+  and slow full-table scans.
+
+  Args:
+    query (str): A single SELECT statement.
+
+  Returns:
+    str: "VALID" with the query plan and any warnings, or "INVALID" with the reason.
+  """
+  result = validate_read_query(ledger.connection, query, LARGE_TABLE_ROWS)
+  return format_result(result)
+
+@tool("sql_db_query")
+def sql_query(query: str) -> str:
+  """Execute a read-only SQL query against the database and get back the result.
+
+  If the query is not correct, an error message will be returned.
+  If an error is returned, rewrite the query, check the query, and try again.
+  If you encounter an unknown column error, use sql_db_schema to query the correct table fields.
+  Writes are rejected here — use execute_sql_write for those.
+
+  Args:
+    query (str): A single detailed and correct SELECT statement.
+
+  Returns:
+    str: The result rows, or an error message.
+  """
+  result = validate_read_query(ledger.connection, query, LARGE_TABLE_ROWS)
+  if not result.valid:
+    return f"Error: {result.error}"
+  return cached_read(result.query, compute=lambda: db.run_no_throw(result.query))
@@ -1,11 +1,82 @@
-from tavily import TavilyClient
+from tavily import AsyncTavilyClient, TavilyClient
 from langchain_core.tools import tool
+import asyncio
 import os
 from dotenv import load_dotenv
 import traceback
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout
+from urllib.parse import urlsplit, urlunsplit
+from configs.settings_loader import settings
+from ..utils.cache import TTLCache, make_key
 
 load_dotenv()
 tavily_client = TavilyClient(api_key=os.getenv("TAVILY_API_KEY"))
+# Used by the async variants (agents run via arun/astream). One client per
+# event loop: its httpx pool belongs to the loop that opened the connections
+_async_clients: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+def _async_tavily_client() -> AsyncTavilyClient:
+  loop = asyncio.get_running_loop()
+  client = _async_clients.get(loop)
+  if client is None:
+    client = _async_clients[loop] = AsyncTavilyClient(api_key=os.getenv("TAVILY_API_KEY"))
+  return client
+
+# Shared across agents/turns; persisted so repeats survive restarts
+cache_config = settings.get_tool_cache_config("tavily")
+SEARCH_TTL = cache_config.get("search_ttl", 3600)
+EXTRACT_TTL = cache_config.get("extract_ttl", 86400)
+tavily_cache = TTLCache(
+  path=cache_config.get("path"),
+  default_ttl=SEARCH_TTL,
+  max_entries=cache_config.get("max_entries", 2000),
+)
+
+# Extraction fans out one sub-request per URL
+extract_config = settings.get_tool_settings("tavily_extract")
+EXTRACT_MAX_WORKERS = extract_config.get("max_workers", 5)
+EXTRACT_TIMEOUT = extract_config.get("timeout", 20)
+EXTRACT_MAX_CHARS = extract_config.get("max_chars", 8000)
+extract_pool = ThreadPoolExecutor(max_workers=EXTRACT_MAX_WORKERS, thread_name_prefix="tavily-extract")
+
+def _normalize_query(query: str) -> str:
+  """Case- and whitespace-insensitive form of a search query."""
+  return " ".join(query.lower().split())
+
+def _normalize_url(url: str) -> str:
+  """Lowercase scheme/host, drop the fragment and a trailing slash."""
+  parts = urlsplit(url.strip())
+  path = parts.path.rstrip("/")
+  return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, parts.query, ""))
+
+def _extract_one(url: str, include_images: bool) -> dict:
+  """Extract a single URL (cached per URL). Raises on failure."""
+  def fetch():
+    response = tavily_client.extract(
+      urls=[url],
+      include_images=include_images,
+      extract_depth="advanced",
+      timeout=EXTRACT_TIMEOUT,
+    )
+    if response.get("results"):
+      return response["results"][0]
+    failed = response.get("failed_results") or [{}]
+    raise RuntimeError(failed[0].get("error") or "no content extracted")
+
+  key = make_key("extract", _normalize_url(url), include_images, "advanced")
+  return tavily_cache.get_or_compute(key, fetch, ttl=EXTRACT_TTL)
+
+def _cap_content(result: dict) -> dict:
+  """Trim raw_content to EXTRACT_MAX_CHARS before it reaches the agent."""
+  content = result.get("raw_content") or ""
+  if len(content) <= EXTRACT_MAX_CHARS:
+    return result
+  return {
+    **result,
+    "raw_content": content[:EXTRACT_MAX_CHARS] + f"\n...[truncated {len(content) - EXTRACT_MAX_CHARS} chars]",
+  }
 
 @tool
 def tavily_search_api(query: str, max_results: int = 5) -> str:
@@ -31,10 +102,11 @@ def tavily_search_api(query: str, max_results: int = 5) -> str:
 
   Note:
     The tool uses Tavily's "basic" search depth for faster results.
+    Results are cached (TOOL_CACHE.tavily) — identical queries are free.
     In case of API errors, the exception traceback is printed to console 
     for debugging, and an error dictionary is returned.
   """
-  try:
+  def fetch():
     response = tavily_client.search(
       query=query,
       max_results=max_results,
@@ -44,6 +116,10 @@ def tavily_search_api(query: str, max_results: int = 5) -> str:
     if "results" in response:
       return response["results"]
     return response
+
+  try:
+    key = make_key("search", _normalize_query(query), max_results, "basic")
+    return tavily_cache.get_or_compute(key, fetch, ttl=SEARCH_TTL)
   except Exception as e:
     tb = traceback.format_exc()
     print("\n🔥 TASK FAILED TRACEBACK 🔥")
@@ -69,26 +145,108 @@ def tavily_extract_content(urls: list[str], include_images: bool = False) -> str
 
   Returns:
     str: A JSON-serializable object containing the extraction results.
-        Typically a list of dicts with keys like "url" and "raw_content".
-        If an error occurs, returns a dict with an "error" key.
+        A list of dicts with keys like "url" and "raw_content" (capped length).
+        URLs that failed or timed out are listed as {"url", "error"} entries;
+        the remaining pages are still returned.
 
   Note:
     Uses Tavily's "advanced" extraction depth for high-quality cleaned content.
+    Each URL is extracted concurrently with its own timeout and cached
+    (TOOL_CACHE.tavily) — re-extracting the same URL is free.
     Errors are caught, logged with full traceback to console, 
     and returned as an error dictionary.
   """
   try:
-    response = tavily_client.extract(
-      urls=urls,
+    unique_urls = list(dict.fromkeys(urls))
+    submitted = {}
+    futures = {}
+    for url in unique_urls:
+      submitted[url] = time.monotonic()
+      futures[url] = extract_pool.submit(_extract_one, url, include_images)
+
+    results = []
+    for url, future in futures.items():
+      # Each URL gets EXTRACT_TIMEOUT from its own submit, not one shared deadline
+      remaining = max(0.0, submitted[url] + EXTRACT_TIMEOUT - time.monotonic())
+      try:
+        results.append(_cap_content(future.result(timeout=remaining)))
+      except FuturesTimeout:
+        # Still running or queued: reported, not waited for
+        future.cancel()
+        results.append({"url": url, "error": f"timed out after {EXTRACT_TIMEOUT}s"})
+      except Exception as e:
+        results.append({"url": url, "error": str(e)})
+
+    return results
+  except Exception as e:
+    tb = traceback.format_exc()
+    print("\n🔥 TASK FAILED TRACEBACK 🔥")
+    print(tb)
+    print("🔥 END TRACEBACK 🔥\n")
+    return f"tavily_extract_content error: {e}"
+
+# -------------------------
+# Async variants (same cache, same output)
+# -------------------------
+async def _aextract_one(url: str, include_images: bool) -> dict:
+  """Async _extract_one()."""
+  async def fetch() -> dict:
+    response = await _async_tavily_client().extract(
+      urls=[url],
       include_images=include_images,
-      extract_depth="advanced"
+      extract_depth="advanced",
+      timeout=EXTRACT_TIMEOUT,
     )
-    if "results" in response:
-      return response["results"]
-    return response
+    if response.get("results"):
+      return response["results"][0]
+    failed = response.get("failed_results") or [{}]
+    raise RuntimeError(failed[0].get("error") or "no content extracted")
+
+  key = make_key("extract", _normalize_url(url), include_images, "advanced")
+  return await tavily_cache.aget_or_compute(key, fetch, ttl=EXTRACT_TTL)
+
+async def _atavily_search_api(query: str, max_results: int = 5) -> str:
+  async def fetch():
+    response = await _async_tavily_client().search(
+      query=query,
+      max_results=max_results,
+      search_depth="basic"
+    )
+    return response["results"] if "results" in response else response
+
+  try:
+    key = make_key("search", _normalize_query(query), max_results, "basic")
+    return await tavily_cache.aget_or_compute(key, fetch, ttl=SEARCH_TTL)
   except Exception as e:
     tb = traceback.format_exc()
     print("\n🔥 TASK FAILED TRACEBACK 🔥")
     print(tb)
     print("🔥 END TRACEBACK 🔥\n")
-    return f"tavily_extract_content error: {e}"
\ No newline at end of file
+    return f"tavily_search_api error: {e}"
+
+async def _atavily_extract_content(urls: list[str], include_images: bool = False) -> str:
+  try:
+    unique_urls = list(dict.fromkeys(urls))
+    # No worker pool here: every URL is in flight at once, each with its own timeout
+    outcomes = await asyncio.gather(
+      *(asyncio.wait_for(_aextract_one(url, include_images), EXTRACT_TIMEOUT) for url in unique_urls),
+      return_exceptions=True,
+    )
+    results = []
+    for url, outcome in zip(unique_urls, outcomes):
+      if isinstance(outcome, asyncio.TimeoutError):
+        results.append({"url": url, "error": f"timed out after {EXTRACT_TIMEOUT}s"})
+      elif isinstance(outcome, Exception):
+        results.append({"url": url, "error": str(outcome)})
+      else:
+        results.append(_cap_content(outcome))
+    return results
+  except Exception as e:
+    tb = traceback.format_exc()
+    print("\n🔥 TASK FAILED TRACEBACK 🔥")
+    print(tb)
+    print("🔥 END TRACEBACK 🔥\n")
+    return f"tavily_extract_content error: {e}"
+
+tavily_search_api.coroutine = _atavily_search_api
+tavily_extract_content.coroutine = _atavily_extract_content
@@ -0,0 +1,117 @@
+import asyncio
+import threading
+import weakref
+from contextlib import asynccontextmanager, contextmanager
+from langchain.agents.middleware import AgentMiddleware
+from configs.settings_loader import settings
+
+config = settings.get_tool_concurrency_config()
+CONCURRENCY_ENABLED = config.get("enabled", True)
+MAX_PARALLEL = config.get("max_parallel", 4)
+DEFAULT_LIMIT = config.get("default_limit", 4)
+TOOL_LIMITS = config.get("tools", {}) or {}
+GROUPS = config.get("groups", {}) or {}
+
+class ToolLimiter:
+  """
+  Per-tool concurrency limits (TOOL_CONCURRENCY), process-wide. A tool in a
+  group shares the group's limit. Threads wait on threading semaphores; the
+  async path uses asyncio semaphores of the running loop (one set per loop),
+  so the two paths are limited separately.
+  """
+
+  def __init__(self, default_limit: int, tool_limits: dict, groups: dict):
+    self.default_limit = default_limit
+    self._keys: dict[str, tuple[str, int]] = {
+      name: (name, limit) for name, limit in tool_limits.items()
+    }
+    for group, group_config in groups.items():
+      for name in group_config.get("tools", []):
+        self._keys[name] = (f"group:{group}", group_config.get("limit", 1))
+    self._lock = threading.Lock()
+    self._semaphores: dict[str, threading.Semaphore] = {}
+    self._async_semaphores: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+    self._in_flight: dict[str, int] = {}
+    self._peak: dict[str, int] = {}
+
+  def key_for(self, tool_name: str) -> tuple[str, int]:
+    return self._keys.get(tool_name, (tool_name, self.default_limit))
+
+  def _semaphore(self, tool_name: str) -> tuple[str, threading.Semaphore]:
+    key, limit = self.key_for(tool_name)
+    with self._lock:
+      if key not in self._semaphores:
+        self._semaphores[key] = threading.Semaphore(limit)
+      return key, self._semaphores[key]
+
+  def _async_semaphore(self, tool_name: str) -> tuple[str, asyncio.Semaphore]:
+    key, limit = self.key_for(tool_name)
+    loop = asyncio.get_running_loop()
+    with self._lock:
+      semaphores = self._async_semaphores.setdefault(loop, {})
+      if key not in semaphores:
+        semaphores[key] = asyncio.Semaphore(limit)
+      return key, semaphores[key]
+
+  def _enter(self, key: str):
+    with self._lock:
+      self._in_flight[key] = self._in_flight.get(key, 0) + 1
+      self._peak[key] = max(self._peak.get(key, 0), self._in_flight[key])
+
+  def _exit(self, key: str):
+    with self._lock:
+      self._in_flight[key] -= 1
+
+  @contextmanager
+  def slot(self, tool_name: str):
+    key, semaphore = self._semaphore(tool_name)
+    with semaphore:
+      self._enter(key)
+      try:
+        yield
+      finally:
+        self._exit(key)
+
+  @asynccontextmanager
+  async def aslot(self, tool_name: str):
+    key, semaphore = self._async_semaphore(tool_name)
+    async with semaphore:
+      self._enter(key)
+      try:
+        yield
+      finally:
+        self._exit(key)
+
+  def stats(self) -> dict:
+    """limit key -> {"limit", "in_flight", "peak"} for every key used so far."""
+    limits = {key: limit for key, limit in self._keys.values()}
+    with self._lock:
+      return {
+        key: {
+          "limit": limits.get(key, self.default_limit),
+          "in_flight": self._in_flight.get(key, 0),
+          "peak": peak,
+        }
+        for key, peak in self._peak.items()
+      }
+
+tool_limiter = ToolLimiter(DEFAULT_LIMIT, TOOL_LIMITS, GROUPS)
+
+def step_config() -> dict:
+  """Run config for agent invoke/stream: at most MAX_PARALLEL tool calls of one step at a time."""
+  return {"max_concurrency": MAX_PARALLEL} if CONCURRENCY_ENABLED else {}
+
+class ToolConcurrencyLimit(AgentMiddleware):
+  """
+  Holds each tool call to its TOOL_CONCURRENCY limit. The calls of one model
+  message already run as parallel graph tasks (results keep the order of the
+  tool calls); this only bounds how many of one kind run at once.
+  """
+
+  def wrap_tool_call(self, request, handler):
+    with tool_limiter.slot(request.tool_call["name"]):
+      return handler(request)
+
+  async def awrap_tool_call(self, request, handler):
+    async with tool_limiter.aslot(request.tool_call["name"]):
+      return await handler(request)
@@ -0,0 +1,268 @@
+import itertools
+import json
+import re
+import threading
+from collections import OrderedDict
+from langchain.agents.middleware import AgentMiddleware
+from langchain_core.messages import ToolMessage
+from langchain_core.tools import tool
+from configs.settings_loader import settings
+from ..utils.tokens import ASCII_CHARS_PER_TOKEN, estimate_tokens
+
+config = settings.get_tool_output_config()
+SHAPING_ENABLED = config.get("enabled", True)
+DEFAULT_BUDGET = config.get("default_tokens", 1500)
+TOOL_BUDGETS = config.get("tools", {}) or {}
+MAX_HANDLES = config.get("max_handles", 64)
+
+FOOTER_TOKENS = 40          # the "[more: ...]" line
+MIN_CLIP_CHARS = 200        # shorter string fields (ids, urls, dates) are never clipped
+
+# Record boundaries in text output: dashed separator lines, or lines that
+# open a record ("[Memory 2] ...", "Message ID: ...")
+_SEPARATOR_RE = re.compile(r"\n\s*-{10,}\s*(?:\n|$)")
+_RECORD_START_RE = re.compile(r"\n+(?=\[[A-Za-z][^\]\n]*\]|Message ID:)")
+_PARAGRAPH_RE = re.compile(r"\n\s*\n")
+
+class _PageStore:
+  """Unshown chunks of shaped tool outputs, by handle (LRU-bounded)."""
+
+  def __init__(self, max_handles: int):
+    self.max_handles = max_handles
+    self._pages: OrderedDict[str, tuple[str, list[str], int]] = OrderedDict()
+    self._ids = itertools.count(1)
+    self._lock = threading.Lock()
+
+  def put(self, tool_name: str, chunks: list[str], total: int) -> str:
+    with self._lock:
+      handle = f"{tool_name}-{next(self._ids)}"
+      self._pages[handle] = (tool_name, chunks, total)
+      while len(self._pages) > self.max_handles:
+        self._pages.popitem(last=False)
+      return handle
+
+  def pop(self, handle: str) -> tuple[str, list[str], int] | None:
+    with self._lock:
+      return self._pages.pop(handle, None)
+
+page_store = _PageStore(MAX_HANDLES)
+
+def budget_for(tool_name: str) -> int:
+  return TOOL_BUDGETS.get(tool_name, DEFAULT_BUDGET)
+
+# -------------------------
+# Shaping
+# -------------------------
+def shape_output(tool_name: str, content: str, budget: int | None = None) -> str:
+  """
+  Fit one tool result into `budget` tokens:
+  - JSON lists (or a dict wrapping one) are shaped per item: duplicate items
+    dropped; an item too big for half the budget keeps its structure with
+    long string fields clipped, the clipped rest following as
+    {"item", "field", "continued"} chunks (strings: {"item", "continued"});
+    long fields beside the list are clipped the same way
+  - text is split into records (separators / record headers, else
+    paragraphs), duplicates dropped, oversized records split on lines
+  Whole chunks are emitted in order while they fit (the first one is cut to
+  fit if it must); the rest is kept behind a read_more handle.
+  """
+  budget = budget or budget_for(tool_name)
+  if estimate_tokens(content) <= budget:
+    return content
+
+  chunk_budget = max((budget - FOOTER_TOKENS) // 2, 1)
+  header, chunks = _json_chunks(content, chunk_budget)
+  if chunks is None:
+    header, chunks = "", _text_chunks(content, chunk_budget)
+  return _page(tool_name, header, chunks, len(chunks), budget)
+
+def _page(tool_name: str, header: str, chunks: list[str], total: int, budget: int) -> str:
+  used = estimate_tokens(header) + FOOTER_TOKENS
+  shown, rest = [], list(chunks)
+  while rest:
+    cost = estimate_tokens(rest[0])
+    if used + cost > budget:
+      if shown:
+        break
+      # The first chunk is always shown: cut it to what is left, the rest stays next
+      cut = _fit_prefix(rest[0], max(budget - used, 1))
+      rest[0:1] = [rest[0][:cut], rest[0][cut:]]
+      cost = estimate_tokens(rest[0])
+    shown.append(rest.pop(0))
+    used += cost
+
+  lines = [header] if header else []
+  lines.extend(shown)
+  if rest:
+    handle = page_store.put(tool_name, rest, total)
+    lines.append(
+      f"[more: {len(rest)} of {total} parts not shown (~{sum(map(estimate_tokens, rest))} tokens) "
+      f'— call read_more(handle="{handle}") for the next page]'
+    )
+  return "\n".join(lines)
+
+def _fit_prefix(text: str, tokens: int) -> int:
+  """Longest prefix length of `text` within `tokens` (at least one character)."""
+  # No character costs less than 1/ASCII_CHARS_PER_TOKEN of a token
+  low, high = 1, min(len(text), int(tokens * ASCII_CHARS_PER_TOKEN) + 1)
+  while low < high:
+    middle = (low + high + 1) // 2
+    if estimate_tokens(text[:middle]) <= tokens:
+      low = middle
+    else:
+      high = middle - 1
+  return low
+
+def _json_chunks(content: str, chunk_budget: int) -> tuple[str, list[str] | None]:
+  try:
+    data = json.loads(content)
+  except (json.JSONDecodeError, TypeError):
+    return "", None
+
+  header, chunks = "", []
+  if isinstance(data, dict):
+    list_key = next((key for key, value in data.items() if isinstance(value, list) and value), None)
+    if list_key is None:
+      return "", None
+    rest = {key: value for key, value in data.items() if key != list_key}
+    # Long fields beside the list are clipped like an item's, continued before the items
+    rest, overflow = _clip_fields(rest, chunk_budget)
+    header = _dumps({**rest, list_key: f"<{len(data[list_key])} items, one per line>"})
+    if estimate_tokens(header) > chunk_budget:
+      return "", None
+    for field, text in overflow:
+      chunks.extend(
+        _dumps({"field": field, "continued": piece})
+        for piece in _split_text(text, chunk_budget)
+      )
+    data = data[list_key]
+  if not isinstance(data, list):
+    return "", None
+
+  seen = set()
+  for index, item in enumerate(data):
+    text = _dumps(item)
+    key = _normalized(text)
+    if key in seen:
+      continue
+    seen.add(key)
+    if estimate_tokens(text) <= chunk_budget:
+      chunks.append(text)
+    else:
+      chunks.extend(_item_chunks(index, item, chunk_budget))
+  return header, chunks
+
+def _item_chunks(index: int, item, chunk_budget: int) -> list[str]:
+  """An oversized list item as chunks that each fit `chunk_budget`."""
+  if isinstance(item, dict):
+    clipped, overflow = _clip_fields(item, chunk_budget)
+    chunks = _split_text(_dumps(clipped), chunk_budget)
+    for field, rest in overflow:
+      chunks.extend(
+        _dumps({"item": index, "field": field, "continued": piece})
+        for piece in _split_text(rest, chunk_budget)
+      )
+    return chunks
+  if isinstance(item, str):
+    keep = _fit_prefix(item, max(chunk_budget - 10, 1))   # - the clip marker
+    chunks = [_dumps(item[:keep] + f"…[+{len(item) - keep} chars]")]
+    chunks.extend(
+      _dumps({"item": index, "continued": piece})
+      for piece in _split_text(item[keep:], chunk_budget)
+    )
+    return chunks
+  return _split_text(_dumps(item), chunk_budget)
+
+def _clip_fields(item: dict, chunk_budget: int) -> tuple[dict, list[tuple[str, str]]]:
+  """Clip the longest string fields until the item fits; returns (item, [(field, clipped rest)])."""
+  clipped, overflow = dict(item), []
+  for field in sorted(item, key=lambda key: -len(item[key]) if isinstance(item[key], str) else 0):
+    value = item[field]
+    if estimate_tokens(_dumps(clipped)) <= chunk_budget or not isinstance(value, str) or len(value) < MIN_CLIP_CHARS:
+      break
+    others = estimate_tokens(_dumps({**clipped, field: ""})) + 10   # + the clip marker
+    keep = _fit_prefix(value, chunk_budget - others) if chunk_budget > others else 0
+    clipped[field] = value[:keep] + f"…[+{len(value) - keep} chars]"
+    overflow.append((field, value[keep:]))
+  return clipped, overflow
+
+def _text_chunks(content: str, chunk_budget: int) -> list[str]:
+  if _SEPARATOR_RE.search(content):
+    blocks = _SEPARATOR_RE.split(content)
+  elif _RECORD_START_RE.search(content):
+    blocks = _RECORD_START_RE.split(content)
+  else:
+    blocks = _PARAGRAPH_RE.split(content)
+
+  chunks, seen = [], set()
+  for block in blocks:
+    key = _normalized(block)
+    if not key or key in seen:
+      continue
+    seen.add(key)
+    chunks.extend(_split_text(block.strip("\n"), chunk_budget))
+  return chunks
+
+def _split_text(text: str, chunk_budget: int) -> list[str]:
+  """Split on line boundaries (hard-cut only lines longer than the budget)."""
+  if estimate_tokens(text) <= chunk_budget:
+    return [text]
+  pieces, current, current_tokens = [], "", 0
+  for line in text.split("\n"):
+    while estimate_tokens(line) > chunk_budget:
+      if current:
+        pieces.append(current)
+        current, current_tokens = "", 0
+      cut = _fit_prefix(line, chunk_budget)
+      pieces.append(line[:cut])
+      line = line[cut:]
+    tokens = estimate_tokens(line) + 1
+    if current and current_tokens + tokens > chunk_budget:
+      pieces.append(current)
+      current, current_tokens = "", 0
+    current = f"{current}\n{line}" if current else line
+    current_tokens += tokens
+  if current:
+    pieces.append(current)
+  return pieces
+
+def _dumps(value) -> str:
+  return json.dumps(value, ensure_ascii=False, default=str)
+
+def _normalized(text: str) -> str:
+  return " ".join(text.lower().split())
+
+# -------------------------
+# Middleware + paging tool
+# -------------------------
+class ToolOutputBudget(AgentMiddleware):
+  """Shapes every tool result to its TOOL_OUTPUT budget before the model sees it."""
+
+  def _shape(self, request, result):
+    name = request.tool_call["name"]
+    if name == "read_more" or not isinstance(result, ToolMessage) or not isinstance(result.content, str):
+      return result
+    shaped = shape_output(name, result.content)
+    if shaped is result.content:
+      return result
+    return result.model_copy(update={"content": shaped})
+
+  def wrap_tool_call(self, request, handler):
+    return self._shape(request, handler(request))
+
+  async def awrap_tool_call(self, request, handler):
+    return self._shape(request, await handler(request))
+
+@tool
+def read_more(handle: str) -> str:
+  """
+  Show the next page of a tool result that was cut short.
+
+  Args:
+    handle: the handle from a "[more: ... read_more(handle=...)]" line
+  """
+  entry = page_store.pop(handle)
+  if entry is None:
+    return f"read_more error: unknown or already read handle {handle!r}"
+  tool_name, chunks, total = entry
+  return _page(tool_name, "", chunks, total, budget_for(tool_name))
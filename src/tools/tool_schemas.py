@@ -0,0 +1,160 @@
+import re
+import threading
+from langchain.agents.middleware import AgentMiddleware
+from langchain_core.tools import BaseTool
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from configs.settings_loader import settings
+from ..utils.tokens import estimate_json_tokens
+
+config = settings.get_tool_schema_config()
+COMPACT_ENABLED = config.get("compact", True)
+MAX_DESCRIPTION_CHARS = config.get("max_description_chars", 240)
+MAX_PARAM_CHARS = config.get("max_param_chars", 120)
+OVERRIDES = config.get("overrides", {}) or {}
+
+_SECTION_RE = re.compile(
+  r"^\s*(Args|Arguments|Parameters|Returns?|Raises|Examples?|Notes?|Best Practices)\s*:?\s*$"
+)
+_UNDERLINE_RE = re.compile(r"^\s*-{3,}\s*$")
+_GOOGLE_PARAM_RE = re.compile(r"^(\s*)(\w+)\s*(?:\([^)]*\))?\s*:\s*(.*)$")
+_NUMPY_PARAM_RE = re.compile(r"^(\s*)(\w+)\s+:\s*[^\n]*$")
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?])\s")
+
+# -------------------------
+# Docstring parsing
+# -------------------------
+def _summary(description: str) -> str:
+  """First paragraph of a docstring, before any section header."""
+  lines = []
+  for line in description.strip().splitlines():
+    if not line.strip() or _SECTION_RE.match(line):
+      break
+    lines.append(line.strip())
+  return _shorten(" ".join(lines), MAX_DESCRIPTION_CHARS)
+
+def _param_docs(description: str) -> dict[str, str]:
+  """name -> description from a Google ('Args:') or numpy ('Parameters') section."""
+  docs: dict[str, str] = {}
+  lines = description.splitlines()
+  in_params, current, indent = False, None, None
+  for line in lines:
+    header = _SECTION_RE.match(line)
+    if header:
+      in_params = header.group(1) in ("Args", "Arguments", "Parameters")
+      current, indent = None, None
+      continue
+    if not in_params or _UNDERLINE_RE.match(line) or not line.strip():
+      continue
+
+    line_indent = len(line) - len(line.lstrip())
+    if indent is None:
+      indent = line_indent
+    # numpy 'name : type' (space before the colon) / Google 'name (type): text'
+    numpy = _NUMPY_PARAM_RE.match(line)
+    google = _GOOGLE_PARAM_RE.match(line)
+    if line_indent == indent and numpy:
+      current = numpy.group(2)
+      docs[current] = ""
+    elif line_indent == indent and google:
+      current = google.group(2)
+      docs[current] = google.group(3).strip()
+    elif current is not None and line_indent > indent:
+      docs[current] = f"{docs[current]} {line.strip()}".strip()
+    elif line_indent < indent:
+      in_params = False
+  return {name: _shorten(text, MAX_PARAM_CHARS) for name, text in docs.items() if text}
+
+def _shorten(text: str, limit: int) -> str:
+  text = " ".join(text.split())
+  if len(text) <= limit:
+    return text
+  # Prefer a sentence boundary; otherwise cut at a word
+  cut = [match.start() for match in _SENTENCE_END_RE.finditer(text) if match.start() <= limit]
+  if cut and cut[-1] >= limit // 2:
+    return text[:cut[-1]]
+  return text[:limit].rsplit(" ", 1)[0] + "…"
+
+def _compact_property(schema: dict, doc: str | None) -> dict:
+  schema = {key: value for key, value in schema.items() if key != "title"}
+  # Optional[X] -> X (the parameter is simply not required)
+  options = schema.get("anyOf")
+  if options and len(options) == 2 and {"type": "null"} in options:
+    schema.pop("anyOf")
+    schema = {**next(option for option in options if option != {"type": "null"}), **schema}
+  if schema.get("default", 0) is None:
+    schema.pop("default")
+  if doc and "description" not in schema:
+    schema["description"] = doc
+  elif "description" in schema:
+    schema["description"] = _shorten(schema["description"], MAX_PARAM_CHARS)
+  return schema
+
+# -------------------------
+# Compiler
+# -------------------------
+def compile_tool_schema(tool: BaseTool) -> dict:
+  """
+  The schema the model sees for `tool`: the docstring's first paragraph as
+  description, one short line per parameter (from its Args / Parameters
+  section), no titles / null unions. TOOL_SCHEMAS.overrides take precedence.
+  The tool object (and its full docstring) is unchanged.
+  """
+  full = convert_to_openai_tool(tool)["function"]
+  override = OVERRIDES.get(tool.name, {}) or {}
+  param_docs = {**_param_docs(tool.description or ""), **(override.get("params") or {})}
+
+  parameters = dict(full.get("parameters") or {})
+  parameters.pop("title", None)
+  parameters.pop("description", None)
+  parameters["properties"] = {
+    name: _compact_property(schema, param_docs.get(name))
+    for name, schema in (parameters.get("properties") or {}).items()
+  }
+  return {
+    "type": "function",
+    "function": {
+      "name": tool.name,
+      "description": override.get("description") or _summary(tool.description or ""),
+      "parameters": parameters,
+    },
+  }
+
+_compiled: dict[tuple[str, tuple[str, ...]], dict[str, dict]] = {}
+_lock = threading.Lock()
+
+def compiled_schemas(agent_name: str, tools: list[BaseTool]) -> dict[str, dict]:
+  """tool name -> compact schema, rendered once per agent."""
+  key = (agent_name, tuple(tool.name for tool in tools))
+  with _lock:
+    if key not in _compiled:
+      _compiled[key] = {tool.name: compile_tool_schema(tool) for tool in tools}
+    return _compiled[key]
+
+def schema_report(agents: dict[str, list[BaseTool]]) -> dict[str, dict]:
+  """Per agent: tool-schema tokens sent on every model call, before / after compaction."""
+  report = {}
+  for agent_name, tools in agents.items():
+    before = sum(estimate_json_tokens(convert_to_openai_tool(tool)) for tool in tools)
+    after = sum(estimate_json_tokens(schema) for schema in compiled_schemas(agent_name, tools).values())
+    report[agent_name] = {"tools": len(tools), "before": before, "after": after}
+  return report
+
+class CompactToolSchemas(AgentMiddleware):
+  """Binds the compiled schemas instead of the full tool docstrings; execution still uses the tools."""
+
+  def __init__(self, agent_name: str, tools: list[BaseTool]):
+    super().__init__()
+    self.schemas = compiled_schemas(agent_name, tools)
+
+  def _compact(self, request):
+    tools = [
+      self.schemas.get(tool.name, tool) if isinstance(tool, BaseTool) else tool
+      for tool in request.tools
+    ]
+    return request.override(tools=tools)
+
+  def wrap_model_call(self, request, handler):
+    return handler(self._compact(request))
+
+  async def awrap_model_call(self, request, handler):
+    return await handler(self._compact(request))
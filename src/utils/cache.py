@@ -0,0 +1,233 @@
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Optional
+
+def make_key(*parts: Any) -> str:
+  """Stable cache key for any JSON-serializable parts (dict order does not matter)."""
+  raw = json.dumps(parts, sort_keys=True, default=str, ensure_ascii=False)
+  return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+# Pending LRU timestamps written to disk in one transaction
+TOUCH_FLUSH_SIZE = 64
+
+class TTLCache:
+  """
+  Thread-safe TTL cache with optional SQLite persistence and request coalescing.
+
+  - Entries live in memory; when `path` is set they are also written to disk
+    and lazily loaded back on a memory miss (survives restarts).
+  - `get_or_compute` / `aget_or_compute` coalesce concurrent calls for the
+    same key: only the first caller runs `compute`, the others wait for its
+    result.
+  - `max_entries` bounds the entries (least recently used are evicted
+    first), in memory and on disk. Hits only mark the entry in memory; their
+    timestamps are written to disk in one batch on the next `set`, or every
+    TOUCH_FLUSH_SIZE hits.
+  - Values must be JSON-serializable when persistence is enabled.
+  """
+
+  def __init__(self, path: Optional[str] = None, default_ttl: float = 3600, max_entries: Optional[int] = None):
+    self.default_ttl = default_ttl
+    self.max_entries = max_entries
+    self._memory: "OrderedDict[str, tuple[float, Any]]" = OrderedDict()
+    self._inflight: dict[str, Future] = {}
+    self._touched: dict[str, float] = {}
+    self._lock = threading.Lock()
+    self._db = None
+
+    if path:
+      os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+      self._db = sqlite3.connect(path, check_same_thread=False)
+      self._db.execute(
+        "CREATE TABLE IF NOT EXISTS cache ("
+        "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, "
+        "touched_at REAL NOT NULL DEFAULT 0)"
+      )
+      columns = {row[1] for row in self._db.execute("PRAGMA table_info(cache)")}
+      if "touched_at" not in columns:
+        # Files written before LRU support
+        self._db.execute("ALTER TABLE cache ADD COLUMN touched_at REAL NOT NULL DEFAULT 0")
+      self._db.execute("DELETE FROM cache WHERE expires_at <= ?", (time.time(),))
+      self._db.commit()
+
+  # -------------------------
+  # Basic operations
+  # -------------------------
+  def get(self, key: str) -> tuple[bool, Any]:
+    """Return (hit, value). Expired entries count as misses."""
+    now = time.time()
+    with self._lock:
+      entry = self._memory.get(key)
+      if entry is None and self._db is not None:
+        row = self._db.execute(
+          "SELECT value, expires_at FROM cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row:
+          entry = (row[1], json.loads(row[0]))
+          self._memory[key] = entry
+
+      if entry is None:
+        return False, None
+      if entry[0] <= now:
+        self._delete(key)
+        return False, None
+      self._touch(key, now)
+      return True, entry[1]
+
+  def set(self, key: str, value: Any, ttl: Optional[float] = None):
+    expires_at = time.time() + (self.default_ttl if ttl is None else ttl)
+    with self._lock:
+      self._memory[key] = (expires_at, value)
+      if self._db is not None:
+        self._touched.pop(key, None)
+        self._flush_touched()
+        self._db.execute(
+          "INSERT OR REPLACE INTO cache (key, value, expires_at, touched_at) VALUES (?, ?, ?, ?)",
+          (key, json.dumps(value, ensure_ascii=False), expires_at, time.time()),
+        )
+        self._db.commit()
+      self._touch(key, persist=False)
+      self._evict_persisted()
+
+  def flush(self):
+    """Write pending LRU timestamps to disk."""
+    with self._lock:
+      if self._db is not None and self._touched:
+        self._flush_touched()
+        self._db.commit()
+
+  def clear(self):
+    with self._lock:
+      self._memory.clear()
+      self._touched.clear()
+      if self._db is not None:
+        self._db.execute("DELETE FROM cache")
+        self._db.commit()
+
+  def _touch(self, key: str, now: Optional[float] = None, persist: bool = True):
+    # caller holds the lock: mark most recently used, evict beyond max_entries
+    self._memory.move_to_end(key)
+    if self.max_entries is None:
+      return
+    while len(self._memory) > self.max_entries:
+      self._memory.popitem(last=False)
+    if persist and self._db is not None:
+      # No disk write per hit (get() runs on the event loop in the async path)
+      self._touched[key] = now or time.time()
+      if len(self._touched) >= TOUCH_FLUSH_SIZE:
+        self._flush_touched()
+        self._db.commit()
+
+  def _flush_touched(self):
+    # caller holds the lock and commits
+    self._db.executemany(
+      "UPDATE cache SET touched_at = ? WHERE key = ?",
+      [(touched_at, key) for key, touched_at in self._touched.items()],
+    )
+    self._touched.clear()
+
+  def _evict_persisted(self):
+    # caller holds the lock
+    if self.max_entries is None or self._db is None:
+      return
+    self._db.execute(
+      "DELETE FROM cache WHERE key NOT IN "
+      "(SELECT key FROM cache ORDER BY touched_at DESC LIMIT ?)",
+      (self.max_entries,),
+    )
+    self._db.commit()
+
+  def _delete(self, key: str):
+    # caller holds the lock
+    self._memory.pop(key, None)
+    self._touched.pop(key, None)
+    if self._db is not None:
+      self._db.execute("DELETE FROM cache WHERE key = ?", (key,))
+      self._db.commit()
+
+  # -------------------------
+  # Coalesced compute
+  # -------------------------
+  def get_or_compute(
+    self,
+    key: str,
+    compute: Callable[[], Any],
+    ttl: Optional[float] = None,
+  ) -> Any:
+    """
+    Return the cached value, or run `compute` once and cache its result.
+    Exceptions are propagated to every waiting caller and never cached.
+    """
+    hit, value, future, is_leader = self._claim(key)
+    if hit:
+      return value
+    if not is_leader:
+      return future.result()
+
+    try:
+      value = compute()
+      self.set(key, value, ttl)
+      future.set_result(value)
+      return value
+    except BaseException as e:
+      future.set_exception(e)
+      raise
+    finally:
+      with self._lock:
+        self._inflight.pop(key, None)
+
+  async def aget_or_compute(
+    self,
+    key: str,
+    compute: Callable[[], Awaitable[Any]],
+    ttl: Optional[float] = None,
+  ) -> Any:
+    """
+    Async get_or_compute(): `compute` is a coroutine function. Shares the
+    in-flight table with the sync path, so threads and coroutines asking
+    for the same key still make one call.
+    """
+    hit, value, future, is_leader = self._claim(key)
+    if hit:
+      return value
+    if not is_leader:
+      # shield: a cancelled waiter must not cancel the shared future
+      return await asyncio.shield(asyncio.wrap_future(future))
+
+    try:
+      value = await compute()
+      self.set(key, value, ttl)
+      future.set_result(value)
+      return value
+    except BaseException as e:
+      future.set_exception(e)
+      raise
+    finally:
+      with self._lock:
+        self._inflight.pop(key, None)
+
+  def _claim(self, key: str) -> tuple[bool, Any, Optional[Future], bool]:
+    """(hit, value, in-flight future, is_leader): the leader computes, others wait on the future."""
+    hit, value = self.get(key)
+    if hit:
+      return True, value, None, False
+
+    with self._lock:
+      # A leader may have finished between the miss above and this lock
+      entry = self._memory.get(key)
+      if entry is not None and entry[0] > time.time():
+        return True, entry[1], None, False
+
+      future = self._inflight.get(key)
+      is_leader = future is None
+      if is_leader:
+        future = Future()
+        self._inflight[key] = future
+      return False, None, future, is_leader
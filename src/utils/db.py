@@ -0,0 +1,197 @@
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional, Sequence, Union
+
+# A migration step is a single SQL statement or a callable(conn)
+MigrationStep = Union[str, Callable[[sqlite3.Connection], None]]
+Migration = tuple[int, Sequence[MigrationStep]]
+
+# Applied to EVERY connection (ours and SQLAlchemy's)
+DEFAULT_PRAGMAS = {
+  "journal_mode": "WAL",      # readers never block the writer
+  "synchronous": "NORMAL",    # safe with WAL, far fewer fsyncs than FULL
+  "cache_size": -65536,       # negative = KiB -> 64 MiB page cache
+  "mmap_size": 268435456,     # 256 MiB memory-mapped reads
+  "temp_store": "MEMORY",
+  "busy_timeout": 5000,       # ms to wait on a locked database
+}
+
+class SQLiteManager:
+  """
+  Persistent, thread-local SQLite connections with tuned pragmas.
+
+  - One connection per thread, opened lazily and reused for every call
+    (no connect/close per tool call, no leaks on error paths).
+  - Connections run in autocommit mode; `transaction()` wraps writes in an
+    explicit BEGIN IMMEDIATE ... COMMIT/ROLLBACK. Nested `transaction()`
+    blocks join the outer one, so helpers can be composed freely.
+  - `cached_statements` keeps prepared statements per connection.
+  - `engine()` returns a SQLAlchemy engine whose pooled connections get the
+    same pragmas (used by SQLDatabase / the SQL toolkit).
+  - `migrate()` applies versioned schema migrations, tracked in
+    PRAGMA user_version.
+  - `data_version()` is a counter that moves whenever the data may have
+    changed (a committed write here, or a commit by another connection or
+    process), for use as a read-cache key.
+  """
+
+  def __init__(self, path: str, pragmas: Optional[dict] = None, cached_statements: int = 256):
+    self.path = path
+    self.pragmas = {**DEFAULT_PRAGMAS, **(pragmas or {})}
+    self.cached_statements = cached_statements
+
+    self._local = threading.local()
+    self._connections: list[sqlite3.Connection] = []
+    self._lock = threading.Lock()
+    self._engine = None
+    self._data_version = 0
+    self._watcher: Optional[sqlite3.Connection] = None
+    self._seen_version: Optional[int] = None
+
+  # -------------------------
+  # Connections
+  # -------------------------
+  def apply_pragmas(self, conn):
+    """Apply the configured pragmas to a raw DB-API connection."""
+    cursor = conn.cursor()
+    for name, value in self.pragmas.items():
+      cursor.execute(f"PRAGMA {name} = {value}")
+    cursor.close()
+
+  def _connect(self) -> sqlite3.Connection:
+    os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+    conn = sqlite3.connect(
+      self.path,
+      isolation_level=None,  # autocommit; transactions are explicit
+      cached_statements=self.cached_statements,
+      check_same_thread=False,  # only close_all() crosses threads
+    )
+    self.apply_pragmas(conn)
+    with self._lock:
+      self._connections.append(conn)
+    return conn
+
+  @property
+  def connection(self) -> sqlite3.Connection:
+    """This thread's persistent connection."""
+    conn = getattr(self._local, "conn", None)
+    if conn is None:
+      conn = self._connect()
+      self._local.conn = conn
+      self._local.depth = 0
+    return conn
+
+  @contextmanager
+  def transaction(self) -> Iterator[sqlite3.Connection]:
+    """
+    Write transaction on this thread's connection.
+    Commits on success, rolls back on any exception (then re-raises).
+    """
+    conn = self.connection
+    outermost = self._local.depth == 0
+    if outermost:
+      changes_before = conn.total_changes
+      # IMMEDIATE takes the write lock up front: no upgrade deadlocks
+      conn.execute("BEGIN IMMEDIATE")
+    self._local.depth += 1
+    try:
+      yield conn
+    except BaseException:
+      self._local.depth -= 1
+      if outermost:
+        conn.execute("ROLLBACK")
+      raise
+    else:
+      self._local.depth -= 1
+      if outermost:
+        conn.execute("COMMIT")
+        if conn.total_changes != changes_before:
+          self._bump_data_version()
+
+  # -------------------------
+  # Change tracking
+  # -------------------------
+  def _bump_data_version(self):
+    with self._lock:
+      self._data_version += 1
+
+  def data_version(self) -> int:
+    """
+    Current data version. Bumped after every committed write made through
+    `transaction()`; commits by any other connection (e.g. the import CLI
+    in another process) are picked up via PRAGMA data_version on a single
+    shared watcher connection.
+    """
+    if self._watcher is None:
+      watcher = self._connect()
+      with self._lock:
+        if self._watcher is None:
+          self._watcher = watcher
+    with self._lock:
+      seen = self._watcher.execute("PRAGMA data_version").fetchone()[0]
+      if seen != self._seen_version:
+        if self._seen_version is not None:
+          self._data_version += 1
+        self._seen_version = seen
+      return self._data_version
+
+  # -------------------------
+  # Schema migrations
+  # -------------------------
+  def schema_version(self) -> int:
+    return self.connection.execute("PRAGMA user_version").fetchone()[0]
+
+  def migrate(self, migrations: Sequence[Migration]) -> int:
+    """
+    Apply every migration newer than the current schema version, in order.
+    Each migration runs in its own transaction together with the version
+    bump, so a failure leaves the schema at the last good version.
+    Returns the resulting schema version.
+    """
+    for version, steps in sorted(migrations, key=lambda migration: migration[0]):
+      with self.transaction() as conn:
+        # Re-read under the write lock: another process may have migrated
+        if version <= conn.execute("PRAGMA user_version").fetchone()[0]:
+          continue
+        for step in steps:
+          if callable(step):
+            step(conn)
+          else:
+            conn.execute(step)
+        conn.execute(f"PRAGMA user_version = {int(version)}")
+
+    # Refresh planner statistics (cheap, only re-analyzes when useful)
+    self.connection.execute("PRAGMA optimize")
+    return self.schema_version()
+
+  def close_all(self):
+    """Close every connection opened by this manager (e.g. on shutdown)."""
+    with self._lock:
+      for conn in self._connections:
+        conn.close()
+      self._connections.clear()
+      self._watcher = None
+      self._seen_version = None
+    self._local = threading.local()
+    if self._engine is not None:
+      self._engine.dispose()
+      self._engine = None
+
+  # -------------------------
+  # SQLAlchemy (SQLDatabase)
+  # -------------------------
+  def engine(self):
+    """Shared SQLAlchemy engine; pooled connections get the same pragmas."""
+    if self._engine is None:
+      from sqlalchemy import create_engine, event
+
+      os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+      self._engine = create_engine(f"sqlite:///{self.path}")
+      event.listen(
+        self._engine,
+        "connect",
+        lambda dbapi_conn, _record: self.apply_pragmas(dbapi_conn),
+      )
+    return self._engine
@@ -1,87 +1,109 @@
 import re
+import html
 from langchain_core.documents import Document
 from langchain_community.document_loaders import (
   PyPDFLoader, Docx2txtLoader, TextLoader,
   UnstructuredPowerPointLoader, UnstructuredFileLoader
 )
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_ollama import OllamaEmbeddings
 from langchain_community.vectorstores import FAISS
+from ..managers.ollama_session import ollama_session
 import os
 import shutil
+import threading
 from datetime import datetime, timezone
 
+# Tags whose CONTENT is never readable text
+_SKIP_CONTENT_TAGS = ("style", "script", "noscript", "template")
+_SKIP_CLOSE_RE = {
+  tag: re.compile(rf"</{tag}\s*>", re.IGNORECASE)
+  for tag in _SKIP_CONTENT_TAGS
+}
+# `[^>]*` stops at the first '>', so a failed match never scans past it
+_TAG_RE = re.compile(r"<(/?)([a-zA-Z][^\s/>]*)[^>]*>")
+_DECL_RE = re.compile(r"<[!?][^>]*>")
+_BRACE_RE = re.compile(r"[{}]")
+_WHITESPACE_RE = re.compile(r"\s+")
+# Zero-width / soft-hyphen characters used as preheader padding in emails
+_INVISIBLE_CHARS = dict.fromkeys(map(ord, "\u200b\u200c\u200d\u2060\ufeff\u00ad\u034f"))
+
+def _strip_css_blocks(text: str) -> str:
+  """Drop anything between (possibly nested) braces in one linear scan."""
+  if "{" not in text:
+    return text
+
+  pieces = []
+  depth = 0
+  pos = 0
+  for match in _BRACE_RE.finditer(text):
+    if match.group() == "{":
+      if depth == 0:
+        pieces.append(text[pos:match.start()])
+        pos = match.start()
+      depth += 1
+    elif depth:
+      depth -= 1
+      if depth == 0:
+        pos = match.end()
+  # Unbalanced '{' (":-{" in plain text) is not a block: keep the rest as is
+  pieces.append(text[pos:])
+  return " ".join(pieces)
+
 def clean_html_content(html_text: str) -> str:
   """
   Thoroughly clean HTML content to extract only readable text.
   Removes: HTML tags, CSS styles, JavaScript, comments, etc.
+
+  Single left-to-right tokenizing pass (str.find + anchored regex matches),
+  so the cost is linear in the input size even on large marketing emails.
   """
   if not html_text:
       return ""
-  
-  # First decode HTML entities
-  import html
-  text = html.unescape(html_text)
-  
-  # Remove CSS content (style tags and inline style attributes)
-  # Remove <style> tags and their content
-  text = re.sub(r'<style[^>]*>.*?</style>', '', text, flags=re.DOTALL | re.IGNORECASE)
-  
-  # Remove inline style attributes
-  text = re.sub(r'style="[^"]*"', '', text, flags=re.IGNORECASE)
-  text = re.sub(r"style='[^']*'", '', text, flags=re.IGNORECASE)
-  
-  # Remove script tags and their content
-  text = re.sub(r'<script[^>]*>.*?</script>', '', text, flags=re.DOTALL | re.IGNORECASE)
-  
-  # Remove HTML comments
-  text = re.sub(r'<!--.*?-->', '', text, flags=re.DOTALL)
-  
-  # Remove all other HTML tags but preserve text content
-  text = re.sub(r'<[^>]+>', ' ', text)
-  
-  # Remove CSS block patterns (content between { and })
-  text = re.sub(r'\{[^}]*\}', '', text)
-  
-  # Remove common CSS selectors that might appear in email body
-  css_selectors = [
-      r'\.\w+\s*{[^}]*}',
-      r'#\w+\s*{[^}]*}',
-      r'@media[^{]+\{[^}]*\}',
-      r'@font-face[^{]+\{[^}]*\}',
-      r'body\s*{[^}]*}',
-      r'div\s*{[^}]*}',
-      r'span\s*{[^}]*}',
-      r'p\s*{[^}]*}',
-      r'a\s*{[^}]*}',
-      r'table\s*{[^}]*}',
-      r'tr\s*{[^}]*}',
-      r'td\s*{[^}]*}',
-      r'th\s*{[^}]*}',
-  ]
-  for pattern in css_selectors:
-      text = re.sub(pattern, '', text, flags=re.DOTALL | re.IGNORECASE)
-  
-  # Remove multiple spaces, newlines, tabs
-  text = re.sub(r'\s+', ' ', text)
-  
-  # Remove common email artifacts
-  text = re.sub(r'&nbsp;', ' ', text)
-  text = re.sub(r'&zwnj;', '', text)
-  text = re.sub(r'&amp;', '&', text)
-  text = re.sub(r'&lt;', '<', text)
-  text = re.sub(r'&gt;', '>', text)
-  text = re.sub(r'&quot;', '"', text)
-  text = re.sub(r'&#39;', "'", text)
-  text = re.sub(r'&#\d+;', '', text)  # Remove numeric entities
-  
-  # Remove URLs (optional, but keeps text cleaner)
-  # text = re.sub(r'https?://\S+', '', text)
-  
-  # Clean up whitespace again
-  text = re.sub(r'\s+', ' ', text).strip()
-  
-  return text
+
+  text = html_text
+  size = len(text)
+  # No '<' after the last '>' can start a real tag
+  last_gt = text.rfind(">")
+
+  pieces = []
+  pos = 0
+  while pos < size:
+    lt = text.find("<", pos)
+    if lt < 0 or lt > last_gt:
+      pieces.append(text[pos:])
+      break
+    if lt > pos:
+      pieces.append(text[pos:lt])
+
+    # Comments (including conditional comments)
+    if text.startswith("<!--", lt):
+      end = text.find("-->", lt + 4)
+      pos = size if end < 0 else end + 3
+      pieces.append(" ")
+      continue
+
+    tag = _TAG_RE.match(text, lt)
+    if tag is None:
+      decl = _DECL_RE.match(text, lt)  # <!DOCTYPE ...>, <?xml ...?>
+      if decl is None:
+        pieces.append("<")
+        pos = lt + 1
+      else:
+        pos = decl.end()
+      continue
+
+    pos = tag.end()
+    name = tag.group(2).lower()
+    if not tag.group(1) and name in _SKIP_CONTENT_TAGS:
+      close = _SKIP_CLOSE_RE[name].search(text, pos)
+      pos = size if close is None else close.end()
+    pieces.append(" ")
+
+  # Entities are decoded AFTER tag removal so "&lt;b&gt;" stays literal text
+  text = html.unescape("".join(pieces))
+  text = _strip_css_blocks(text).translate(_INVISIBLE_CHARS)
+
+  return _WHITESPACE_RE.sub(" ", text).strip()
 
 
 # ----------------------------------------------------------
@@ -110,6 +132,8 @@ def get_loader(file_path: str):
   else:
     return UnstructuredFileLoader(file_path) # handles images, etc. with OCR if Tesseract installed
   
+_ingest_locks: dict[str, threading.Lock] = {}
+
 def ingest_documents_generic(
   documents: list[Document],
   vectorstore_path: str,
@@ -119,19 +143,21 @@ def ingest_documents_generic(
     # print("No documents to ingest.")
     return
 
-  embeddings = OllamaEmbeddings(model="nomic-embed-text")
+  embeddings = ollama_session.embeddings()
 
-  if os.path.exists(index_file):
-    vectorstore = FAISS.load_local(
-      vectorstore_path,
-      embeddings,
-      allow_dangerous_deserialization=True
-    )
-    vectorstore.add_documents(documents)
-  else:
-    vectorstore = FAISS.from_documents(documents, embeddings)
+  # load -> add -> save must not interleave (tasks finish concurrently)
+  with _ingest_locks.setdefault(vectorstore_path, threading.Lock()):
+    if os.path.exists(index_file):
+      vectorstore = FAISS.load_local(
+        vectorstore_path,
+        embeddings,
+        allow_dangerous_deserialization=True
+      )
+      vectorstore.add_documents(documents)
+    else:
+      vectorstore = FAISS.from_documents(documents, embeddings)
 
-  vectorstore.save_local(vectorstore_path)
+    vectorstore.save_local(vectorstore_path)
 
 def ingest_professor_documents():
   raw_docs = []
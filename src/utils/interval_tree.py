@@ -0,0 +1,65 @@
+from typing import Any, Iterable, List, Tuple
+
+Interval = Tuple[Any, Any, Any]  # (start, end, payload)
+
+class IntervalTree:
+  """
+  Static, augmented interval tree.
+
+  Intervals are sorted by start and laid out as an implicit balanced BST
+  (the middle of every range is the node). Each node also stores the max
+  end of its subtree, so whole subtrees that end before the query window
+  are skipped.
+
+  - build: O(n log n)
+  - overlap query: O(log n + k)
+
+  Intervals are half-open [start, end): touching intervals do NOT overlap.
+  Works with any comparable endpoints (datetimes, ints, ...).
+  """
+
+  def __init__(self, intervals: Iterable[Interval]):
+    self._items: List[Interval] = sorted(intervals, key=lambda item: (item[0], item[1]))
+    self._max_end: List[Any] = [None] * len(self._items)
+    if self._items:
+      self._build(0, len(self._items) - 1)
+
+  def __len__(self) -> int:
+    return len(self._items)
+
+  def _build(self, lo: int, hi: int):
+    mid = (lo + hi) // 2
+    max_end = self._items[mid][1]
+    if lo < mid:
+      max_end = max(max_end, self._build(lo, mid - 1))
+    if mid < hi:
+      max_end = max(max_end, self._build(mid + 1, hi))
+    self._max_end[mid] = max_end
+    return max_end
+
+  def overlapping(self, start, end) -> List[Interval]:
+    """Return every interval overlapping [start, end), ordered by start."""
+    found: List[Interval] = []
+    if self._items:
+      self._query(0, len(self._items) - 1, start, end, found)
+    return found
+
+  def _query(self, lo: int, hi: int, start, end, found: List[Interval]):
+    if lo > hi:
+      return
+    mid = (lo + hi) // 2
+
+    # Nothing in this subtree ends after the window starts
+    if self._max_end[mid] <= start:
+      return
+
+    self._query(lo, mid - 1, start, end, found)
+
+    item_start, item_end, _ = self._items[mid]
+    # Right subtree only holds later starts — prune once past the window
+    if item_start >= end:
+      return
+    if item_end > start:
+      found.append(self._items[mid])
+
+    self._query(mid + 1, hi, start, end, found)
@@ -0,0 +1,131 @@
+import json
+import re
+from typing import Any, Callable, Optional
+
+_FENCE_RE = re.compile(r"```(?:json|JSON)?\s*(.*?)(?:```|$)", re.DOTALL)
+_LITERALS = {"True": "true", "False": "false", "None": "null", "true": "true", "false": "false", "null": "null"}
+_CLOSERS = {"{": "}", "[": "]"}
+MAX_START_CANDIDATES = 20
+
+def repair_json(text: str, accept: Optional[Callable[[Any], bool]] = None) -> Optional[Any]:
+  """
+  Best-effort parse of model output that is *almost* JSON:
+  - code fences and prose around the JSON
+  - trailing commas, single-quoted strings, Python True/False/None, bare keys
+  - truncated output: cut back to the last complete value, then closed
+  `accept` rejects candidates that parse but are not what the caller wants
+  (e.g. a bracketed word in the prose before the real object).
+  Returns the parsed value, or None if nothing could be recovered.
+  """
+  if not text:
+    return None
+  accept = accept or (lambda value: True)
+  try:
+    value = json.loads(text)
+    if accept(value):
+      return value
+  except json.JSONDecodeError:
+    pass
+
+  fenced = _FENCE_RE.search(text)
+  body = fenced.group(1) if fenced else text
+
+  # Try from each '{' / '[' in turn (prose may contain either)
+  starts = [match.start() for match in re.finditer(r"[\[{]", body)][:MAX_START_CANDIDATES]
+  for start in starts:
+    try:
+      value = json.loads(_normalize(body[start:]))
+    except json.JSONDecodeError:
+      continue
+    if accept(value):
+      return value
+  return None
+
+def _read_string(text: str, start: int) -> tuple[str, int, bool]:
+  """Read a '...' or "..." string at `start`; returns (json_string, next_index, closed)."""
+  quote = text[start]
+  parts = []
+  index = start + 1
+  while index < len(text):
+    char = text[index]
+    if char == "\\" and index + 1 < len(text):
+      following = text[index + 1]
+      parts.append("'" if quote == "'" and following == "'" else char + following)
+      index += 2
+      continue
+    if char == quote:
+      return '"' + "".join(parts) + '"', index + 1, True
+    if char == '"':
+      parts.append('\\"')      # only reachable inside a single-quoted string
+    elif char == "\n":
+      parts.append("\\n")
+    elif char == "\t":
+      parts.append("\\t")
+    else:
+      parts.append(char)
+    index += 1
+  return '"' + "".join(parts) + '"', index, False
+
+def _normalize(text: str) -> str:
+  """Re-emit `text` (starting at '{' or '[') as strict JSON, token by token."""
+  tokens: list[str] = []
+  stack: list[str] = []
+  checkpoint = (0, [])   # (token count, open brackets) after the last complete value
+  index = 0
+  truncated = True
+
+  while index < len(text):
+    char = text[index]
+
+    if char in "\"'":
+      token, index, closed = _read_string(text, index)
+      tokens.append(token)
+      if not closed:
+        break
+      continue
+
+    if char in "{[":
+      stack.append(char)
+      tokens.append(char)
+      checkpoint = (len(tokens), list(stack))
+    elif char in "}]":
+      if not stack:
+        truncated = False
+        break
+      if tokens and tokens[-1] == ",":
+        tokens.pop()     # trailing comma
+      tokens.append(_CLOSERS[stack.pop()])
+      checkpoint = (len(tokens), list(stack))
+      if not stack:
+        truncated = False
+        break            # ignore any prose after the JSON
+    elif char == ",":
+      if tokens and tokens[-1] not in ("{", "[", ","):
+        checkpoint = (len(tokens), list(stack))
+        tokens.append(",")
+    elif char == ":":
+      tokens.append(":")
+    elif char.isalpha() or char == "_":
+      match = re.match(r"[A-Za-z_][A-Za-z0-9_]*", text[index:])
+      word = match.group()
+      # Bare words: literals, or unquoted keys
+      tokens.append(_LITERALS.get(word, json.dumps(word)))
+      index += len(word)
+      continue
+    elif char in "-+.0123456789eE":
+      match = re.match(r"[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?", text[index:])
+      if match:
+        tokens.append(match.group().lstrip("+"))
+        index += len(match.group())
+        continue
+    index += 1
+
+  if truncated and stack:
+    # Drop the unfinished tail, then close whatever is still open
+    count, open_brackets = checkpoint
+    tokens = tokens[:count]
+    if tokens and tokens[-1] == ",":
+      tokens.pop()
+    tokens.extend(_CLOSERS[bracket] for bracket in reversed(open_brackets))
+
+  return "".join(tokens)
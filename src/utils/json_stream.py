@@ -0,0 +1,101 @@
+import json
+from typing import Optional
+
+class TaskStreamParser:
+  """
+  Incremental parser for a streamed plan: {"tasks": [ {...}, {...}, ... ]}.
+
+  `feed(chunk)` returns every task object completed so far as
+  (task_dict, is_last). A task is emitted once the character after its
+  closing brace is seen: ',' -> more tasks follow, ']' -> it is the last one.
+  `finish()` flushes a task left pending by a truncated stream.
+
+  Any malformed task object sets `failed` and stops emission; the caller
+  falls back to parsing the complete text.
+  """
+
+  def __init__(self, key: str = "tasks"):
+    self.key = key
+    self.failed = False
+    self.done = False
+
+    self._text = ""
+    self._pos = 0
+    self._depth = 0
+    self._in_string = False
+    self._escape = False
+    self._string_start = None
+    self._last_string = None     # most recent complete string (candidate key)
+    self._array_depth = None     # depth inside the tasks array
+    self._object_start = None
+    self._pending: Optional[dict] = None
+
+  def feed(self, chunk: str) -> list[tuple[dict, bool]]:
+    self._text += chunk
+    emitted = []
+    if self.failed or self.done:
+      return emitted
+
+    text = self._text
+    while self._pos < len(text):
+      char = text[self._pos]
+
+      if self._in_string:
+        if self._escape:
+          self._escape = False
+        elif char == "\\":
+          self._escape = True
+        elif char == '"':
+          self._in_string = False
+          self._last_string = text[self._string_start + 1:self._pos]
+        self._pos += 1
+        continue
+
+      if self._pending is not None and not char.isspace():
+        # The delimiter after a task decides whether it was the last one
+        emitted.append((self._pending, char != ","))
+        self._pending = None
+        if char != ",":
+          self.done = True
+          return emitted
+
+      if char == '"':
+        self._in_string = True
+        self._string_start = self._pos
+      elif char in "{[":
+        if (
+          char == "[" and self._array_depth is None
+          and (self._depth == 0 or (self._depth == 1 and self._last_string == self.key))
+        ):
+          self._array_depth = self._depth + 1
+        elif char == "{" and self._array_depth is not None and self._depth == self._array_depth:
+          self._object_start = self._pos
+        self._depth += 1
+      elif char in "}]":
+        self._depth -= 1
+        if char == "}" and self._object_start is not None and self._depth == self._array_depth:
+          try:
+            self._pending = json.loads(text[self._object_start:self._pos + 1])
+          except json.JSONDecodeError:
+            self.failed = True
+            return emitted
+          self._object_start = None
+        elif char == "]" and self._array_depth is not None and self._depth == self._array_depth - 1:
+          self.done = True
+          return emitted
+      self._pos += 1
+
+    return emitted
+
+  def finish(self) -> list[tuple[dict, bool]]:
+    """End of stream: a task still waiting for its delimiter is the last one."""
+    if self._pending is not None and not self.failed:
+      pending, self._pending = self._pending, None
+      self.done = True
+      return [(pending, True)]
+    return []
+
+  @property
+  def text(self) -> str:
+    """Everything fed so far (for a full-text fallback parse)."""
+    return self._text
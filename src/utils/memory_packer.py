@@ -0,0 +1,98 @@
+import math
+import re
+from configs.settings_loader import settings
+from .prompt import stable_json
+from .tokens import estimate_json_tokens
+
+_WORD_RE = re.compile(r"[a-z0-9]{3,}")
+_STOP_WORDS = {
+  "the", "and", "for", "with", "that", "this", "from", "into", "about", "what",
+  "please", "can", "you", "your", "are", "was", "were", "has", "have", "will",
+  "all", "any", "out", "use", "using", "then", "them", "they", "user", "task",
+}
+
+class MemoryPacker:
+  """
+  Packs past turns into a fixed token budget.
+
+  Every entry is clipped the same way, regardless of how long the original
+  was: `request_chars` for the request, `summary_chars` per summary, and at
+  most `max_tasks` summaries (the earliest ones).
+  Then entries are ranked by
+    recency_weight * recency_decay ** age + relevance_weight * overlap(query)
+  and added best-first while they fit in `budget_tokens`. The chosen ones
+  are emitted oldest-first as compact JSON, plus a count of omitted turns.
+  """
+
+  def __init__(self, config: dict | None = None):
+    config = config if config is not None else settings.get_state_memory_config()
+    self.budget_tokens = config.get("budget_tokens", 1024)
+    self.candidates = config.get("candidates", 20)
+    self.request_chars = config.get("request_chars", 200)
+    self.summary_chars = config.get("summary_chars", 300)
+    self.max_tasks = config.get("max_tasks", 4)
+    self.recency_weight = config.get("recency_weight", 0.5)
+    self.relevance_weight = config.get("relevance_weight", 0.5)
+    self.recency_decay = config.get("recency_decay", 0.7)
+
+  def pack(self, entries: list[dict], query: str = "", context: dict | None = None) -> str:
+    """
+    entries: newest first, {"user_request": str, "task_outputs": [{"agent", "summary"}]}
+    context: always included (e.g. the clock), after the memory.
+    """
+    context = context or {}
+    clipped = [self._clip_entry(entry) for entry in entries[:self.candidates]]
+    query_words = _words(query)
+
+    ranked = sorted(
+      range(len(clipped)),
+      key=lambda age: (-self._score(clipped[age], age, query_words), age),
+    )
+
+    budget = self.budget_tokens - estimate_json_tokens(context)
+    chosen = []
+    for age in ranked:
+      cost = estimate_json_tokens(clipped[age])
+      if cost <= budget:
+        chosen.append(age)
+        budget -= cost
+
+    memory = {}
+    if chosen:
+      # Oldest first (see PromptBuilder: older turns stay a stable prefix)
+      memory["state_memory"] = [clipped[age] for age in sorted(chosen, reverse=True)]
+    if len(chosen) < len(entries):
+      memory["omitted_turns"] = len(entries) - len(chosen)
+    return stable_json({**memory, **context}, indent=None)
+
+  # -------------------------
+  # Helpers
+  # -------------------------
+  def _clip_entry(self, entry: dict) -> dict:
+    clipped = {"user_request": _clip(entry.get("user_request", ""), self.request_chars)}
+    outputs = entry.get("task_outputs") or []
+    if outputs:
+      clipped["task_outputs"] = [
+        {"agent": output.get("agent"), "summary": _clip(output.get("summary") or "", self.summary_chars)}
+        for output in outputs[:self.max_tasks]
+      ]
+    return clipped
+
+  def _score(self, entry: dict, age: int, query_words: set[str]) -> float:
+    recency = self.recency_decay ** age
+    relevance = 0.0
+    if query_words:
+      text = " ".join([entry["user_request"], *(task["summary"] for task in entry.get("task_outputs", []))])
+      words = _words(text)
+      if words:
+        relevance = len(query_words & words) / math.sqrt(len(query_words) * len(words))
+    return self.recency_weight * recency + self.relevance_weight * relevance
+
+def _words(text: str) -> set[str]:
+  return {word for word in _WORD_RE.findall(text.lower()) if word not in _STOP_WORDS}
+
+def _clip(text: str, chars: int) -> str:
+  text = " ".join(text.split())
+  if len(text) <= chars:
+    return text
+  return text[:chars - 1].rstrip() + "…"
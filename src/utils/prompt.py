@@ -0,0 +1,55 @@
+import json
+from datetime import datetime
+from typing import NamedTuple
+
+# Stability tiers, most stable first. Ollama reuses the KV cache for the
+# longest prefix shared with the previous request, so a prompt should only
+# change as late as possible.
+STATIC = 0    # identical on every call (rules, formats)
+TURN = 1      # changes between turns (state memory, rounded clock)
+CALL = 2      # changes on every call (the request / instruction)
+
+class PromptSegment(NamedTuple):
+  tier: int
+  title: str
+  body: str
+
+class PromptBuilder:
+  """
+  Assembles the user message from segments, ordered STATIC -> TURN -> CALL
+  (insertion order within a tier). The system prompt and tool schemas come
+  before all of it in Ollama's chat template.
+  """
+
+  def __init__(self):
+    self._segments: list[PromptSegment] = []
+
+  def add(self, tier: int, title: str, body: str) -> "PromptBuilder":
+    self._segments.append(PromptSegment(tier, title, body))
+    return self
+
+  def build(self) -> str:
+    parts = []
+    for segment in sorted(self._segments, key=lambda segment: segment.tier):
+      body = _normalize(segment.body)
+      parts.append(f"{segment.title}\n{body}" if segment.title else body)
+    return "\n\n".join(parts) + "\n"
+
+def stable_json(value, indent: int | None = 2) -> str:
+  """Deterministic JSON: fixed separators, raw unicode, no trailing spaces."""
+  return json.dumps(
+    value,
+    ensure_ascii=False,
+    indent=indent,
+    separators=(",", ": ") if indent is not None else (",", ":"),
+    default=str,
+  )
+
+def rounded_now(minutes: int = 15) -> datetime:
+  """Local time rounded down to `minutes`: the clock changes a few times an hour, not every call."""
+  now = datetime.now().astimezone()
+  return now.replace(minute=now.minute - now.minute % minutes, second=0, microsecond=0)
+
+def _normalize(text: str) -> str:
+  lines = text.replace("\r\n", "\n").split("\n")
+  return "\n".join(line.rstrip() for line in lines).strip("\n")
@@ -0,0 +1,18 @@
+import json
+import math
+
+# qwen2.5 / llama-style BPE: ~4 characters per token for English and code,
+# roughly one token per CJK character. 3.5 errs on the side of overestimating.
+ASCII_CHARS_PER_TOKEN = 3.5
+
+def estimate_tokens(text: str) -> int:
+  """Tokenizer-free token estimate, biased high (an undersized window truncates the prompt)."""
+  if not text:
+    return 0
+  # Non-ASCII characters take 2-4 UTF-8 bytes; count each as ~1 token
+  non_ascii = (len(text.encode("utf-8")) - len(text)) // 2
+  ascii_chars = max(len(text) - non_ascii, 0)
+  return math.ceil(ascii_chars / ASCII_CHARS_PER_TOKEN) + non_ascii
+
+def estimate_json_tokens(value) -> int:
+  return estimate_tokens(json.dumps(value, ensure_ascii=False, separators=(",", ":")))
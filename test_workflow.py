@@ -1,7 +1,10 @@
 from src.managers.workflow_manager import WorkflowManager
 from src.agents.registry import AGENT_REGISTRY
 from src.utils.helper import ingest_professor_documents, clear_memory_vdb
+from src.managers.ollama_session import ollama_session
+import asyncio
 import shutil
+import sys
 
 def hybrid_agent_runner(agent_name: str, input_text: str, stream: bool = False):
   agent = AGENT_REGISTRY.get(agent_name)
@@ -25,11 +28,47 @@ def hybrid_agent_runner(agent_name: str, input_text: str, stream: bool = False):
     else:
       return result 
 
+def async_hybrid_agent_runner(agent_name: str, input_text: str, stream: bool = False):
+  """Async counterpart: an async iterator of chunks (stream) or an awaitable string."""
+  agent = AGENT_REGISTRY.get(agent_name)
+
+  if not agent:
+    mock_output = f"[MOCK OUTPUT from {agent_name}]"
+    if stream:
+      async def mock_stream():
+        for char in mock_output:
+          yield char
+      return mock_stream()
+    async def mock_run():
+      return mock_output
+    return mock_run()
+
+  return agent.astream(input_text) if stream else agent.arun(input_text)
+
+async def async_main(manager: WorkflowManager):
+  # One event loop for the whole session (the HTTP pools are bound to it)
+  while True:
+    print("| User 🤡 >", end=" ", flush=True)
+    user_request = (await asyncio.to_thread(input)).strip()
+    print("|", "-" * (shutil.get_terminal_size().columns - 2))
+    if user_request.lower() == "exit":
+      print("Exiting Second Brain OS. Goodbye!")
+      break
+    if user_request:
+      await manager.arun(user_request)
+
 if __name__ == "__main__":
+  ollama_session.start()  # pre-warm models while documents are ingested
   clear_memory_vdb()
   ingest_professor_documents()
-  manager = WorkflowManager(agent_runner=hybrid_agent_runner)
+  manager = WorkflowManager(
+    agent_runner=hybrid_agent_runner,
+    async_agent_runner=async_hybrid_agent_runner,
+  )
   print("Second Brain OS 🧠 (type 'exit' to quit)\n")
+  if "--async" in sys.argv:
+    asyncio.run(async_main(manager))
+    sys.exit(0)
   while True:
     print("| User 🤡 >", end=" ")
     user_request = input().strip()
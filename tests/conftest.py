@@ -0,0 +1,5 @@
+import os
+import tempfile
+
+# src.tools.sqlite opens (and migrates) the ledger on import: keep it out of data/
+os.environ.setdefault("ACCOUNTANT_DB_PATH", os.path.join(tempfile.mkdtemp(), "accountant.db"))
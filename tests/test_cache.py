@@ -0,0 +1,89 @@
+import asyncio
+import threading
+import time
+
+from src.utils.cache import TTLCache
+
+
+def test_aget_or_compute_coalesces_concurrent_calls():
+  cache = TTLCache()
+  calls = []
+
+  async def compute():
+    calls.append(1)
+    await asyncio.sleep(0.05)
+    return "value"
+
+  async def main():
+    return await asyncio.gather(*(cache.aget_or_compute("k", compute) for _ in range(5)))
+
+  assert asyncio.run(main()) == ["value"] * 5
+  assert len(calls) == 1
+
+
+def test_async_waits_for_sync_leader():
+  cache = TTLCache()
+  started = threading.Event()
+
+  def compute():
+    started.set()
+    time.sleep(0.1)
+    return "sync"
+
+  async def never():
+    raise AssertionError("the in-flight sync call must be reused")
+
+  thread = threading.Thread(target=cache.get_or_compute, args=("k", compute))
+  thread.start()
+  started.wait()
+  assert asyncio.run(cache.aget_or_compute("k", never)) == "sync"
+  thread.join()
+
+
+def test_exceptions_not_cached():
+  cache = TTLCache()
+
+  async def fail():
+    raise RuntimeError("boom")
+
+  async def ok():
+    return 1
+
+  async def main():
+    try:
+      await cache.aget_or_compute("k", fail)
+    except RuntimeError:
+      pass
+    return await cache.aget_or_compute("k", ok)
+
+  assert asyncio.run(main()) == 1
+
+
+def test_hits_do_not_write_until_flushed(tmp_path):
+  cache = TTLCache(path=str(tmp_path / "cache.sqlite"), max_entries=2)
+  cache.set("a", 1)
+  cache.set("b", 2)
+  changes = cache._db.total_changes
+
+  for _ in range(10):
+    assert cache.get("a") == (True, 1)
+  assert cache._db.total_changes == changes
+
+  # The pending hit on "a" is written before "c" evicts the least recently used
+  cache.set("c", 3)
+  keys = {row[0] for row in cache._db.execute("SELECT key FROM cache")}
+  assert keys == {"a", "c"}
+
+
+def test_flush_persists_lru_order(tmp_path):
+  path = str(tmp_path / "cache.sqlite")
+  cache = TTLCache(path=path, max_entries=2)
+  cache.set("a", 1)
+  cache.set("b", 2)
+  cache.get("a")
+  cache.flush()
+
+  reopened = TTLCache(path=path, max_entries=2)
+  reopened.set("c", 3)
+  assert reopened.get("a") == (True, 1)
+  assert reopened.get("b") == (False, None)
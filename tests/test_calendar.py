@@ -0,0 +1,137 @@
+from unittest import mock
+
+import src.tools.calendar as cal
+
+
+def _service(event: dict | None = None) -> mock.MagicMock:
+  service = mock.MagicMock()
+  service.events().get().execute.return_value = event
+  service.events().patch().execute.return_value = {"summary": "Standup"}
+  return service
+
+
+def _patch_body(service) -> dict:
+  return service.events().patch.call_args.kwargs["body"]
+
+
+def test_event_time_clears_the_other_kind():
+  # PATCH merges nested objects: the old kind must be sent as null
+  assert cal._event_time("2026-01-12T10:00:00") == {
+    "dateTime": "2026-01-12T02:00:00Z", "timeZone": "UTC", "date": None,
+  }
+  assert cal._event_time("2026-01-12") == {"date": "2026-01-12", "dateTime": None, "timeZone": None}
+
+
+def test_moving_the_start_keeps_the_duration():
+  event = {"start": {"dateTime": "2026-01-12T02:00:00Z"}, "end": {"dateTime": "2026-01-12T03:30:00Z"}}
+  service = _service(event)
+  with mock.patch.object(cal, "get_creds"), mock.patch.object(cal, "build", return_value=service):
+    result = cal.update_calendar_event.invoke({"event_id": "e1", "start_time": "2026-01-12T15:00:00"})
+
+  assert result.startswith("Event updated successfully!")
+  assert _patch_body(service)["end"]["dateTime"] == "2026-01-12T08:30:00Z"
+
+
+def test_all_day_start_moves_the_end_date():
+  event = {"start": {"date": "2026-01-12"}, "end": {"date": "2026-01-14"}}
+  service = _service(event)
+  with mock.patch.object(cal, "get_creds"), mock.patch.object(cal, "build", return_value=service):
+    cal.update_calendar_event.invoke({"event_id": "e1", "start_time": "2026-01-20"})
+
+  assert _patch_body(service)["end"] == {"date": "2026-01-22", "dateTime": None, "timeZone": None}
+
+
+def test_explicit_end_skips_the_get():
+  service = _service()
+  with mock.patch.object(cal, "get_creds"), mock.patch.object(cal, "build", return_value=service):
+    cal.update_calendar_event.invoke({"event_id": "e1", "summary": "Standup"})
+    cal.update_calendar_event.invoke(
+      {"event_id": "e1", "start_time": "2026-01-12T15:00:00", "end_time": "2026-01-12T16:00:00"}
+    )
+
+  service.events().get().execute.assert_not_called()
+
+
+def test_batch_update_shifts_moved_events():
+  event = {"start": {"dateTime": "2026-01-12T02:00:00Z"}, "end": {"dateTime": "2026-01-12T03:00:00Z"}}
+  service = _service()
+  batches = []
+
+  def execute_batch(service, requests):
+    batches.append(requests)
+    return [(event, None)] * len(requests) if len(batches) == 1 else [({"id": "e1"}, None)] * len(requests)
+
+  with mock.patch.object(cal, "get_creds"), mock.patch.object(cal, "build", return_value=service), \
+      mock.patch.object(cal, "_execute_batch", side_effect=execute_batch):
+    report = cal.batch_update_calendar_events.invoke(
+      {"updates": [{"event_id": "e1", "start_time": "2026-01-13T09:00:00"}, {"event_id": "e2", "summary": "x"}]}
+    )
+
+  assert report.startswith("Batch update: 2/2 succeeded")
+  assert [len(requests) for requests in batches] == [1, 2]
+  bodies = [call.kwargs["body"] for call in service.events().patch.call_args_list if "body" in call.kwargs]
+  assert bodies[0]["end"]["dateTime"] == "2026-01-13T02:00:00Z"
+
+
+def _free_slots(busy: list[dict], **args) -> str:
+  service = mock.MagicMock()
+  service.freebusy().query().execute.return_value = {"calendars": {"primary": {"busy": busy}}}
+  with mock.patch.object(cal, "get_creds"), mock.patch.object(cal, "build", return_value=service):
+    return cal.find_free_slots.invoke(
+      {"time_min": "2026-01-12T00:00:00", "time_max": "2026-01-13T00:00:00", **args}
+    )
+
+
+def test_free_slots_around_busy_time():
+  # 10:00-11:00 and 11:00-12:30 HKT: back to back, no gap between them
+  result = _free_slots([
+    {"start": "2026-01-12T02:00:00Z", "end": "2026-01-12T03:00:00Z"},
+    {"start": "2026-01-12T03:00:00Z", "end": "2026-01-12T04:30:00Z"},
+  ])
+  assert result.splitlines()[1:] == [
+    "• Mon 2026-01-12 09:00–10:00 (60 min)",
+    "• Mon 2026-01-12 12:30–18:00 (330 min)",
+  ]
+
+
+def test_free_slots_empty_calendar_and_weekend():
+  assert _free_slots([]).splitlines()[1:] == ["• Mon 2026-01-12 09:00–18:00 (540 min)"]
+  weekend = {"time_min": "2026-01-10T00:00:00", "time_max": "2026-01-12T00:00:00"}
+  assert _free_slots([], **weekend).startswith("No free slots")
+  assert len(_free_slots([], include_weekends=True, **weekend).splitlines()) == 3
+
+
+def test_free_slots_rejects_malformed_times():
+  assert _free_slots([], time_min="garbage").startswith("find_free_slots error:")
+
+
+def _conflicts(events: list[dict], slots: list[dict]) -> list[str]:
+  service = mock.MagicMock()
+  service.events().list().execute.return_value = {"items": events}
+  with mock.patch.object(cal, "get_creds"), mock.patch.object(cal, "build", return_value=service):
+    return cal.check_conflicts.invoke({"slots": slots}).splitlines()
+
+
+def test_conflicts_touching_overlapping_and_all_day():
+  events = [
+    {"id": "m1", "summary": "Meeting", "start": {"dateTime": "2026-01-12T02:00:00Z"}, "end": {"dateTime": "2026-01-12T03:00:00Z"}},
+    {"id": "h1", "summary": "Holiday", "start": {"date": "2026-01-14"}, "end": {"date": "2026-01-15"}},
+    {"id": "f1", "summary": "Focus", "transparency": "transparent",
+     "start": {"dateTime": "2026-01-12T04:00:00Z"}, "end": {"dateTime": "2026-01-12T05:00:00Z"}},
+  ]
+  lines = _conflicts(events, [
+    {"start_time": "2026-01-12T11:00:00", "end_time": "2026-01-12T12:00:00"},   # touches the meeting
+    {"start_time": "2026-01-12T10:30:00", "end_time": "2026-01-12T11:30:00"},   # overlaps it
+    {"start_time": "2026-01-14T15:00:00", "end_time": "2026-01-14T16:00:00"},   # inside the all-day event
+    {"start_time": "2026-01-12T12:00:00", "end_time": "2026-01-12T13:00:00"},   # only a transparent event
+  ])
+  assert lines[0].startswith("[1] FREE")
+  assert lines[1].startswith("[2] CONFLICT") and "(ID: m1)" in lines[1]
+  assert lines[2].startswith("[3] CONFLICT") and "(ID: h1)" in lines[2]
+  assert lines[3].startswith("[4] FREE")
+
+
+def test_conflicts_empty_calendar_and_bad_slots():
+  assert _conflicts([], [{"start_time": "2026-01-12T10:00:00", "end_time": "2026-01-12T11:00:00"}])[0].startswith("[1] FREE")
+  assert _conflicts([], [])[0] == "check_conflicts error: no slots provided."
+  assert _conflicts([], [{"start_time": "2026-01-12T10:00:00"}])[0].startswith("check_conflicts error:")
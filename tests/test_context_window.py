@@ -0,0 +1,56 @@
+from src.managers import context_window
+from src.managers.context_window import ContextSizer
+
+_CONFIG = {"sizes": [4096, 8192, 16384], "shrink_after": 600}
+
+
+def _sizer(monkeypatch, **config) -> tuple[ContextSizer, list[float]]:
+  now = [1000.0]
+  monkeypatch.setattr(context_window.time, "monotonic", lambda: now[0])
+  return ContextSizer({**_CONFIG, **config}), now
+
+
+def test_smallest_bucket_that_fits(monkeypatch):
+  sizer, _ = _sizer(monkeypatch)
+  assert sizer.bucket_for("a", 3000, 16384) == 4096
+  assert sizer.bucket_for("b", 4097, 16384) == 8192
+  # Capped by the agent's num_ctx, and by the largest bucket
+  assert sizer.bucket_for("c", 12000, 8192) == 8192
+  assert sizer.bucket_for("d", 99999, 65536) == 16384
+
+
+def test_loaded_window_is_sticky_until_shrink_after(monkeypatch):
+  sizer, now = _sizer(monkeypatch)
+  assert sizer.bucket_for("m", 12000, 16384) == 16384
+
+  # Smaller calls reuse the resident window, without extending its lease
+  now[0] += 300
+  assert sizer.bucket_for("m", 1000, 16384) == 16384
+  now[0] += 299
+  assert sizer.bucket_for("m", 1000, 16384) == 16384
+
+  now[0] += 1
+  assert sizer.bucket_for("m", 1000, 16384) == 4096
+  # A call that needs more grows it again at once
+  assert sizer.bucket_for("m", 5000, 16384) == 8192
+
+
+def test_reset_and_note_loaded(monkeypatch):
+  sizer, _ = _sizer(monkeypatch)
+  sizer.bucket_for("m", 12000, 16384)
+  sizer.reset("m")
+  assert sizer.bucket_for("m", 1000, 16384) == 4096
+
+  sizer.note_loaded("w", 8192)
+  assert sizer.bucket_for("w", 1000, 16384) == 8192
+
+
+def test_disabled_uses_the_agent_num_ctx(monkeypatch):
+  sizer, _ = _sizer(monkeypatch, enabled=False)
+  assert sizer.bucket_for("m", 1000, 32768) == 32768
+
+
+def test_required_reserves_reply_and_tools():
+  sizer = ContextSizer({**_CONFIG, "margin": 0.1, "output_reserve": 2048, "tool_headroom": 8192})
+  assert sizer.required(1000, None, False) == 1100 + 2048
+  assert sizer.required(1000, 512, True) == 1100 + 512 + 8192
@@ -0,0 +1,11 @@
+from src.utils.helper import clean_html_content
+
+
+def test_css_blocks_dropped():
+  text = clean_html_content("<style>p { color: red; }</style><p>Hello</p> { a: {b} } world")
+  assert text == "Hello world"
+
+
+def test_unbalanced_brace_keeps_rest():
+  text = clean_html_content("<p>Your order :-{ was delayed.</p><p>Refund issued.</p>")
+  assert "was delayed." in text and "Refund issued." in text
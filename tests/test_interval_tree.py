@@ -0,0 +1,34 @@
+import random
+
+from src.utils.interval_tree import IntervalTree
+
+
+def test_half_open_touching_does_not_overlap():
+  tree = IntervalTree([(9, 10, "a"), (10, 11, "b"), (12, 14, "c")])
+  assert tree.overlapping(10, 11) == [(10, 11, "b")]
+  assert tree.overlapping(11, 12) == []
+  assert tree.overlapping(9, 13) == [(9, 10, "a"), (10, 11, "b"), (12, 14, "c")]
+
+
+def test_empty_tree():
+  tree = IntervalTree([])
+  assert len(tree) == 0
+  assert tree.overlapping(0, 100) == []
+
+
+def test_matches_brute_force():
+  rng = random.Random(7)
+  intervals = []
+  for i in range(300):
+    start = rng.randint(0, 1000)
+    intervals.append((start, start + rng.randint(1, 80), i))
+  tree = IntervalTree(intervals)
+
+  for _ in range(200):
+    start = rng.randint(-50, 1050)
+    end = start + rng.randint(1, 120)
+    expected = sorted(
+      (item for item in intervals if item[0] < end and item[1] > start),
+      key=lambda item: (item[0], item[1]),
+    )
+    assert tree.overlapping(start, end) == expected
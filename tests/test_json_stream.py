@@ -0,0 +1,62 @@
+import json
+
+from src.utils.json_stream import TaskStreamParser
+
+_PLAN = {
+  "tasks": [
+    {"step": 1, "agent": "Researcher", "instruction": "Find \"braces\" like {} and [ in text"},
+    {"step": 2, "agent": "Secretary", "instruction": "Book it", "meta": {"nested": [1, {"x": "}"}]}},
+    {"step": 3, "agent": "Responder", "instruction": "Reply \\\\ done"},
+  ]
+}
+
+
+def _feed(parser: TaskStreamParser, text: str, size: int) -> list[tuple[dict, bool]]:
+  emitted = []
+  for offset in range(0, len(text), size):
+    emitted += parser.feed(text[offset:offset + size])
+  return emitted + parser.finish()
+
+
+def test_any_chunking_emits_each_task_once():
+  text = json.dumps(_PLAN, indent=2)
+  expected = [(task, i == len(_PLAN["tasks"]) - 1) for i, task in enumerate(_PLAN["tasks"])]
+  for size in (1, 2, 3, 7, 64, len(text)):
+    parser = TaskStreamParser()
+    assert _feed(parser, text, size) == expected
+    assert parser.done and not parser.failed
+
+
+def test_task_emitted_once_its_delimiter_arrives():
+  parser = TaskStreamParser()
+  assert parser.feed('{"tasks": [{"step": 1}') == []
+  assert parser.feed(" ,") == [({"step": 1}, False)]
+  assert parser.feed('{"step": 2}]') == [({"step": 2}, True)]
+  assert parser.feed(', "ignored": [{"step": 3}]}') == []
+
+
+def test_other_arrays_and_bare_array():
+  parser = TaskStreamParser()
+  text = '{"notes": [{"step": 9}], "tasks": [{"step": 1}]}'
+  assert _feed(parser, text, 5) == [({"step": 1}, True)]
+
+  assert _feed(TaskStreamParser(), '[{"step": 1}, {"step": 2}]', 4) == [({"step": 1}, False), ({"step": 2}, True)]
+
+
+def test_truncated_stream_flushes_pending_task():
+  parser = TaskStreamParser()
+  assert parser.feed('{"tasks": [{"step": 1}, {"step": 2}') == [({"step": 1}, False)]
+  assert parser.finish() == [({"step": 2}, True)]
+
+  # A task cut mid-object is never emitted
+  parser = TaskStreamParser()
+  assert _feed(parser, '{"tasks": [{"step": 1}, {"step": 2, "agent": "Se', 3) == [({"step": 1}, False)]
+  assert not parser.done
+
+
+def test_malformed_task_stops_emission():
+  parser = TaskStreamParser()
+  assert parser.feed('{"tasks": [{"step": 1}, {"step": 2,}, {"step": 3}]}') == [({"step": 1}, False)]
+  assert parser.failed
+  assert parser.finish() == []
+  assert parser.text.endswith('{"step": 3}]}')
@@ -0,0 +1,68 @@
+from datetime import date, timedelta
+
+import numpy as np
+
+from src.tools.ledger_analytics import (
+  _category_mask, _normalize_description, _to_columns, category_zscores, detect_recurring, rolling_spend,
+)
+
+_START = date(2026, 1, 1)
+
+
+def _row(day: int, amount: float, description: str, category: str) -> tuple:
+  return (f"{_START + timedelta(days=day)} 12:00:00", amount, description, category)
+
+
+def test_normalize_description():
+  assert _normalize_description("NETFLIX.COM  8842") == _normalize_description("Netflix.com 9931") == "netflix.com #"
+
+
+def test_empty_ledger():
+  columns = _to_columns([])
+  assert rolling_spend(columns, _START, _START + timedelta(days=9), 7, _category_mask(columns, None)).tolist() == [0.0] * 10
+  assert len(category_zscores(columns)) == 0
+  assert detect_recurring(columns) == []
+
+
+def test_rolling_spend_matches_brute_force():
+  rng = np.random.default_rng(3)
+  rows = [
+    _row(int(rng.integers(0, 60)), float(rng.choice([-1, 1]) * rng.integers(1, 5000) / 100), "shop", "food" if i % 2 else "misc")
+    for i in range(200)
+  ]
+  columns = _to_columns(rows)
+  end = _START + timedelta(days=59)
+  mask = _category_mask(columns, "Food ")
+
+  rolling = rolling_spend(columns, _START, end, 7, mask)
+  for offset in range(60):
+    expected = sum(
+      -round(amount * 100) for when, amount, _, category in rows
+      if category == "food" and amount < 0 and offset - 7 < (date.fromisoformat(when[:10]) - _START).days <= offset
+    )
+    assert rolling[offset] == expected
+
+
+def test_zscores_flag_outliers_within_their_category():
+  rows = [_row(i, -10.0 - i % 3, "lunch", "food") for i in range(20)] + [_row(21, -200.0, "banquet", "food")]
+  rows += [_row(i, -900.0 - i, "rent", "housing") for i in range(3)]  # too few to judge
+  rows += [_row(1, 3000.0, "salary", "income")]
+  z = category_zscores(_to_columns(rows))
+
+  assert np.nanargmax(z) == 20 and z[20] > 4
+  assert np.isnan(z[21:]).all()   # housing below min_count, income not an expense
+  assert (np.abs(z[:20]) < 1).all()
+
+
+def test_detect_recurring():
+  rows = [_row(i * 30 + i % 2, -15.99, f"NETFLIX.COM {1000 + i}", "entertainment") for i in range(6)]
+  rows += [_row(i * 7, -40.0, "Gym", "health") for i in range(8)]
+  rows += [_row(day, -4.5, "Coffee", "food") for day in (0, 2, 9, 10, 30, 31)]   # irregular
+  rows += [_row(i * 30, -15.99 - i, "Power", "utilities") for i in range(6)]      # amount varies
+
+  found = {series.description.split()[0]: series for series in detect_recurring(_to_columns(rows))}
+  assert set(found) == {"NETFLIX.COM", "Gym"}
+  assert found["NETFLIX.COM"].period == "monthly" and found["NETFLIX.COM"].count == 6
+  assert found["NETFLIX.COM"].cents == -1599
+  assert found["NETFLIX.COM"].last_day == np.datetime64(_START + timedelta(days=151))
+  assert found["Gym"].period == "weekly" and found["Gym"].interval_days == 7.0
@@ -0,0 +1,57 @@
+import io
+
+from src.tools.ledger_import import _ofx_blocks, normalize_date, parse_csv, parse_ofx
+
+
+def _rows(tmp_path, name: str, dates: list[str], day_first: bool = True) -> list[str]:
+  path = tmp_path / name
+  path.write_text("date,description,amount\n" + "".join(f"{date},coffee,-4.5\n" for date in dates))
+  return [row[0][:10] for row in parse_csv(str(path), day_first)]
+
+
+def test_one_format_per_file(tmp_path):
+  # 12/25/2026 can only be month-first, so 03/04 and 03/05 are too
+  assert _rows(tmp_path, "us.csv", ["03/04/2026", "12/25/2026", "03/05/2026"]) == [
+    "2026-03-04", "2026-12-25", "2026-03-05",
+  ]
+
+
+def test_ambiguous_file_follows_day_first(tmp_path):
+  _rows(tmp_path, "us.csv", ["12/25/2026"])   # an earlier file must not leak into this one
+  assert _rows(tmp_path, "uk.csv", ["03/04/2026", "03/05/2026"]) == ["2026-04-03", "2026-05-03"]
+  assert _rows(tmp_path, "us2.csv", ["03/04/2026"], day_first=False) == ["2026-03-04"]
+
+
+def test_normalize_date_is_stateless():
+  assert normalize_date("12/25/2026") == "2026-12-25 00:00:00"
+  assert normalize_date("03/04/2026") == "2026-04-03 00:00:00"
+  assert normalize_date("03/04/2026", date_format="%m/%d/%Y") == "2026-03-04 00:00:00"
+  assert normalize_date("2026-03-04T10:30:00Z") == "2026-03-04 10:30:00"
+
+
+_OFX = """OFXHEADER:100
+<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>
+<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>20260304120000<TRNAMT>-4.50<NAME>Coffee</STMTTRN>
+<stmttrn><trntype>CREDIT<dtposted>20260305<trnamt>1200.00<name>Salary<memo>March</stmttrn>
+<STMTTRN><DTPOSTED>bad<TRNAMT>-1</STMTTRN>
+</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>
+"""
+
+
+def test_ofx_blocks_split_across_chunks():
+  # Every chunk size cuts tags and transactions at a different place
+  expected = list(_ofx_blocks(io.StringIO(_OFX), chunk_size=len(_OFX)))
+  assert len(expected) == 3
+  for chunk_size in range(1, 40):
+    assert list(_ofx_blocks(io.StringIO(_OFX), chunk_size)) == expected
+
+
+def test_parse_ofx(tmp_path):
+  path = tmp_path / "statement.ofx"
+  path.write_text(_OFX)
+  errors = []
+  assert list(parse_ofx(str(path), errors)) == [
+    ("2026-03-04 12:00:00", -4.5, "Coffee", None),
+    ("2026-03-05 00:00:00", 1200.0, "Salary - March", None),
+  ]
+  assert errors == ["transaction 3: bad DTPOSTED 'bad'"]
@@ -0,0 +1,43 @@
+import json
+
+from src.utils.memory_packer import MemoryPacker
+from src.utils.tokens import estimate_tokens
+
+
+def _entries(count: int) -> list[dict]:
+  # newest first
+  return [
+    {"user_request": f"request {count - age}", "task_outputs": [{"agent": "Secretary", "summary": "s" * 1000}]}
+    for age in range(count)
+  ]
+
+
+def test_budget_respected_and_omitted_counted():
+  packer = MemoryPacker({"budget_tokens": 400})
+  context = {"current_datetime": "Monday 2026-10-19 09:00 HKT"}
+  packed = packer.pack(_entries(10), query="", context=context)
+  memory = json.loads(packed)
+  assert estimate_tokens(packed) <= 400
+  assert 0 < len(memory["state_memory"]) < 10
+  assert memory["omitted_turns"] == 10 - len(memory["state_memory"])
+  assert memory["current_datetime"] == context["current_datetime"]
+
+
+def test_entries_clipped_and_emitted_oldest_first():
+  packer = MemoryPacker({"budget_tokens": 4000, "summary_chars": 50, "recency_weight": 1, "relevance_weight": 0})
+  memory = json.loads(packer.pack(_entries(3)))
+  assert [entry["user_request"] for entry in memory["state_memory"]] == ["request 1", "request 2", "request 3"]
+  assert all(len(entry["task_outputs"][0]["summary"]) <= 51 for entry in memory["state_memory"])
+  assert "omitted_turns" not in memory
+
+
+def test_relevant_turn_kept_over_newer_ones():
+  entries = _entries(6)
+  entries[-1]["user_request"] = "monthly budget spending report"
+  packer = MemoryPacker({"budget_tokens": 250, "relevance_weight": 1, "recency_weight": 0.1})
+  memory = json.loads(packer.pack(entries, query="show my spending report for the budget"))
+  assert "monthly budget spending report" in [entry["user_request"] for entry in memory["state_memory"]]
+
+
+def test_context_only():
+  assert json.loads(MemoryPacker().pack([], context={"current_timezone": "HKT"})) == {"current_timezone": "HKT"}
@@ -0,0 +1,84 @@
+import asyncio
+import json
+
+from src.agents.orchestrator import OrchestratorAgent
+
+PLAN = {"tasks": [
+  {"step": 1, "agent": "Secretary", "instruction": "list today's events", "can_run_in_parallel": False},
+  {"step": 2, "agent": "Emailer", "instruction": "mail the list", "can_run_in_parallel": False},
+]}
+
+
+def _orchestrator():
+  return OrchestratorAgent.__new__(OrchestratorAgent)   # local parsing needs no model
+
+
+def test_complete_plan_with_unknown_agent_is_not_shortened():
+  assert _orchestrator()._local_plan(json.dumps(PLAN)) == (None, None)
+
+
+def test_truncated_plan_drops_incomplete_last_task():
+  plan, outcome = _orchestrator()._local_plan(json.dumps(PLAN)[:-30])
+  assert outcome == "repaired"
+  assert [task["agent"] for task in plan["tasks"]] == ["Secretary"]
+
+
+def _streamed(text: str, repaired: str | None = None, chunk: int = 7):
+  orchestrator = _orchestrator()
+  orchestrator._run_streaming = lambda _: (text[i:i + chunk] for i in range(0, len(text), chunk))
+  if repaired is not None:
+    # Stands in for the LLM repair call
+    orchestrator._parse_plan = lambda raw: orchestrator._repaired_plan(raw, repaired)
+  return list(orchestrator.stream_plan("request"))
+
+
+def test_stream_coerces_each_task():
+  text = json.dumps({"tasks": [
+    {"step": 3, "agent": "secretary", "instruction": "list today's events"},
+    {"step": 3, "agent": "Researcher Agent", "instruction": "look it up", "can_run_in_parallel": "yes"},
+  ]})
+  assert _streamed(text) == [
+    ({"step": 1, "agent": "Secretary", "instruction": "list today's events", "can_run_in_parallel": False}, False),
+    ({"step": 2, "agent": "Researcher", "instruction": "look it up", "can_run_in_parallel": True}, True),
+  ]
+
+
+def test_truncated_stream_emits_each_task_once():
+  text = json.dumps({"tasks": [
+    {"step": 1, "agent": "Secretary", "instruction": "a"},
+    {"step": 2, "agent": "Researcher", "instruction": "b"},
+    {"step": 3, "agent": "Secretary", "instruction": "c"},
+  ]})[:-40]
+  tasks = [task for task, _ in _streamed(text)]
+  assert [(task["step"], task["instruction"]) for task in tasks] == [(1, "a"), (2, "b")]
+
+
+def test_unknown_agent_midstream_continues_from_repaired_plan():
+  text = json.dumps({"tasks": [
+    {"step": 1, "agent": "Secretary", "instruction": "a"},
+    {"step": 2, "agent": "Emailer", "instruction": "b"},
+  ]})
+  repaired = json.dumps({"tasks": [
+    {"step": 1, "agent": "Secretary", "instruction": "a"},
+    {"step": 2, "agent": "Communicator", "instruction": "b"},
+  ]})
+  assert [(task["step"], task["agent"], is_last) for task, is_last in _streamed(text, repaired)] == [
+    (1, "Secretary", False), (2, "Communicator", True),
+  ]
+
+
+def test_async_stream_coerces_each_task():
+  text = json.dumps({"tasks": [{"step": 2, "agent": "accountant agent", "instruction": "sum it"}]})
+  orchestrator = _orchestrator()
+
+  async def astream(_):
+    for i in range(0, len(text), 5):
+      yield text[i:i + 5]
+
+  async def collect():
+    return [item async for item in orchestrator.astream_plan("request")]
+
+  orchestrator.astream = astream
+  assert asyncio.run(collect()) == [
+    ({"step": 1, "agent": "Accountant", "instruction": "sum it", "can_run_in_parallel": False}, True),
+  ]
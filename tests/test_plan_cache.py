@@ -0,0 +1,58 @@
+import threading
+import time
+
+import numpy as np
+
+from src.managers.plan_cache import PlanCache, retemplate
+from src.schemas.data_models import OrchestratorPlan
+
+
+def test_retemplate_substitutes_dates_and_names():
+  assert retemplate(
+    "what is on my calendar today", "what is on my calendar tomorrow",
+    ["List calendar events for today"],
+  ) == ["List calendar events for tomorrow"]
+  assert retemplate(
+    "summarize emails from Alice", "summarize emails from Bob",
+    ["Summarize unread emails from Alice"],
+  ) == ["Summarize unread emails from Bob"]
+
+
+def test_retemplate_rejects_routing_words():
+  # Same shape, different agent: the cached plan must not be reused
+  assert retemplate(
+    "summarize my emails from today", "summarize my expenses from today",
+    ["Summarize emails received today"],
+  ) is None
+  assert retemplate(
+    "search the web for pasta recipes", "search my notes for pasta recipes",
+    ["Search the web for pasta recipes"],
+  ) is None
+
+
+def test_lookup_embeds_outside_the_lock(tmp_path):
+  cache = PlanCache({"path": str(tmp_path / "plans.sqlite"), "threshold": 0.5})
+
+  def slow_embed(request):
+    time.sleep(0.2)
+    return np.ones(4, dtype=np.float32) / 2.0
+
+  cache._embed = slow_embed
+  plan = OrchestratorPlan.model_validate(
+    {"tasks": [{"step": 1, "agent": "Researcher", "instruction": "Find pasta recipes"}]}
+  )
+  cache.store("find pasta recipes", plan)
+
+  results = []
+  threads = [
+    threading.Thread(target=lambda: results.append(cache.lookup("find pasta recipes")))
+    for _ in range(4)
+  ]
+  start = time.perf_counter()
+  for thread in threads:
+    thread.start()
+  for thread in threads:
+    thread.join()
+
+  assert time.perf_counter() - start < 0.6
+  assert all(match and match.plan == plan for match in results)
@@ -0,0 +1,38 @@
+import sqlite3
+
+from src.tools.ledger_schema import MIGRATIONS
+from src.tools.sql_validator import validate_read_query
+from src.utils.db import SQLiteManager
+
+
+def _ledger(tmp_path) -> str:
+  path = str(tmp_path / "ledger.db")
+  manager = SQLiteManager(path)
+  manager.migrate(MIGRATIONS)
+  manager.close_all()
+  return path
+
+
+def test_fts_query_valid_on_fresh_connection(tmp_path):
+  # First FTS use on a connection parses the vtab schema (UPDATE sqlite_master,
+  # PRAGMA data_version); that must not count against the read-only check
+  conn = sqlite3.connect(_ledger(tmp_path))
+  result = validate_read_query(
+    conn,
+    "SELECT t.* FROM transactions t JOIN transactions_fts f ON f.rowid = t.rowid "
+    "WHERE transactions_fts MATCH 'coffee'",
+  )
+  assert result.valid, result.error
+
+
+def test_writes_still_rejected(tmp_path):
+  conn = sqlite3.connect(_ledger(tmp_path))
+  for query in (
+    "DELETE FROM transactions",
+    "UPDATE transactions SET amount = 0",
+    "INSERT INTO transactions_fts (transactions_fts) VALUES ('rebuild')",
+    "PRAGMA user_version = 1",
+  ):
+    result = validate_read_query(conn, query)
+    assert not result.valid, query
+    assert conn.execute("PRAGMA user_version").fetchone()[0] > 1
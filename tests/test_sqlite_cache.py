@@ -0,0 +1,20 @@
+import pytest
+
+from src.tools.sqlite import is_deterministic
+
+
+@pytest.mark.parametrize("query", [
+  "SELECT * FROM transactions WHERE datetime >= date('now', '-7 days')",
+  "SELECT * FROM transactions WHERE datetime >= CURRENT_DATE",
+  "SELECT * FROM transactions ORDER BY RANDOM() LIMIT 1",
+  "SELECT strftime('%Y-%m')",
+  "SELECT julianday() - julianday(datetime) FROM transactions",
+])
+def test_clock_and_random_queries_not_cached(query):
+  assert not is_deterministic(query)
+
+
+def test_plain_reads_cached():
+  assert is_deterministic("SELECT * FROM transactions WHERE datetime >= date('2026-01-01', '-7 days')")
+  assert is_deterministic("SELECT strftime('%Y-%m', datetime) FROM transactions")
+  assert not is_deterministic("SELECT date(?)", ("now",))
@@ -0,0 +1,20 @@
+from src.tools.sqlite import add_transaction, compare_months, spending_trend, summarize_month
+
+
+def _seed():
+  for when, amount in (("2026-01-05 10:00:00", -10), ("2026-02-05 10:00:00", -20), ("2026-10-05 10:00:00", -40)):
+    add_transaction.invoke({"amount": amount, "description": f"month test {when}", "datetime": when, "category": "months_test"})
+
+
+def test_unpadded_months_normalized():
+  _seed()
+  trend = spending_trend.invoke({"start_month": "2026-1", "end_month": "2026-2", "category": "months_test"})
+  assert "Jan 2026" in trend and "Feb 2026" in trend
+  assert "Oct 2026" not in trend   # '2026-10' sorts between '2026-1' and '2026-2' as a string
+
+
+def test_malformed_months_return_errors():
+  assert spending_trend.invoke({"start_month": "March 2026", "end_month": "2026-04"}).startswith("spending_trend error:")
+  assert spending_trend.invoke({"start_month": "2026-05", "end_month": "2026-04"}).startswith("spending_trend error:")
+  assert compare_months.invoke({"month_a": "March 2026", "month_b": "2026-01"}).startswith("compare_months error:")
+  assert summarize_month.invoke({"year": 2026, "month": 13}).startswith("summarize_month error:")
@@ -0,0 +1,36 @@
+import asyncio
+import time
+
+from src.tools import tavily
+
+
+async def _client():
+  return tavily._async_tavily_client()
+
+
+def test_async_client_per_event_loop():
+  # An httpx pool from a closed loop fails with "Event loop is closed"
+  assert asyncio.run(_client()) is not asyncio.run(_client())
+
+  async def same_loop():
+    return tavily._async_tavily_client() is tavily._async_tavily_client()
+
+  assert asyncio.run(same_loop())
+
+
+def test_sync_extract_times_out_per_url(monkeypatch):
+  def extract(url, include_images):
+    if "slow" in url:
+      time.sleep(1)
+    return {"url": url, "raw_content": "ok"}
+
+  monkeypatch.setattr(tavily, "_extract_one", extract)
+  monkeypatch.setattr(tavily, "EXTRACT_TIMEOUT", 0.2)
+  urls = [f"https://slow.example/{i}" for i in range(tavily.EXTRACT_MAX_WORKERS + 1)]
+
+  start = time.perf_counter()
+  results = tavily.tavily_extract_content.func(urls + ["https://fast.example"])
+  # Not one timeout per "wave" of workers: every URL is bounded from its own submit
+  assert time.perf_counter() - start < 0.35
+  assert [result["url"] for result in results] == urls + ["https://fast.example"]
+  assert all("timed out" in result["error"] for result in results[:-1])
@@ -0,0 +1,53 @@
+import json
+import re
+
+from src.tools.tool_output import budget_for, read_more, shape_output
+from src.utils.tokens import estimate_tokens
+
+_HANDLE_RE = re.compile(r'read_more\(handle="([^"]+)"\)')
+
+
+def _pages(content: str, budget: int) -> list[str]:
+  pages = [shape_output("test_tool", content, budget)]
+  while match := _HANDLE_RE.search(pages[-1]):
+    pages.append(read_more.invoke({"handle": match.group(1)}))
+  return pages
+
+
+def _within_budget(pages: list[str], budget: int) -> bool:
+  # read_more pages use the tool's configured budget
+  return estimate_tokens(pages[0]) <= budget and all(
+    estimate_tokens(page) <= budget_for("test_tool") for page in pages[1:]
+  )
+
+
+def test_small_output_unchanged():
+  assert shape_output("test_tool", "short", 500) == "short"
+
+
+def test_long_header_field_within_budget():
+  content = json.dumps({"results": [{"title": f"r{i}"} for i in range(5)], "note": "x" * 30000})
+  pages = _pages(content, 500)
+  assert _within_budget(pages, 500)
+  assert sum(page.count("x") for page in pages) >= 30000
+
+
+def test_oversized_string_items_within_budget():
+  content = json.dumps(["a" * 20000, "b" * 20000])
+  pages = _pages(content, 500)
+  assert _within_budget(pages, 500)
+  assert sum(page.count("a") for page in pages) >= 20000
+  assert sum(page.count("b") for page in pages) >= 20000
+
+
+def test_non_ascii_text_within_budget():
+  pages = _pages("會議記錄" * 3000, 500)
+  assert len(pages) > 1
+  assert _within_budget(pages, 500)
+
+
+def test_duplicate_items_dropped():
+  items = [{"id": i % 3, "body": "y" * 400} for i in range(30)]
+  shaped = shape_output("test_tool", json.dumps(items), 2000)
+  assert "read_more" not in shaped
+  assert shaped.count('"id"') == 3
@@ -0,0 +1,39 @@
+import asyncio
+
+import src.managers.workflow_manager as workflow_manager
+from src.managers.workflow_manager import WorkflowManager
+
+
+class _SlowClosingOrchestrator:
+  """Emits two dependent tasks, then keeps streaming after the first finished."""
+
+  async def astream_plan(self, _):
+    yield {"step": 1, "agent": "Secretary", "instruction": "a", "can_run_in_parallel": False}, False
+    yield {"step": 2, "agent": "Secretary", "instruction": "b", "can_run_in_parallel": False}, True
+    await asyncio.sleep(0.05)   # closing tokens
+
+
+def test_tasks_finishing_before_stream_end(monkeypatch):
+  monkeypatch.setattr(workflow_manager, "OrchestratorAgent", _SlowClosingOrchestrator)
+  manager = WorkflowManager(lambda *args, **kwargs: None)
+  order = []
+
+  def make_node(step, is_last_task=False):
+    async def node(state):
+      order.append(step)
+      state.mark_completed(step, summary="", output=str(step))
+      return state
+    return node
+
+  manager._make_async_task_node = make_node
+  plan, state = asyncio.run(manager._aplan_and_execute("request"))
+  assert order == [1, 2]
+  assert [task.step for task in plan.tasks] == [1, 2]
+
+
+def test_state_memory_shared_by_every_task_of_a_turn():
+  manager = WorkflowManager(lambda *args, **kwargs: None)
+  first = manager._resolve_inputs("list today's events", "plan my day")
+  second = manager._resolve_inputs("check my budget", "plan my day")
+  head = lambda text: text[:text.index("Instruction:")]
+  assert head(first) == head(second)